@@ -0,0 +1,25 @@
+// Standings bar chart drawn in the browser from the standings of the data snapshot
+// (see dashboard.py): switching conference sends no request to the server.
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    standings: {
+        // Same figure as update_standings_graph in dashboard.py
+        render: function (conference, data) {
+            const columns = (data && data.conferences[conference]) || {Team: [], Wins: [], Losses: [], "Win%": [], GB: []};
+            // Alternate colors between blue and orange
+            const colors = columns.Team.map((_, i) => (i % 2 === 0 ? "#1F77B4" : "#FF7F0E"));
+            // Standings aggregated before a team's first game have no win%
+            const winPct = (value) => (Number.isFinite(value) ? value.toFixed(3) : "-");
+            const hovertext = columns.Team.map((_, i) =>
+                `${columns.Wins[i]}-${columns.Losses[i]}, ${winPct(columns["Win%"][i])}, GB ${columns.GB[i]}`);
+            return {
+                data: [{type: "bar", x: columns.Team, y: columns.Wins, hovertext: hovertext, marker: {color: colors}}],
+                layout: {
+                    title: {text: `Standings - ${conference}`},
+                    xaxis: {title: {text: "Teams"}},
+                    yaxis: {title: {text: "Wins"}},
+                    height: 400
+                }
+            };
+        }
+    }
+});
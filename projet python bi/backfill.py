@@ -0,0 +1,137 @@
+import argparse
+import json
+import os
+from datetime import datetime, timedelta
+
+from bs4 import BeautifulSoup
+
+from fetcher import Fetcher, own_fetcher, DEFAULT_MAX_WORKERS, DEFAULT_REQUESTS_PER_SECOND
+from http_cache import ResponseCache, DEFAULT_CACHE_PATH
+from scraper import BASE_URL, boxscore_index_url, parse_game_summaries, fetch_game_totals, append_games
+import storage
+import transport
+
+DEFAULT_CHECKPOINT = os.path.join(storage.DATA_DIR, "backfill_checkpoint.json")
+
+
+# ----------------- Date Helpers -----------------
+def date_range(start, end):
+    """Yield every date from start to end, inclusive."""
+    day = start
+    while day <= end:
+        yield day
+        day += timedelta(days=1)
+
+
+def season_dates(season):
+    """Date bounds of an NBA season, named after the year it ends in (2025 = 2024-25)."""
+    return datetime(season - 1, 10, 1).date(), datetime(season, 6, 30).date()
+
+
+# ----------------- Checkpointing -----------------
+def load_checkpoint(path):
+    """Dates already done, including dates without games."""
+    if not os.path.exists(path):
+        return set()
+    with open(path) as f:
+        return set(json.load(f)["completed"])
+
+
+def save_checkpoint(path, done):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"completed": sorted(done)}, f, indent=1)
+    os.replace(tmp_path, path)
+
+
+# ----------------- Backfill -----------------
+def backfill_date(fetcher, day, base_url=BASE_URL, player_sink=None):
+    """Scrape every game of one date; returns (rows, complete)."""
+    response = fetcher.get(boxscore_index_url(day, base_url))
+    if response.status_code != 200:
+        print(f"Failed to fetch boxscore index for {day}. Status: {response.status_code}")
+        return [], False
+
+    soup = BeautifulSoup(response.text, "html.parser")
+    game_list = parse_game_summaries(soup, f"{day:%Y%m%d}", base_url)
+    if not game_list:
+        return [], True
+
+    rows, failed = fetch_game_totals(fetcher, game_list, day.strftime("%B %d, %Y"), player_sink)
+    return rows, failed == 0
+
+
+def backfill(start, end, checkpoint=DEFAULT_CHECKPOINT, fetcher=None, base_url=BASE_URL):
+    """Scrape all boxscores between two dates into the scores store, resuming from the checkpoint.
+
+    Each completed date is committed to the store on its own: only its month partition is rewritten.
+    Player lines of the same boxscores are appended to the player_boxscores store with their date.
+    """
+    with own_fetcher(fetcher) as fetcher:
+        # Player lines wait for their date: written when it is committed, dropped when it is not
+        player_sink = storage.BatchWriter("player_boxscores", batch_rows=None)
+        os.makedirs(os.path.dirname(checkpoint) or ".", exist_ok=True)
+        done = load_checkpoint(checkpoint)
+
+        todo = [day for day in date_range(start, end) if f"{day:%Y-%m-%d}" not in done]
+        print(f"Backfill {start} -> {end}: {len(todo)} dates to scrape, {len(done)} already done")
+
+        for day in todo:
+            try:
+                rows, complete = backfill_date(fetcher, day, base_url, player_sink)
+            except Exception as e:
+                print(f"Failed to backfill {day}: {e}")
+                player_sink.discard()
+                continue
+            if not complete:
+                # Leave the date out of the checkpoint so the next run retries it
+                print(f"{day}: incomplete, will retry on the next run")
+                player_sink.discard()
+                continue
+            # A crash between these steps only redoes the date: games already stored are skipped,
+            # duplicate player lines are dropped by `storage.py compact`
+            player_sink.flush()
+            append_games(rows)
+            done.add(f"{day:%Y-%m-%d}")
+            save_checkpoint(checkpoint, done)
+            print(f"{day}: {len(rows)} games saved")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backfill historical NBA boxscores over a date range.")
+    parser.add_argument("--start", help="First date (YYYY-MM-DD)")
+    parser.add_argument("--end", help="Last date (YYYY-MM-DD), defaults to yesterday")
+    parser.add_argument("--season", type=int, action="append",
+                        help="Season to backfill, by the year it ends in (repeatable)")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="File listing the completed dates")
+    parser.add_argument("--max-workers", type=int, default=DEFAULT_MAX_WORKERS)
+    parser.add_argument("--rps", type=float, default=DEFAULT_REQUESTS_PER_SECOND)
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH)
+    transport.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    yesterday = datetime.now().date() - timedelta(days=1)
+    if args.season:
+        ranges = [season_dates(season) for season in args.season]
+    elif args.start:
+        end = datetime.strptime(args.end, "%Y-%m-%d").date() if args.end else yesterday
+        ranges = [(datetime.strptime(args.start, "%Y-%m-%d").date(), end)]
+    else:
+        parser.error("either --start or --season is required")
+
+    # Boxscores already downloaded by an interrupted run are served from the cache
+    cache = None if args.record or args.replay else ResponseCache(args.cache)
+    fetcher = Fetcher(max_workers=args.max_workers, requests_per_second=args.rps, cache=cache,
+                      transport=transport.from_args(args, args.max_workers))
+    try:
+        for start, end in ranges:
+            backfill(start, min(end, yesterday), args.checkpoint, fetcher, args.base_url)
+    finally:
+        fetcher.close()
+        if cache:
+            cache.report()
+            cache.close()
+
+if __name__ == "__main__":
+    main()
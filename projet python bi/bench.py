@@ -0,0 +1,626 @@
+import argparse
+import contextlib
+import glob
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+from io import StringIO
+
+import numpy as np
+import pandas as pd
+from bs4 import BeautifulSoup
+from plotly.io.json import to_json_plotly
+
+import etl
+import metrics
+import player_search
+import scraper
+import storage
+import synthetic
+import transport
+from fetcher import Fetcher
+from warehouse import Warehouse
+
+BASELINE_PATH = "bench_baseline.json"
+
+
+# ----------------- Helpers -----------------
+def best_of(func, repeat):
+    """Best wall-clock time of `repeat` calls, and the last result."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def report(name, old_time, new_time, same):
+    speedup = old_time / new_time if new_time else float("inf")
+    status = "identical" if same else "MISMATCH"
+    print(f"{name:<22} old {old_time * 1000:9.2f} ms   new {new_time * 1000:9.2f} ms   x{speedup:6.1f}   {status}")
+
+
+def read_fixture(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+# ----------------- Reference (pre-optimization) parsers -----------------
+def legacy_team_totals(html, away_team_abbr, home_team_abbr):
+    soup = BeautifulSoup(html, "html.parser")
+    team_totals = {}
+    for side, team_abbr in [("Away", away_team_abbr), ("Home", home_team_abbr)]:
+        team_table = soup.find("table", {"id": f"box-{team_abbr}-game-basic"})
+        if team_table:
+            for row in team_table.find_all("tr"):
+                if row.find("th") and row.find("th").text.strip() == "Team Totals":
+                    cols = row.find_all("td")
+                    if len(cols) > 0:
+                        team_totals.update({
+                            f"{side} {stat}": cols[i + 1].text.strip()
+                            for i, stat in enumerate(scraper.TEAM_TOTALS_STATS)
+                        })
+    return team_totals
+
+
+def legacy_standings(html):
+    soup = BeautifulSoup(html, "html.parser")
+    standings = []
+    for conference_id, conference_name in [
+        ("confs_standings_E", "Eastern Conference"),
+        ("confs_standings_W", "Western Conference")
+    ]:
+        table = soup.find("table", {"id": conference_id})
+        if table:
+            for row in table.find("tbody").find_all("tr"):
+                if "class" in row.attrs and "thead" in row.attrs["class"]:
+                    continue
+                team = row.find("a")
+                if team:
+                    cells = row.find_all("td")
+                    standings.append({
+                        "Conference": conference_name,
+                        "Team": team.text.strip(),
+                        "Wins": cells[0].text.strip(),
+                        "Losses": cells[1].text.strip()
+                    })
+    return standings
+
+
+def legacy_player_stats(html):
+    soup = BeautifulSoup(html, "html.parser")
+    table = soup.find("table")
+    df = pd.read_html(StringIO(str(table)), header=0)[0]
+    # Drop the header rows repeated every 25 rows and re-infer the numeric columns
+    df = df[df["Rk"].astype(str) != "Rk"]
+    for column in df.columns:
+        converted = pd.to_numeric(df[column], errors="coerce")
+        if converted.notna().sum() == df[column].notna().sum():
+            df[column] = converted
+    return df
+
+
+def legacy_select_player_stats(df):
+    player_stats = []
+    for index, row in df.iterrows():
+        player_stats.append({column: row[column] for column in scraper.PLAYER_STATS_COLUMNS})
+    return pd.DataFrame(player_stats)
+
+
+def synthetic_per_game_table(rows):
+    """A frame shaped like the parsed per-game table (all site columns), with random values."""
+    rng = np.random.default_rng(0)
+    columns = ["Rk", "Player", "Age", "Team", "Pos", "G", "GS", "MP", "FG", "FGA", "FG%", "3P", "3PA",
+               "3P%", "2P", "2PA", "2P%", "eFG%", "FT", "FTA", "FT%", "ORB", "DRB", "TRB", "AST", "STL",
+               "BLK", "TOV", "PF", "PTS", "Awards"]
+    df = pd.DataFrame(rng.random((rows, len(columns))) * 30, columns=columns)
+    df["Rk"] = np.arange(1, rows + 1, dtype="float64")
+    df["Player"] = [f"Player {i}" for i in range(rows)]
+    df["Player ID"] = [f"player{i:02d}" for i in range(rows)]
+    df["Team"] = rng.choice(["BOS", "DEN", "LAL", "MIL", "NYK"], rows)
+    df["Pos"] = rng.choice(["PG", "SG", "SF", "PF", "C"], rows)
+    df["Awards"] = None
+    return df
+
+
+def synthetic_clean_scores(rows, days=200):
+    """Clean daily scores frame with `rows` games spread over `days` dates."""
+    rng = np.random.default_rng(0)
+    teams = list(scraper.TEAM_ABBRS)
+    dates = pd.date_range("2024-10-22", periods=days).strftime("%B %d, %Y")
+    df = pd.DataFrame({
+        "Game ID": [f"G{i:08d}" for i in range(rows)],
+        "Date": rng.choice(dates, rows),
+        "Away Team": rng.choice(teams, rows),
+        "Home Team": rng.choice(teams, rows),
+        "Away Score": rng.integers(80, 140, rows),
+        "Home Score": rng.integers(80, 140, rows),
+    })
+    for column in storage.SCORES_TOTALS:
+        df[column] = rng.random(rows) * 50
+    return storage.conform("daily_scores_clean", df)
+
+
+def synthetic_standings(snapshots):
+    """Standings of the 30 teams over `snapshots` days."""
+    rng = np.random.default_rng(0)
+    teams = list(scraper.TEAM_ABBRS)
+    days = pd.date_range("2024-10-22", periods=snapshots).strftime("%Y-%m-%d")
+    return pd.DataFrame({
+        "Snapshot": np.repeat(days, len(teams)),
+        "Conference": np.tile(["Eastern Conference", "Western Conference"] * 15, snapshots),
+        "Team": np.tile(teams, snapshots),
+        "Wins": rng.integers(0, 82, snapshots * len(teams)),
+        "Losses": rng.integers(0, 82, snapshots * len(teams)),
+    })
+
+
+def same_frame(a, b):
+    try:
+        pd.testing.assert_frame_equal(a.reset_index(drop=True), b.reset_index(drop=True), check_dtype=False)
+        return True
+    except AssertionError as e:
+        print(e)
+        return False
+
+
+# ----------------- Benchmarks -----------------
+def bench_parse(fixture_dir, repeat):
+    """Compare the old full-tree BeautifulSoup parsing with html_tables on saved pages.
+
+    `fixture_dir` mirrors the site layout: boxscores/YYYYMMDD0ABC.html and
+    leagues/NBA_YYYY_standings.html / leagues/NBA_YYYY_per_game.html.
+    """
+    print(f"----- Parsing ({fixture_dir}, best of {repeat}) -----")
+
+    pages = [read_fixture(p) for p in sorted(glob.glob(os.path.join(fixture_dir, "boxscores", "*0???.html")))]
+    if pages:
+        # Away table comes first on the page
+        abbrs = [re.findall(r'id="box-([A-Z]{3})-game-basic"', html)[:2] for html in pages]
+        old_time, old = best_of(lambda: [legacy_team_totals(h, *a) for h, a in zip(pages, abbrs)], repeat)
+        new_time, new = best_of(lambda: [scraper.parse_team_totals(h, *a) for h, a in zip(pages, abbrs)], repeat)
+        report(f"team totals ({len(pages)})", old_time, new_time, old == new)
+
+    for path in glob.glob(os.path.join(fixture_dir, "leagues", "NBA_*_standings.html")):
+        html = read_fixture(path)
+        old_time, old = best_of(lambda: legacy_standings(html), repeat)
+        new_time, new = best_of(lambda: scraper.parse_league_standings(html), repeat)
+        report("standings", old_time, new_time, old == new)
+
+    for path in glob.glob(os.path.join(fixture_dir, "leagues", "NBA_*_per_game.html")):
+        html = read_fixture(path)
+        old_time, old = best_of(lambda: legacy_player_stats(html), repeat)
+        new_time, new = best_of(lambda: scraper.parse_player_stats(html), repeat)
+        # The legacy parser read no player ids
+        report("player stats", old_time, new_time, same_frame(old, new.drop(columns="Player ID")))
+
+
+def bench_player_columns(rows, repeat):
+    """Compare the old per-row dict building with the columnar select_player_stats."""
+    print(f"----- Player stats columns ({rows} rows, best of {repeat}) -----")
+    df = synthetic_per_game_table(rows)
+    old_time, old = best_of(lambda: legacy_select_player_stats(df), repeat)
+    new_time, new = best_of(lambda: scraper.select_player_stats(df), repeat)
+    report("select columns", old_time, new_time, same_frame(old, new))
+
+
+def bench_storage(rows, repeat):
+    """Compare CSV and Parquet writes, full reads and projected reads of the clean scores."""
+    print(f"----- Storage ({rows} games, best of {repeat}) -----")
+    df = synthetic_clean_scores(rows)
+    projection = ["Date", "Away Team", "Home Team", "Away Score", "Home Score"]
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            name = "daily_scores_clean"
+            csv_write, _ = best_of(lambda: storage.write(name, df, fmt="csv"), repeat)
+            pq_write, _ = best_of(lambda: storage.write(name, df, fmt="parquet"), repeat)
+            report("write", csv_write, pq_write, True)
+
+            csv_read, old = best_of(lambda: storage.read(name, fmt="csv"), repeat)
+            pq_read, new = best_of(lambda: storage.read(name, fmt="parquet"), repeat)
+            # CSV keeps ~15 significant digits, so floats compare approximately
+            old, new = old.sort_values("Game ID"), new.sort_values("Game ID")
+            report("read all", csv_read, pq_read, same_frame(old.astype(object), new.astype(object)))
+
+            csv_proj, _ = best_of(lambda: storage.read(name, columns=projection, fmt="csv"), repeat)
+            pq_proj, _ = best_of(lambda: storage.read(name, columns=projection, fmt="parquet"), repeat)
+            report("read 5 columns", csv_proj, pq_proj, True)
+
+            csv_size = os.path.getsize(storage.csv_path(name))
+            pq_size = sum(os.path.getsize(os.path.join(d, f))
+                          for d, _, files in os.walk(storage.parquet_path(name)) for f in files)
+            print(f"{'size on disk':<22} csv {csv_size / 1e6:8.2f} MB   parquet {pq_size / 1e6:8.2f} MB")
+        finally:
+            os.chdir(cwd)
+
+
+def bench_warehouse(rows, repeat, lookups=200):
+    """Compare pandas full scans of the clean frames (the dashboard's old filters) with indexed SQLite lookups."""
+    print(f"----- Warehouse ({rows} games and players, {lookups} lookups, best of {repeat}) -----")
+    rng = np.random.default_rng(1)
+    # About 8 games a night, like a real schedule
+    scores = synthetic_clean_scores(rows, days=max(rows // 8, 1))
+    players = storage.conform("player_stats_clean",
+                              etl.clean_player_stats_frame(scraper.select_player_stats(synthetic_per_game_table(rows))))
+    standings = synthetic_standings(200)
+    with tempfile.TemporaryDirectory() as tmp:
+        warehouse = Warehouse(os.path.join(tmp, "warehouse.sqlite"))
+        start = time.perf_counter()
+        warehouse.load_games(scores)
+        warehouse.load_player_stats(players, season=2025)
+        for snapshot, snap in standings.groupby("Snapshot"):
+            warehouse.load_standings(snap, snapshot_date=snapshot, season=2025)
+        print(f"{'load':<22} {time.perf_counter() - start:9.2f} s   {warehouse.counts()}")
+
+        names = rng.choice(players["Player Name"].to_numpy(dtype=object), lookups)
+        old_time, old = best_of(lambda: [players[players["Player Name"] == n].iloc[0].to_dict()["PTS"] for n in names], repeat)
+        new_time, new = best_of(lambda: [warehouse.player(n, season=2025)["PTS"] for n in names], repeat)
+        report("player by name", old_time, new_time, old == new)
+
+        # Both sides hand back row dicts, which is what the dashboard renders from
+        season_of_game = pd.to_datetime(scores["Date"], format="%B %d, %Y")
+        season_of_game = season_of_game.dt.year + (season_of_game.dt.month >= 8)
+        picks = list(zip(rng.choice(list(scraper.TEAM_ABBRS), lookups), rng.choice(season_of_game.unique(), lookups)))
+        old_time, old = best_of(lambda: [sorted(g["Game ID"] for g in scores[
+            ((scores["Home Team"] == t) | (scores["Away Team"] == t)) & (season_of_game == y)
+        ].to_dict("records")) for t, y in picks], repeat)
+        new_time, new = best_of(lambda: [sorted(g["Game ID"] for g in warehouse.games(team=t, season=int(y))) for t, y in picks],
+                                repeat)
+        report("team season games", old_time, new_time, old == new)
+
+        dates = rng.choice(scores["Date"].unique(), lookups)
+        iso_dates = pd.to_datetime(pd.Series(dates), format="%B %d, %Y").dt.strftime("%Y-%m-%d")
+        old_time, old = best_of(lambda: [sorted(g["Game ID"] for g in scores[scores["Date"] == d].to_dict("records"))
+                                         for d in dates], repeat)
+        new_time, new = best_of(lambda: [sorted(g["Game ID"] for g in warehouse.games(game_date=d)) for d in iso_dates], repeat)
+        report("games of a date", old_time, new_time, old == new)
+
+        def scan_standings(conference):
+            latest = standings[standings["Snapshot"] == standings["Snapshot"].max()]
+            return latest[latest["Conference"] == conference].sort_values("Wins", ascending=False)["Wins"].tolist()
+        conferences = ["Eastern Conference", "Western Conference"] * (lookups // 2)
+        old_time, old = best_of(lambda: [scan_standings(c) for c in conferences], repeat)
+        new_time, new = best_of(lambda: [[row["Wins"] for row in warehouse.standings(c)] for c in conferences], repeat)
+        report("standings", old_time, new_time, old == new)
+        warehouse.close()
+
+
+def bench_incremental(rows, repeat):
+    """Time a full ETL run, a run with no change and a run after one more night, over `rows` stored games."""
+    print(f"----- Incremental ETL ({rows} games of history) -----")
+    history = synthetic_clean_scores(rows, days=max(rows // 8, 1))
+    dates = pd.to_datetime(history["Date"], format="%B %d, %Y")
+    last_night = history[dates == dates.max()]
+    history = history[dates < dates.max()]
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            storage.write("daily_scores", history)
+            for name in ("league_standings", "player_stats"):
+                storage.write(name, pd.DataFrame())
+            full_time, _ = best_of(lambda: etl.run(full=True, load_warehouse=False), 1)
+            noop_time, _ = best_of(lambda: etl.run(load_warehouse=False), repeat)
+            storage.append("daily_scores", last_night)
+            night_time, delta = best_of(lambda: etl.run(load_warehouse=False), 1)
+            stored = storage.read("daily_scores_clean")
+            same = len(delta["daily_scores"]) >= len(last_night) and len(stored) == rows
+            print(f"{'full run':<22} {full_time * 1000:9.2f} ms")
+            print(f"{'no change':<22} {noop_time * 1000:9.2f} ms")
+            print(f"{'one more night':<22} {night_time * 1000:9.2f} ms   "
+                  f"({len(delta['daily_scores'])} rows cleaned, {'ok' if same else 'MISMATCH'})")
+        finally:
+            os.chdir(cwd)
+
+
+def bench_aggregates(rows, repeat):
+    """Time a full refresh of the aggregate tables against the refresh after one more night of games."""
+    print(f"----- Aggregates ({rows} games, best of {repeat}) -----")
+    scores = synthetic_clean_scores(rows, days=max(rows // 8, 1))
+    dates = pd.to_datetime(scores["Date"], format="%B %d, %Y")
+    players = storage.conform("player_stats_clean",
+                              etl.clean_player_stats_frame(scraper.select_player_stats(synthetic_per_game_table(500))))
+    standings = synthetic_standings(1).drop(columns="Snapshot")
+    with tempfile.TemporaryDirectory() as tmp:
+        warehouse = Warehouse(os.path.join(tmp, "warehouse.sqlite"))
+        warehouse.load_games(scores)
+        warehouse.load_player_stats(players)
+        warehouse.load_standings(standings)
+        full_time, _ = best_of(lambda: etl.materialize(warehouse), 1)
+        last_night = {"daily_scores": scores[dates == dates.max()]}
+        night_time, _ = best_of(lambda: etl.materialize(warehouse, last_night), repeat)
+        print(f"{'full refresh':<22} {full_time * 1000:9.2f} ms")
+        print(f"{'one more night':<22} {night_time * 1000:9.2f} ms   ({len(last_night['daily_scores'])} games)")
+        warehouse.close()
+
+
+def bench_memory(rows, repeat):
+    """Bytes per row of the clean scores with the schema dtypes and the compact ones."""
+    print(f"----- Memory ({rows} games, best of {repeat}) -----")
+    scores = synthetic_clean_scores(rows, days=max(rows // 8, 1))
+    # Box score counts are whole numbers, only the rates are fractions
+    counts = [c for c in storage.SCORES_TOTALS if not c.endswith("%")]
+    scores[counts] = scores[counts].round()
+    elapsed, compact = best_of(lambda: storage.optimize_dtypes(scores), repeat)
+    storage.memory_report({"schema dtypes": scores, "compact dtypes": compact}, title="Clean Scores")
+    same = np.allclose(compact[storage.SCORES_TOTALS].astype("float64"), scores[storage.SCORES_TOTALS], rtol=1e-6)
+    print(f"{'optimize_dtypes':<22} {elapsed * 1000:9.2f} ms   "
+          f"x{storage.memory_usage(scores) / storage.memory_usage(compact):5.1f} smaller   "
+          f"{'values kept' if same else 'MISMATCH'}")
+
+
+def bench_metrics(calls=200_000):
+    """Cost per call of a span when metrics are off (the default) and on."""
+    print(f"----- Metrics overhead ({calls} spans) -----")
+
+    def spans():
+        for _ in range(calls):
+            with metrics.span("bench", function="noop"):
+                pass
+
+    def plain():
+        for _ in range(calls):
+            pass
+
+    was_enabled = metrics.enabled()
+    baseline, _ = best_of(plain, 3)
+    metrics.disable()
+    off, _ = best_of(spans, 3)
+    metrics.enable()
+    on, _ = best_of(spans, 3)
+    if not was_enabled:
+        metrics.disable()
+    metrics.reset()
+    for name, elapsed in (("span, metrics off", off), ("span, metrics on", on)):
+        print(f"{name:<22} {(elapsed - baseline) / calls * 1e9:9.0f} ns per span")
+
+
+def bench_player_search(players=5000, repeat=3):
+    """Player dropdown search: the index against folding and scanning every name per query."""
+    print(f"----- Player search ({players} players) -----")
+    pairs = [f"{first} {last}" for last in synthetic.LAST_NAMES for first in synthetic.FIRST_NAMES]
+    names = [pairs[i % len(pairs)] + (f" {i // len(pairs)}" if i >= len(pairs) else "") for i in range(players)]
+    queries = ["jok", "Dončić", "DONCIC", "JokiÄ", "gian", "jokci", "ant edw", "xyz"]
+
+    def scan(query):
+        folded = player_search.fold(query)
+        return [name for name in names if folded in player_search.fold(name)][:player_search.DEFAULT_LIMIT]
+
+    build, index = best_of(lambda: player_search.PlayerIndex({"Player Name": name} for name in names), repeat)
+    scanned, _ = best_of(lambda: [scan(q) for q in queries], repeat)
+    searched, _ = best_of(lambda: [index.search(q) for q in queries], repeat)
+    print(f"index build {build * 1000:9.1f} ms")
+    print(f"scan        {scanned / len(queries) * 1000:9.3f} ms per query")
+    print(f"index       {searched / len(queries) * 1000:9.3f} ms per query ({scanned / searched:.0f}x)")
+
+
+def bench_replay(workers, latency=0.05, errors=0.0):
+    """Scrape a night of 15 synthetic games replayed offline with `latency` seconds per response
+    (and a share of injected 503s), for each worker count."""
+    print(f"----- Replayed scrape (15 games, {latency * 1000:.0f} ms per response, {errors:.0%} errors) -----")
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        synthetic.write_site(synthetic.generate(15, games_per_night=15), os.path.join(tmp, "site"))
+        archive = transport.Archive(os.path.join(tmp, "archive.sqlite"))
+        archive.import_site(os.path.join(tmp, "site"), scraper.BASE_URL)
+        archive.close()
+        os.chdir(tmp)
+        try:
+            for n in workers:
+                replay = transport.ReplayTransport(transport.Archive("archive.sqlite"), latency, errors)
+                fetcher = Fetcher(max_workers=n, requests_per_second=0, backoff=0.01, transport=replay)
+                with contextlib.redirect_stdout(StringIO()):
+                    elapsed, raw = best_of(lambda: scraper.scrape(fetcher, scraper.BASE_URL, persist=False), 1)
+                fetcher.close()
+                print(f"{n:>2} workers {elapsed:9.2f}s   {len(raw['daily_scores'])} games, "
+                      f"{sum(replay.served.values())} requests, {replay.injected} injected errors")
+        finally:
+            os.chdir(cwd)
+
+
+def bench_parallel_etl(rows, workers):
+    """Time a full ETL run over `rows` stored games (monthly partitions) for each worker count."""
+    print(f"----- Parallel ETL ({rows} games of history, {os.cpu_count()} cores) -----")
+    history = synthetic_clean_scores(rows, days=max(rows // 8, 1))
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            storage.write("daily_scores", history)
+            for name in ("league_standings", "player_stats"):
+                storage.write(name, pd.DataFrame())
+            base = None
+            for count in workers:
+                elapsed, _ = best_of(lambda: etl.run(full=True, load_warehouse=False, workers=count), 1)
+                base = base or elapsed
+                print(f"{f'{count} workers':<22} {elapsed * 1000:9.2f} ms   x{base / elapsed:5.1f}")
+        finally:
+            os.chdir(cwd)
+
+
+# ----------------- End-to-End Pipeline -----------------
+def measure(func, trace_memory=True):
+    """Wall time of a call and, from a second call, its peak traced memory (tracing slows the call down).
+
+    The stage's own output is silenced. Returns (seconds, peak bytes or None, result).
+    """
+    with contextlib.redirect_stdout(StringIO()):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        peak = None
+        if trace_memory:
+            tracemalloc.start()
+            func()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def dashboard_calls(players, n_players=20):
+    """Every dashboard callback, as (name, call) pairs: both standings graphs, a few players and every game card."""
+    import dashboard  # builds the app on the warehouse of the current directory
+    calls = [("update_standings_graph", lambda c=c: dashboard.update_standings_graph(c))
+             for c in ("Eastern Conference", "Western Conference")]
+    calls += [("show_player_stats", lambda p=p: dashboard.show_player_stats(1, p)) for p in players[:n_players]]
+    calls += [("show_game_stats", lambda g=game["Game ID"]: dashboard.game_stats_section(g))
+              for game in dashboard.store.current.games]
+    return calls
+
+
+def compare_baseline(results, baseline, tolerance, games):
+    """Throughput and peak memory of every stage against the baseline; returns the regressed stages.
+
+    Memory grows with the data, so it is only compared with a baseline of as many games.
+    """
+    print(f"\n{'stage':<20} {'seconds':>9} {'throughput':>22} {'peak MB':>9}   vs baseline")
+    regressions = []
+    for stage, result in results.items():
+        peak = f"{result['peak_mb']:9.1f}" if result["peak_mb"] is not None else f"{'-':>9}"
+        line = f"{stage:<20} {result['seconds']:9.3f} {result['per_second']:>12,.0f} {result['unit'] + '/s':<9} {peak}"
+        base = baseline.get("stages", {}).get(stage)
+        if base is None:
+            print(line + "   (no baseline)")
+            continue
+        speed = result["per_second"] / base["per_second"] if base["per_second"] else float("inf")
+        status = "ok"
+        if speed < 1 / tolerance:
+            status = "SLOWER"
+        if (baseline.get("games") == games and result["peak_mb"] and base.get("peak_mb")
+                and result["peak_mb"] > base["peak_mb"] * tolerance):
+            status = "MORE MEMORY" if status == "ok" else status + ", MORE MEMORY"
+        if status != "ok":
+            regressions.append(stage)
+        print(line + f"   x{speed:5.2f} throughput  {status}")
+    return regressions
+
+
+def bench_pipeline(games, baseline_path=BASELINE_PATH, save_baseline=False, trace_memory=True,
+                   tolerance=1.25, pages=200):
+    """Time every stage of the pipeline on a synthetic league of `games` games: page parsing,
+    storing the raw data, ETL cleaning, warehouse loading, aggregates and dashboard callbacks.
+
+    Throughput and peak memory are compared with the baseline file (a stage regresses when it
+    is `tolerance` times slower or bigger); `save_baseline` replaces it. Returns the regressed stages.
+    """
+    print(f"----- Pipeline ({games} games) -----")
+    results = {}
+
+    def record(stage, func, items, unit):
+        seconds, peak, result = measure(func, trace_memory)
+        count = items(result) if callable(items) else items
+        results[stage] = {"seconds": seconds, "items": count, "unit": unit,
+                          "per_second": count / seconds if seconds else 0.0,
+                          "peak_mb": peak / 1e6 if peak is not None else None}
+        return result
+
+    frames = record("generate", lambda: synthetic.generate(games), games, "games")
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            written = synthetic.write_site(frames, "site", pages)
+            boxscores = [read_fixture(p) for p in sorted(glob.glob(os.path.join("site", "boxscores", "*0???.html")))]
+            abbrs = [re.findall(r'id="box-([A-Z]{3})-game-basic"', html)[:2] for html in boxscores]
+            standings_html = read_fixture(glob.glob(os.path.join("site", "leagues", "*_standings.html"))[0])
+            per_game_html = read_fixture(glob.glob(os.path.join("site", "leagues", "*_per_game.html"))[0])
+
+            def parse():
+                lines = [scraper.parse_boxscore(h, *a) for h, a in zip(boxscores, abbrs)]
+                scraper.parse_league_standings(standings_html)
+                scraper.select_player_stats(scraper.parse_player_stats(per_game_html))
+                return lines
+            record("parse", parse, written + 2, "pages")
+
+            raw_rows = sum(len(df) for df in frames.values())
+            record("store raw", lambda: [storage.write(name, df) for name, df in frames.items()], raw_rows, "rows")
+            record("etl clean", lambda: etl.run(full=True, load_warehouse=False),
+                   lambda clean: sum(len(df) for df in clean.values()), "rows")
+            warehouse = Warehouse()
+            clean_rows = sum(len(storage.read(f"{name}_clean")) for name in etl.DATASETS)
+            record("warehouse load", warehouse.load_store, clean_rows, "rows")
+            record("aggregates", lambda: etl.materialize(warehouse), games, "games")
+            warehouse.close()
+
+            calls = dashboard_calls(frames["player_stats"]["Player"].tolist())
+            import dashboard
+            # Rendered from scratch: the figure cache is emptied first
+            record("dashboard callbacks", lambda: (dashboard.figure_cache.clear(), [call() for _, call in calls]),
+                   len(calls), "calls")
+            print(f"\n{'callback':<26} {'cold p50':>9} {'cold p99':>9} {'warm p50':>9} {'warm p99':>9}"
+                  "   (ms, with the JSON encoding of the response)")
+            for name in dict(calls):
+                group = [lambda call=call: to_json_plotly(call()) for n, call in calls if n == name]
+                dashboard.figure_cache.clear()
+                cold = [measure(call, trace_memory=False)[0] for call in group]
+                # Repeated load: the same players and games asked for again
+                warm = [measure(call, trace_memory=False)[0] for _ in range(10) for call in group]
+                print(f"{name:<26} " + " ".join(f"{np.percentile(latencies, q) * 1000:9.2f}"
+                                                 for latencies in (cold, warm) for q in (50, 99)))
+            print(f"figure cache: {dashboard.figure_cache.stats()}")
+        finally:
+            os.chdir(cwd)
+
+    baseline = {}
+    if os.path.exists(baseline_path):
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        if baseline.get("games") != games:
+            print(f"Note: the baseline was measured on {baseline.get('games')} games, peak memory is not compared")
+    regressions = compare_baseline(results, baseline, tolerance, games)
+    if save_baseline:
+        with open(baseline_path, "w") as f:
+            json.dump({"games": games, "stages": results}, f, indent=1)
+        print(f"Baseline saved to {baseline_path}")
+    elif regressions:
+        print(f"Regressions against {baseline_path}: {', '.join(regressions)}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks for the NBA pipeline.")
+    parser.add_argument("suite", nargs="?", choices=["micro", "pipeline"], default="micro",
+                        help="micro: old vs new implementations, pipeline: every stage end to end on synthetic data")
+    parser.add_argument("--fixtures", default="fixtures",
+                        help="Directory of saved pages (site layout, e.g. written by synthetic.py --site)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--rows", type=int, default=100_000, help="Rows for the frame benchmarks")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count()],
+                        help="Worker counts of the parallel ETL benchmark")
+    parser.add_argument("--games", type=int, default=20_000, help="Games of the synthetic league (pipeline)")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline results file (pipeline)")
+    parser.add_argument("--save-baseline", action="store_true", help="Save the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=1.25,
+                        help="Slowdown or memory growth factor counted as a regression")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the peak memory measurements (faster)")
+    args = parser.parse_args(argv)
+
+    if args.suite == "pipeline":
+        regressions = bench_pipeline(args.games, args.baseline, args.save_baseline, not args.no_memory,
+                                     args.tolerance)
+        return 1 if regressions and not args.save_baseline else 0
+
+    bench_parse(args.fixtures, args.repeat)
+    bench_player_columns(args.rows, args.repeat)
+    bench_storage(args.rows, args.repeat)
+    bench_warehouse(args.rows, args.repeat)
+    bench_incremental(args.rows, args.repeat)
+    bench_aggregates(args.rows, args.repeat)
+    bench_memory(args.rows, args.repeat)
+    bench_metrics()
+    bench_player_search()
+    bench_replay(sorted(set(args.workers)))
+    bench_replay(sorted(set(args.workers)), errors=0.3)
+    bench_parallel_etl(args.rows, sorted(set(args.workers)))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,43 @@
-import pandas as pd
-from dash import Dash, dcc, html, Input, Output, State
-import plotly.graph_objects as go
+import math
+import os
 
-# Load cleaned data
-daily_scores = pd.read_csv("daily_scores_clean.csv")
-league_standings = pd.read_csv("league_standings_clean.csv")
-player_stats = pd.read_csv("player_stats_clean.csv")
+from dash import Dash, dcc, html, Input, Output, State, ALL, MATCH, ClientsideFunction, ctx, no_update
+from dash.exceptions import PreventUpdate
+import plotly.graph_objects as go
 
-# Find the best players for each stat
-best_players = {
-    stat: player_stats.loc[player_stats[stat].idxmax(), ['Player Name', stat]]
-    for stat in ["PTS", "TRB", "AST", "STL", "BLK", "TOV", "PF", "FG", "FT", "3P"]
-}
+import etl
+import metrics
+from datastore import CONFERENCES, STANDINGS_COLUMNS, DataStore
+from figure_cache import FigureCache
+from warehouse import Warehouse, DEFAULT_WAREHOUSE_PATH
+
+# Columns the dashboard renders
+PLAYER_STATS = ["PTS", "TRB", "AST", "STL", "BLK", "TOV", "PF", "FG", "FT", "3P"]
+# How often the game cards check for live score changes (see live.py)
+LIVE_REFRESH_MS = 15_000
+# Game cards per page of the grid: a whole night (at most 15 games) fits on one page
+GAME_CARDS_PER_PAGE = 15
+# Players offered by the search dropdown at a time, best ranked first
+PLAYER_OPTIONS_LIMIT = 20
+# The standings graph is drawn in the browser (assets/standings.js) from the standings sent
+# with the page; NBA_STANDINGS=server draws it on the server at every conference change
+CLIENTSIDE_STANDINGS = os.environ.get("NBA_STANDINGS", "clientside") != "server"
+# The warehouse to serve; main.py --no-persist points it to one loaded with that run's data
+WAREHOUSE_PATH = os.environ.get("NBA_WAREHOUSE", DEFAULT_WAREHOUSE_PATH)
+
+# Data is looked up in the indexed warehouse and aggregate tables the ETL maintains;
+# filled from the clean store on first use
+warehouse = Warehouse(WAREHOUSE_PATH)
+if warehouse.is_empty():
+    warehouse.load_store()
+    etl.materialize(warehouse)
+
+# The latest night's games, the player search index and the best player of each stat, as a snapshot
+# reloaded in the background when the warehouse changes (see datastore.py)
+store = DataStore(PLAYER_STATS, WAREHOUSE_PATH)
+
+# Rendered player and game stats, reused until the data version changes (see figure_cache.py)
+figure_cache = FigureCache()
 
 # Map full stat names for display
 stat_full_names = {
@@ -31,96 +57,123 @@ stat_full_names = {
 app = Dash(__name__)
 app.title = "NBA Dashboard"
 
-# Define app layout
-app.layout = html.Div([
-
-    # Sidebar
-    html.Div([
-        # Sidebar Header
-        html.H2("Player Search", style={"marginBottom": "20px", "color": "#ffffff"}),
-
-        # Search bar
-        dcc.Dropdown(
-            id="player-search",
-            options=[{"label": player, "value": player} for player in player_stats['Player Name']],
-            placeholder="Search for a player",
-            style={
-                "width": "100%", "padding": "10px", "fontSize": "18px",
-                "color": "#333333", "cursor": "pointer"
-            }
-        ),
-
-        # Button to show player stats
-        html.Button("Show Player Stats", id="show-stats-btn", n_clicks=0, style={
-            "marginTop": "20px", "padding": "10px", "fontSize": "16px", "width": "100%",
-            "backgroundColor": "#C9082A", "color": "#ffffff", "border": "none",
-            "borderRadius": "5px", "cursor": "pointer", "transition": "0.3s"
-        }),
-
+def game_card(row):
+    """Card of one game. Its components are identified by the game id, for the pattern-matching callbacks."""
+    return html.Div([
+        html.H4(f"{row['Away Team']} VS {row['Home Team']}",
+                style={"textAlign": "center", "marginBottom": "10px", "color": "#333"}),
+        html.H4(f"{row['Away Score']} - {row['Home Score']}", id={"type": "game-score", "game": row["Game ID"]},
+                style={"textAlign": "center", "marginBottom": "10px", "color": "#333"}),
+        html.Button("Show Game Stats", id={"type": "game-stats-btn", "game": row["Game ID"]}, n_clicks=0, style={
+            "backgroundColor": "#1F77B4", "color": "#ffffff", "padding": "10px",
+            "border": "none", "borderRadius": "5px", "cursor": "pointer", "width": "100%",
+            "transition": "0.3s"
+        })
     ], style={
-        "padding": "20px", "backgroundColor": "#17408B", "width": "250px", "height": "100vh",
-        "position": "fixed", "boxShadow": "2px 0 5px rgba(0, 0, 0, 0.2)"
-    }),
-
-    # Top-right NBA Logo
-    html.Div([
-        html.Img(
-            src="/assets/nba-logo.ico",  # Ensure the logo is in the 'assets' folder
-            style={
-                "width": "100px", "position": "absolute", "top": "30px", "right": "20px"
-            }
-        )
-    ]),
+        "boxShadow": "0 4px 8px rgba(0, 0, 0, 0.2)", "borderRadius": "10px",
+        "padding": "15px", "margin": "10px", "backgroundColor": "#ffffff",
+        "textAlign": "center", "width": "300px"
+    })
 
-    # Main Content
-    html.Div([
-        html.H1("NBA Dashboard", style={
-            "textAlign": "center", "marginBottom": "20px", "color": "#1F77B4",
-            "fontSize": "2.5rem", "fontWeight": "bold"
-        }),
+def page_label(page, total):
+    pages = max(math.ceil(total / GAME_CARDS_PER_PAGE), 1)
+    return f"Page {page + 1} of {pages} ({total} games)"
 
-        # Section: Last night's games
-        html.H2("Latest NBA Games", style={"textAlign": "center", "marginBottom": "20px"}),
+# Define app layout: built for every page load from the current snapshot
+def player_options(players, player_ids):
+    """Dropdown options of some players of a PlayerIndex: their name shown, their id as the value."""
+    return [{"label": players.label(player_id), "value": player_id} for player_id in player_ids]
+
+def standings_data(snapshot):
+    return {"version": snapshot.version, "conferences": snapshot.standings}
+
+def serve_layout():
+    snapshot = store.current
+    return html.Div([
+
+        # Sidebar
         html.Div([
-            html.Div([
-                html.H4(f"{row['Away Team']} VS {row['Home Team']}",
-                        style={"textAlign": "center", "marginBottom": "10px", "color": "#333"}),
-                html.H4(f"{row['Away Score']} - {row['Home Score']}",
-                        style={"textAlign": "center", "marginBottom": "10px", "color": "#333"}),
-                html.Button("Show Game Stats", id=f"game-stats-btn-{index}", n_clicks=0, style={
-                    "backgroundColor": "#1F77B4", "color": "#ffffff", "padding": "10px",
-                    "border": "none", "borderRadius": "5px", "cursor": "pointer", "width": "100%",
-                    "transition": "0.3s"
-                })
-            ], style={
-                "boxShadow": "0 4px 8px rgba(0, 0, 0, 0.2)", "borderRadius": "10px",
-                "padding": "15px", "margin": "10px", "backgroundColor": "#ffffff",
-                "textAlign": "center", "width": "300px"
-            })
-            for index, row in daily_scores.iterrows()
-        ], style={"display": "flex", "flexWrap": "wrap", "justifyContent": "space-around"}),
-
-        # Section: League Standings
-        html.H2("League Standings", style={"textAlign": "center", "marginTop": "30px", "marginBottom": "20px"}),
-        dcc.Dropdown(
-            id="conference-dropdown",
-            options=[
-                {"label": "Eastern Conference", "value": "Eastern Conference"},
-                {"label": "Western Conference", "value": "Western Conference"},
-            ],
-            value="Eastern Conference",
-            style={"width": "50%", "margin": "0 auto", "fontSize": "18px"}
-        ),
-        dcc.Graph(id="standings-graph", style={"marginTop": "40px"}),
+            # Sidebar Header
+            html.H2("Player Search", style={"marginBottom": "20px", "color": "#ffffff"}),
+
+            # Search bar
+            dcc.Dropdown(
+                id="player-search",
+                options=player_options(snapshot.players, snapshot.players.top(PLAYER_OPTIONS_LIMIT)),
+                placeholder="Search for a player",
+                style={
+                    "width": "100%", "padding": "10px", "fontSize": "18px",
+                    "color": "#333333", "cursor": "pointer"
+                }
+            ),
+
+            # Button to show player stats
+            html.Button("Show Player Stats", id="show-stats-btn", n_clicks=0, style={
+                "marginTop": "20px", "padding": "10px", "fontSize": "16px", "width": "100%",
+                "backgroundColor": "#C9082A", "color": "#ffffff", "border": "none",
+                "borderRadius": "5px", "cursor": "pointer", "transition": "0.3s"
+            }),
 
-        # Player Stats Dashboards Section
-        html.Div(id="player-stats-section", style={"marginTop": "50px", "padding": "20px"}),
+        ], style={
+            "padding": "20px", "backgroundColor": "#17408B", "width": "250px", "height": "100vh",
+            "position": "fixed", "boxShadow": "2px 0 5px rgba(0, 0, 0, 0.2)"
+        }),
 
-        # Game Stats Section (Will be populated dynamically)
-        html.Div(id="game-stats-section", style={"marginTop": "50px", "padding": "20px"})
+        # Top-right NBA Logo
+        html.Div([
+            html.Img(
+                src="/assets/nba-logo.ico",  # Ensure the logo is in the 'assets' folder
+                style={
+                    "width": "100px", "position": "absolute", "top": "30px", "right": "20px"
+                }
+            )
+        ]),
+
+        # Main Content
+        html.Div([
+            html.H1("NBA Dashboard", style={
+                "textAlign": "center", "marginBottom": "20px", "color": "#1F77B4",
+                "fontSize": "2.5rem", "fontWeight": "bold"
+            }),
+
+            # Section: Last night's games (any night, or every game when the date is cleared),
+            # a page of cards at a time
+            html.H2("Latest NBA Games", style={"textAlign": "center", "marginBottom": "20px"}),
+            html.Div([
+                dcc.DatePickerSingle(id="games-date", date=snapshot.latest_date, display_format="MMMM D, YYYY",
+                                     clearable=True, placeholder="All games"),
+                html.Button("Previous", id="games-prev", n_clicks=0, style={"marginLeft": "20px"}),
+                html.Span(page_label(0, len(snapshot.games)), id="games-page-label", style={"margin": "0 10px"}),
+                html.Button("Next", id="games-next", n_clicks=0),
+            ], style={"textAlign": "center"}),
+            dcc.Store(id="games-page", data=0),
+            html.Div([game_card(row) for row in snapshot.games[:GAME_CARDS_PER_PAGE]], id="game-cards",
+                     style={"display": "flex", "flexWrap": "wrap", "justifyContent": "space-around"}),
+            dcc.Interval(id="live-interval", interval=LIVE_REFRESH_MS),
+            dcc.Store(id="live-version", data=snapshot.live_version),
+
+            # Section: League Standings
+            html.H2("League Standings", style={"textAlign": "center", "marginTop": "30px", "marginBottom": "20px"}),
+            dcc.Dropdown(
+                id="conference-dropdown",
+                options=[{"label": conference, "value": conference} for conference in CONFERENCES],
+                value=CONFERENCES[0],
+                style={"width": "50%", "margin": "0 auto", "fontSize": "18px"}
+            ),
+            dcc.Graph(id="standings-graph", style={"marginTop": "40px"}),
+            dcc.Store(id="standings-data", data=standings_data(snapshot) if CLIENTSIDE_STANDINGS else None),
+            dcc.Store(id="standings-version", data=snapshot.version),
+
+            # Player Stats Dashboards Section
+            html.Div(id="player-stats-section", style={"marginTop": "50px", "padding": "20px"}),
+
+            # Game Stats Section (Will be populated dynamically)
+            html.Div(id="game-stats-section", style={"marginTop": "50px", "padding": "20px"})
+
+        ], style={"marginLeft": "270px", "padding": "20px"})
+    ])
 
-    ], style={"marginLeft": "270px", "padding": "20px"})
-])
+app.layout = serve_layout
 
 # Custom hover styling
 app.index_string = """
@@ -145,22 +198,51 @@ app.index_string = """
 </body>
 </html>
 """
-# Callback to show game stats on button click
+# Callback to show a page of game cards, for a date or for every game (newest first)
+@app.callback(
+    Output("game-cards", "children"),
+    Output("games-page", "data"),
+    Output("games-page-label", "children"),
+    Input("games-date", "date"),
+    Input("games-prev", "n_clicks"),
+    Input("games-next", "n_clicks"),
+    State("games-page", "data"),
+    prevent_initial_call=True
+)
+@metrics.timed("callback", callback="show_game_cards")
+def show_game_cards(game_date, prev_clicks, next_clicks, page):
+    step = {"games-prev": -1, "games-next": 1}.get(ctx.triggered_id, 0)
+    page = 0 if ctx.triggered_id == "games-date" else max((page or 0) + step, 0)
+    total = warehouse.game_count(game_date)
+    page = min(page, max(math.ceil(total / GAME_CARDS_PER_PAGE), 1) - 1)
+    games = warehouse.games(game_date=game_date, limit=GAME_CARDS_PER_PAGE, offset=page * GAME_CARDS_PER_PAGE,
+                            newest_first=game_date is None)
+    return [game_card(row) for row in games], page, page_label(page, total)
+
+# Callback to show game stats on button click: one pattern for every card, whatever the page
 @app.callback(
     Output("game-stats-section", "children"),
-    [Input(f"game-stats-btn-{i}", "n_clicks") for i in range(len(daily_scores))],
+    Input({"type": "game-stats-btn", "game": ALL}, "n_clicks"),
     prevent_initial_call=True
 )
-def show_game_stats(*args):
-    # Get the index of the button that was clicked
-    clicked_index = next((i for i, n_clicks in enumerate(args) if n_clicks > 0), None)
-
-    if clicked_index is None:
-        return html.Div([])  # Return empty div if no button is clicked
-
-    # Extract the clicked game data
-    game_data = daily_scores.iloc[clicked_index]
-
+@metrics.timed("callback", callback="show_game_stats")
+def show_game_stats(clicks):
+    # The clicked card's id holds its game; a new page of cards (no click yet) shows nothing
+    if not ctx.triggered_id or not ctx.triggered[0]["value"]:
+        raise PreventUpdate
+    return game_stats_section(ctx.triggered_id["game"])
+
+def game_stats_section(game_id):
+    """Game stats of a game id, from the figure cache."""
+    def build():
+        game_data = warehouse.game(game_id)
+        if game_data is None:
+            return html.Div("This game is no longer stored.", style={"fontSize": "18px", "color": "red"})
+        return game_stats(game_data)
+    return figure_cache.get("show_game_stats", game_id, store.current.version, build)
+
+def game_stats(game_data):
+    """Comparison charts of a game: points, key stats and both teams' shooting."""
     # Comparison Bar Chart: Points
     points_comparison_chart = dcc.Graph(
         figure=go.Figure(
@@ -298,23 +380,46 @@ def show_game_stats(*args):
     ])
 
 
-# Callback to update league standings
+# Callback to refresh the scores of the games in progress on the cards shown: only the scores
+# that changed since the page's live version are sent
 @app.callback(
-    Output("standings-graph", "figure"),
-    Input("conference-dropdown", "value")
+    Output({"type": "game-score", "game": ALL}, "children"),
+    Output("live-version", "data"),
+    Input("live-interval", "n_intervals"),
+    State("live-version", "data"),
+    State({"type": "game-score", "game": ALL}, "id"),
+    prevent_initial_call=True
 )
+@metrics.timed("callback", callback="refresh_live_scores")
+def refresh_live_scores(n_intervals, version, score_ids):
+    changes = warehouse.live_scores(since=version or 0)
+    if not changes:
+        raise PreventUpdate
+
+    changed = {change["Game ID"]: f"{change['Away Score']} - {change['Home Score']}" for change in changes}
+    return [changed.get(score_id["game"], no_update) for score_id in score_ids], changes[-1]["version"]
+
+def win_pct_text(win_pct):
+    """Win% with 3 decimals; "-" when missing (standings aggregated before a team's first game)."""
+    return "-" if win_pct is None or math.isnan(win_pct) else f"{win_pct:.3f}"
+
+# League standings graph, drawn on the server (the fallback of the clientside rendering)
+@metrics.timed("callback", callback="update_standings_graph")
 def update_standings_graph(conference):
-    filtered_df = league_standings[league_standings["Conference"] == conference]
-    filtered_df = filtered_df.sort_values(by='Wins', ascending=False)
+    standings = store.current.standings.get(conference, {column: [] for column in STANDINGS_COLUMNS})
 
     # Alternate colors between blue and orange
-    colors = ['#1F77B4' if i % 2 == 0 else '#FF7F0E' for i in range(len(filtered_df))]
-    
+    colors = ['#1F77B4' if i % 2 == 0 else '#FF7F0E' for i in range(len(standings["Team"]))]
+    hovertext = [f"{wins}-{losses}, {win_pct_text(win_pct)}, GB {gb:g}"
+                 for wins, losses, win_pct, gb in zip(standings["Wins"], standings["Losses"], standings["Win%"],
+                                                      standings["GB"])]
+
     fig = go.Figure(
         data=[
             go.Bar(
-                x=filtered_df['Team'],
-                y=filtered_df['Wins'],
+                x=standings["Team"],
+                y=standings["Wins"],
+                hovertext=hovertext,
                 marker=dict(color=colors)
             )
         ],
@@ -327,17 +432,74 @@ def update_standings_graph(conference):
     )
     return fig
 
+if CLIENTSIDE_STANDINGS:
+    # Conference switches are drawn in the browser, without a request
+    app.clientside_callback(
+        ClientsideFunction(namespace="standings", function_name="render"),
+        Output("standings-graph", "figure"),
+        Input("conference-dropdown", "value"),
+        Input("standings-data", "data")
+    )
+
+    # A page left open gets the standings again once per data version (the check sends no data)
+    @app.callback(
+        Output("standings-data", "data"),
+        Output("standings-version", "data"),
+        Input("live-interval", "n_intervals"),
+        State("standings-version", "data"),
+        prevent_initial_call=True
+    )
+    def refresh_standings(n_intervals, version):
+        snapshot = store.current
+        if snapshot.version == version:
+            raise PreventUpdate
+        return standings_data(snapshot), snapshot.version
+else:
+    app.callback(
+        Output("standings-graph", "figure"),
+        Input("conference-dropdown", "value")
+    )(update_standings_graph)
+
+# Callback to fill the player dropdown with the players matching the typed text: the
+# browser never holds the whole player list
+@app.callback(
+    Output("player-search", "options"),
+    Input("player-search", "search_value"),
+    State("player-search", "value")
+)
+@metrics.timed("callback", callback="search_players")
+def search_players(search_value, selected_player):
+    if not search_value:
+        raise PreventUpdate
+    players = store.current.players
+    player_ids = players.search(search_value, PLAYER_OPTIONS_LIMIT)
+    # The selected player stays an option, or the dropdown would clear it
+    if selected_player and selected_player not in player_ids:
+        player_ids.append(selected_player)
+    return player_options(players, player_ids)
+
 # Callback to show player stats with gauge chart and pie chart
 @app.callback(
     Output("player-stats-section", "children"),
     Input("show-stats-btn", "n_clicks"),
     State("player-search", "value")
 )
+@metrics.timed("callback", callback="show_player_stats")
 def show_player_stats(n_clicks, selected_player):
     if not selected_player:
         return html.Div("Please select a player first.", style={"fontSize": "18px", "color": "red"})
 
-    player_data = player_stats[player_stats["Player Name"] == selected_player].iloc[0]
+    snapshot = store.current
+    player_data = snapshot.players.get(selected_player)
+    if player_data is None:
+        return html.Div(f"No stats for {snapshot.players.label(selected_player)} this season.",
+                        style={"fontSize": "18px", "color": "red"})
+    return figure_cache.get("show_player_stats", selected_player, snapshot.version,
+                            lambda: player_stats(player_data, snapshot.best_players))
+
+def player_stats(player_data, best_players):
+    """Gauge and pie chart of each stat of a player, against the best player of the stat."""
+    selected_player = player_data["Player Name"]
     charts = []
 
     for stat, full_name in stat_full_names.items():
@@ -369,17 +531,32 @@ def show_player_stats(n_clicks, selected_player):
         *charts
     ])
 
-# Button callback for each game in the daily_scores data
+# Button callback for each game card
 @app.callback(
-    Output("game-stats-btn-0", "children"),
-    Input("game-stats-btn-0", "n_clicks"),
-    [State("game-stats-btn-0", "id")]
+    Output({"type": "game-stats-btn", "game": MATCH}, "children"),
+    Input({"type": "game-stats-btn", "game": MATCH}, "n_clicks"),
+    prevent_initial_call=True
 )
-def update_game_button_text(n_clicks, btn_id):
+def update_game_button_text(n_clicks):
     if n_clicks > 0:
         return "Stats Loaded"
     return "Show Game Stats"
 
+# Prometheus scrape endpoint next to the app (empty until metrics are enabled)
+@app.server.route("/metrics")
+def metrics_endpoint():
+    return metrics.prometheus(), 200, {"Content-Type": "text/plain; version=0.0.4"}
+
+# Hit rate of the figure cache
+@app.server.route("/figure-cache")
+def figure_cache_stats():
+    return figure_cache.stats()
+
+def serve(debug=False):
+    """Start the Dash server (the reloader is only used in debug mode)."""
+    store.start()
+    app.run(debug=debug)
+
 # Run the app
 if __name__ == "__main__":
-    app.run_server(debug=True)
+    serve(debug=True)
@@ -0,0 +1,113 @@
+import threading
+import time
+import traceback
+
+from player_search import PlayerIndex
+from warehouse import Warehouse, DEFAULT_WAREHOUSE_PATH
+
+RELOAD_INTERVAL = 5
+CONFERENCES = ["Eastern Conference", "Western Conference"]
+STANDINGS_COLUMNS = ["Team", "Wins", "Losses", "Win%", "GB"]
+
+
+# ----------------- Snapshot -----------------
+class Snapshot:
+    """What the dashboard layout is built from, as of one warehouse state.
+
+    Never modified once built: a reload builds a new snapshot, so a request holding this
+    one sees consistent data until it is done.
+    """
+
+    def __init__(self, version, latest_date, games, players, best_players, standings, live_version):
+        self.version = version
+        self.loaded_at = time.time()
+        # The latest night (YYYY-MM-DD) and its games, in card order
+        self.latest_date = latest_date
+        self.games = tuple(games)
+        self.games_by_id = {game["Game ID"]: game for game in self.games}
+        # Search index and records of the season's players (see player_search.py)
+        self.players = players
+        # stat -> best player row
+        self.best_players = best_players
+        # conference -> column -> values of the latest standings, best record first
+        self.standings = standings
+        self.live_version = live_version
+
+
+def load_snapshot(warehouse, version, stats):
+    best_players = {}
+    for stat in stats:
+        leaders = warehouse.leaderboard(stat, n=1)
+        if leaders:
+            best_players[stat] = leaders[0]
+    latest_date = warehouse.latest_date()
+    standings = {}
+    for conference in CONFERENCES:
+        rows = warehouse.conference_standings(conference)
+        standings[conference] = {column: [row[column] for row in rows] for column in STANDINGS_COLUMNS}
+    players = warehouse.player_rows().rename(columns={"player": "Player Name", "player_id": "Player ID",
+                                                      "team": "Team"})
+    return Snapshot(version, latest_date, warehouse.games(game_date=latest_date),
+                    PlayerIndex(players.to_dict("records")), best_players, standings, warehouse.live_version())
+
+
+# ----------------- Data Store -----------------
+class DataStore:
+    """The current Snapshot of the warehouse, reloaded in the background when it changes.
+
+    Readers take `store.current` once per request. A reload builds the new snapshot on the
+    store's own connection (WAL readers never wait on each other), then swaps it in with one
+    assignment: requests in flight keep the snapshot they started with.
+
+    Changes are seen through SQLite's data_version, which moves whenever another connection
+    commits (the ETL, the aggregates refresh, the live poller). A reload waits until the
+    version held still for one interval, so a refresh in progress is taken in once it is done.
+    """
+
+    def __init__(self, stats, path=DEFAULT_WAREHOUSE_PATH, interval=RELOAD_INTERVAL):
+        self.stats = stats
+        self.interval = interval
+        self.warehouse = Warehouse(path)
+        # Read before loading: a commit during the load triggers the next reload
+        self.seen = self.warehouse.data_version()
+        self.pending = False
+        self.current = load_snapshot(self.warehouse, 1, stats)
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def check(self):
+        """Reload if the warehouse changed and then settled; returns True when a new snapshot is in."""
+        seen = self.warehouse.data_version()
+        if seen != self.seen:
+            self.seen = seen
+            self.pending = True
+            return False
+        if not self.pending:
+            return False
+        self.pending = False
+        start = time.perf_counter()
+        snapshot = load_snapshot(self.warehouse, self.current.version + 1, self.stats)
+        self.current = snapshot
+        print(f"Dashboard data version {snapshot.version} loaded in {time.perf_counter() - start:.2f}s "
+              f"({len(snapshot.games)} games on the cards)")
+        return True
+
+    def start(self):
+        """Watch the warehouse from a daemon thread."""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._watch, name="datastore", daemon=True)
+            self.thread.start()
+
+    def _watch(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                self.check()
+            except Exception:
+                # A failed reload keeps serving the current snapshot; the next change retries
+                traceback.print_exc()
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
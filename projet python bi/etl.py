@@ -1,70 +1,498 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 import pandas as pd
 
+import metrics
+import storage
+from storage import TEAM_TOTALS_STATS
+from warehouse import Warehouse, season_of
+
+STATE_PATH = os.path.join(storage.DATA_DIR, "etl_state.json")
+
+# Raw input and clean output file of each dataset
+DATASETS = {
+    "daily_scores": ("daily_scores.csv", "daily_scores_clean.csv"),
+    "league_standings": ("league_standings.csv", "league_standings_clean.csv"),
+    "player_stats": ("player_stats.csv", "player_stats_clean.csv"),
+}
+
+# ----------------- Cleaning Schemas -----------------
+# text: columns whose mis-decoded UTF-8 gets repaired
+# numeric: columns converted to numbers, invalid values becoming NaN
+# required: columns a row must have to be kept (ALL_COLUMNS: every column)
+# game_ids: missing Game IDs are rebuilt from the date and home team (rows scraped before the column existed)
+# rename: column renames applied last
+ALL_COLUMNS = "all"
+CLEANING = {
+    "daily_scores": {
+        "text": ["Away Team", "Home Team"],
+        "game_ids": True,
+        "numeric": ["Away Score", "Home Score"] + storage.SCORES_TOTALS,
+        "required": ALL_COLUMNS,
+        "rename": {},
+    },
+    "league_standings": {
+        "text": ["Team"],
+        "numeric": ["Wins", "Losses"],
+        "required": [],
+        "rename": {},
+    },
+    "player_stats": {
+        "text": ["Player"],
+        "numeric": storage.PLAYER_STATS_NUMERIC,
+        # Every column but the player id, missing from rows scraped before it was kept
+        "required": ["Rk", "Player", "Team"] + storage.PLAYER_STATS_NUMERIC,
+        "rename": {'Tm': 'Team', 'Rk': 'Rank', 'Player': 'Player Name'},
+    },
+}
+
+def repair_mojibake(series):
+    """Undo UTF-8 text that was decoded as Latin-1, e.g. "JokiÄ\x87" -> "Jokić"."""
+    def fix(value):
+        try:
+            return value.encode("latin-1").decode("utf-8")
+        except (UnicodeError, AttributeError):
+            return value
+    # Each distinct name is fixed once, then mapped back onto the column
+    mapping = {value: fix(value) for value in series.dropna().unique()}
+    mapping = {bad: good for bad, good in mapping.items() if bad != good}
+    return series.replace(mapping) if mapping else series
+
+def clean_frame(name, df):
+    """Clean a raw frame of dataset `name` according to its CLEANING schema."""
+    with metrics.span("etl", function="clean_frame", dataset=name) as span:
+        span.rows = len(df)
+        return _clean_frame(CLEANING[name], df)
+
+def _clean_frame(schema, df):
+    df = df.copy()
+
+    for column in schema["text"]:
+        if column in df.columns:
+            df[column] = repair_mojibake(df[column])
+
+    if schema.get("game_ids"):
+        # Team names are repaired first: ids are built from their abbreviations
+        from scraper import legacy_game_ids
+        if "Game ID" not in df.columns:
+            df.insert(0, "Game ID", pd.Series(pd.NA, index=df.index, dtype="string"))
+        missing = df["Game ID"].isna()
+        if missing.any():
+            df.loc[missing, "Game ID"] = legacy_game_ids(df[missing])
+
+    # Convert all numeric columns at once; columns that are already numeric are left alone
+    to_convert = [c for c in schema["numeric"]
+                  if c in df.columns and not pd.api.types.is_numeric_dtype(df[c])]
+    if to_convert:
+        try:
+            # Well-formed numbers parse in one pass; anything else goes column by column
+            df[to_convert] = df[to_convert].astype("float64")
+        except (ValueError, TypeError):
+            df[to_convert] = df[to_convert].apply(pd.to_numeric, errors="coerce")
+
+    # Drop rows with missing or invalid required data (NaN values)
+    required = df.columns if schema["required"] == ALL_COLUMNS else schema["required"]
+    if len(required):
+        df = df.dropna(subset=list(required))
+
+    return df.rename(columns=schema["rename"])
+
 def clean_daily_scores(input_file, output_file):
     """Clean and transform daily scores data."""
-    df = pd.read_csv(input_file)
-    df['Away Score'] = pd.to_numeric(df['Away Score'], errors='coerce')
-    df['Home Score'] = pd.to_numeric(df['Home Score'], errors='coerce')
-    df.dropna(inplace=True)
+    df = clean_daily_scores_frame(pd.read_csv(input_file))
     df.to_csv(output_file, index=False)
     print("Daily scores cleaned and saved.")
 
+def clean_daily_scores_frame(df):
+    """Clean a daily scores frame."""
+    return clean_frame("daily_scores", df)
+
 def clean_league_standings(input_file, output_file):
     """Clean and transform league standings data."""
-    df = pd.read_csv(input_file)
-    df['Wins'] = pd.to_numeric(df['Wins'], errors='coerce')
-    df['Losses'] = pd.to_numeric(df['Losses'], errors='coerce')
+    df = clean_league_standings_frame(pd.read_csv(input_file))
     df.to_csv(output_file, index=False)
     print("League standings cleaned and saved.")
 
+def clean_league_standings_frame(df):
+    """Clean a league standings frame."""
+    return clean_frame("league_standings", df)
+
 def clean_player_stats(input_file, output_file):
     """Clean and transform player stats data."""
-    # Read the input CSV file
-    df = pd.read_csv(input_file)
-    
-    # Convert columns to numeric values (where appropriate), handling errors as NaN
-    df['G'] = pd.to_numeric(df['G'], errors='coerce')
-    df['MP'] = pd.to_numeric(df['MP'], errors='coerce')
-    df['FG'] = pd.to_numeric(df['FG'], errors='coerce')
-    df['FGA'] = pd.to_numeric(df['FGA'], errors='coerce')
-    df['FG%'] = pd.to_numeric(df['FG%'], errors='coerce')
-    df['3P'] = pd.to_numeric(df['3P'], errors='coerce')
-    df['3PA'] = pd.to_numeric(df['3PA'], errors='coerce')
-    df['3P%'] = pd.to_numeric(df['3P%'], errors='coerce')
-    df['2P'] = pd.to_numeric(df['2P'], errors='coerce')
-    df['2PA'] = pd.to_numeric(df['2PA'], errors='coerce')
-    df['2P%'] = pd.to_numeric(df['2P%'], errors='coerce')
-    df['FT'] = pd.to_numeric(df['FT'], errors='coerce')
-    df['FTA'] = pd.to_numeric(df['FTA'], errors='coerce')
-    df['FT%'] = pd.to_numeric(df['FT%'], errors='coerce')
-    df['ORB'] = pd.to_numeric(df['ORB'], errors='coerce')
-    df['DRB'] = pd.to_numeric(df['DRB'], errors='coerce')
-    df['TRB'] = pd.to_numeric(df['TRB'], errors='coerce')
-    df['AST'] = pd.to_numeric(df['AST'], errors='coerce')
-    df['STL'] = pd.to_numeric(df['STL'], errors='coerce')
-    df['BLK'] = pd.to_numeric(df['BLK'], errors='coerce')
-    df['TOV'] = pd.to_numeric(df['TOV'], errors='coerce')
-    df['PF'] = pd.to_numeric(df['PF'], errors='coerce')
-    df['PTS'] = pd.to_numeric(df['PTS'], errors='coerce')
-    
-    # Drop rows with any missing or invalid data (NaN values)
-    df.dropna(inplace=True)
-    
-    # Rename the columns to match the desired naming convention
-    df.rename(columns={
-        'Tm': 'Team',
-        'Rk': 'Rank',
-        'Player': 'Player Name',
-    }, inplace=True)
-    
-    # Save the cleaned dataframe to a new CSV file
+    df = clean_player_stats_frame(pd.read_csv(input_file))
     df.to_csv(output_file, index=False)
     print("Player stats cleaned and saved to", output_file)
 
-def main():
-    clean_daily_scores('daily_scores.csv', 'daily_scores_clean.csv')
-    clean_league_standings('league_standings.csv', 'league_standings_clean.csv')
-    clean_player_stats('player_stats.csv', 'player_stats_clean.csv')
+def clean_player_stats_frame(df):
+    """Clean a player stats frame, e.g. the one returned by scraper.get_player_stats."""
+    return clean_frame("player_stats", df)
+
+CLEANERS = {
+    "daily_scores": clean_daily_scores_frame,
+    "league_standings": clean_league_standings_frame,
+    "player_stats": clean_player_stats_frame,
+}
+
+def clean_dataset_chunked(name, chunksize, warehouse=None):
+    """Clean a dataset chunk by chunk, straight from the raw store to the clean store (and the warehouse).
+
+    Memory stays bounded by the chunk (or, for the partitioned scores, the partition) size.
+    Returns the number of clean rows written.
+    """
+    writer = storage.DatasetWriter(f"{name}_clean")
+    rows = 0
+    try:
+        for chunk in storage.iter_chunks(name, chunksize):
+            cleaned = storage.conform(f"{name}_clean", clean_frame(name, chunk))
+            writer.write(cleaned)
+            if warehouse is not None:
+                warehouse.load(name, cleaned)
+            rows += len(cleaned)
+    except BaseException:
+        writer.abort()
+        raise
+    writer.close()
+    return rows
+
+# ----------------- Incremental State -----------------
+# Per dataset: a fingerprint of every raw input file, grouped by partition, and the date
+# watermark (latest game date cleaned). Inputs whose hash did not change are not read again.
+def load_state(path=STATE_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def save_state(state, path=STATE_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f, indent=1)
+    os.replace(tmp_path, path)
+
+def file_fingerprint(path, previous=None):
+    """Size, mtime and SHA-256 of a file; the hash is reused when size and mtime did not change."""
+    stat = os.stat(path)
+    if previous and previous["size"] == stat.st_size and previous["mtime_ns"] == stat.st_mtime_ns:
+        return previous
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest.hexdigest()}
+
+def fingerprint_inputs(name, previous=None):
+    """{partition key: {file: fingerprint}} of the raw files of a dataset."""
+    previous = previous or {}
+    return {
+        key: {path: file_fingerprint(path, previous.get(key, {}).get(path)) for path in paths}
+        for key, paths in storage.dataset_files(name).items()
+    }
+
+def _hashes(files):
+    return {path: fp["sha256"] for path, fp in files.items()}
+
+def iso_dates(df):
+    return pd.to_datetime(df["Date"], format="%B %d, %Y").dt.strftime("%Y-%m-%d")
+
+def max_date(df):
+    """Latest "December 16, 2024" date of a frame as YYYY-MM-DD, or None."""
+    if "Date" not in df.columns or df["Date"].isna().all():
+        return None
+    return iso_dates(df).max()
+
+def merge_clean(name, df, watermark):
+    """Merge re-cleaned rows into the clean store, replacing the stored rows from the
+    watermark date on and those with the same game ids."""
+    with metrics.span("etl", function="merge_clean", dataset=name) as span:
+        span.rows = len(df)
+        _merge_clean(f"{name}_clean", df, watermark)
+
+def _merge_clean(clean_name, df, watermark):
+    stored = storage.read(clean_name)
+    keep = iso_dates(stored) < watermark
+    if "Game ID" in stored.columns and "Game ID" in df.columns:
+        keep &= ~stored["Game ID"].isin(df["Game ID"].dropna())
+    merged = pd.concat([stored[keep], df], ignore_index=True)
+    if storage.STORAGE_FORMAT == "parquet" and storage.SCHEMAS[clean_name].get("partition"):
+        # Only the months holding new rows are rewritten
+        merged = merged[storage.partition_values(merged).isin(storage.partition_values(df))]
+    storage.write(clean_name, merged)
+
+def plan_incremental(name, entry):
+    """Compare the raw inputs of a dataset with `entry` (its saved state).
+
+    Returns (input fingerprints, changed partition keys, removed partition keys, inputs
+    already cleaned before).
+    """
+    previous = entry.get("inputs", {}) if storage.exists(f"{name}_clean") else {}
+    inputs = fingerprint_inputs(name, previous)
+    changed = [key for key, files in inputs.items() if _hashes(files) != _hashes(previous.get(key, {}))]
+    removed = [key for key in previous if key not in inputs]
+    return inputs, changed, removed, set(previous)
+
+def clean_input(name, key, watermark=None, merge=False):
+    """Clean one changed raw input of a dataset into its clean store: an ETL task.
+
+    A partition is re-cleaned whole and replaces its clean partition. A single input
+    file with dates (the CSV store) is re-read, but with `merge` only its rows from the
+    watermark date on, or not cleaned yet, are cleaned and merged into the clean store.
+    Returns (clean rows, seconds, worker pid).
+    """
+    start = time.perf_counter()
+    if key:
+        df = clean_frame(name, storage.read_partition(name, key))
+        if df.empty:
+            storage.delete_partition(f"{name}_clean", key)
+        else:
+            storage.write(f"{name}_clean", df)
+    else:
+        df = storage.read(name)
+        if merge and watermark and "Date" in df.columns:
+            todo = iso_dates(df) >= watermark
+            if "Game ID" in df.columns:
+                known = storage.read(f"{name}_clean", columns=["Game ID"])["Game ID"]
+                todo |= ~df["Game ID"].isin(known)
+            df = clean_frame(name, df[todo])
+            merge_clean(name, df, watermark)
+        else:
+            df = clean_frame(name, df)
+            storage.write(f"{name}_clean", df)
+    return storage.conform(f"{name}_clean", df), time.perf_counter() - start, os.getpid()
+
+def run_tasks(tasks, workers=1):
+    """Run clean_input tasks, across a pool of `workers` processes when more than one.
+
+    Yields (task, result) as tasks finish. Every task writes its own output files, each
+    one atomically, so tasks never wait on each other.
+    """
+    if workers <= 1 or len(tasks) <= 1:
+        for task in tasks:
+            yield task, clean_input(*task)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(clean_input, *task): task for task in tasks}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+def print_task_timings(timings, wall):
+    print("\n----- ETL Tasks -----")
+    for name, key, rows, seconds, pid in sorted(timings):
+        print(f"{name:<18} {key or '-':<9} {rows:>8} rows {seconds:8.2f}s  pid {pid}")
+    busy = sum(t[3] for t in timings)
+    print(f"{len(timings)} tasks, {busy:.2f}s of work in {wall:.2f}s (x{busy / wall if wall else 0:.1f})")
+
+def clean_incremental(names, state, workers=1, warehouse=None, full=False):
+    """Clean the raw inputs of the datasets `names` that changed since their saved `state`
+    (every input with `full`), as parallel tasks; updates `state` in place.
+
+    Returns the clean rows by dataset name.
+    """
+    plans, tasks = {}, []
+    for name in names:
+        entry = {} if full else state.get(name, {})
+        plans[name] = plan_incremental(name, entry)
+        _, changed, _, cleaned_before = plans[name]
+        tasks += [(name, key, entry.get("watermark"), key in cleaned_before) for key in changed]
+
+    # Warehouse loads stay in this process (SQLite has one writer) and overlap with the workers
+    start = time.perf_counter()
+    cleaned = {name: [] for name in names}
+    timings = []
+    for (name, key, _, _), (df, seconds, pid) in run_tasks(tasks, workers):
+        timings.append((name, key, len(df), seconds, pid))
+        # Spans recorded in worker processes are lost with them: the task timing stands in
+        metrics.record("etl", seconds, rows=len(df), function="clean_input", dataset=name)
+        if warehouse is not None:
+            warehouse.load(name, df)
+        cleaned[name].append(df)
+    if tasks:
+        print_task_timings(timings, time.perf_counter() - start)
+
+    clean = {}
+    for name, (inputs, changed, removed, _) in plans.items():
+        for key in removed:
+            if key:
+                storage.delete_partition(f"{name}_clean", key)
+        watermark = None if full else state.get(name, {}).get("watermark")
+        watermark = max(filter(None, [watermark] + [max_date(df) for df in cleaned[name]]), default=None)
+        state[name] = {"inputs": inputs, "watermark": watermark}
+        if changed or removed:
+            rows = sum(len(df) for df in cleaned[name])
+            print(f"{name}: {len(changed)} changed inputs cleaned ({rows} rows), "
+                  f"{len(inputs) - len(changed)} unchanged, watermark {watermark}")
+        else:
+            print(f"{name}: no change since the last run, skipped")
+        clean[name] = (pd.concat(cleaned[name], ignore_index=True) if cleaned[name]
+                       else storage.conform(f"{name}_clean", pd.DataFrame()))
+    return clean
+
+# ----------------- Aggregates -----------------
+# Small tables the dashboard looks up instead of computing them per request, refreshed from
+# the warehouse for what the last clean run touched.
+LEADERBOARD_SIZE = 10
+ROLLING_GAMES = 10
+
+def leaderboards(players, n=LEADERBOARD_SIZE):
+    """Top `n` players of every stat from a season's player rows (rank order, traded players' total row only)."""
+    # Namesakes are told apart by their id; rows loaded before ids were kept only have the name
+    players = players[~players["player_id"].fillna(players["player"]).duplicated()]
+    boards = []
+    for stat in storage.PLAYER_STATS_NUMERIC:
+        # Stable sort: ties keep the site's ranking order
+        top = players.dropna(subset=[stat]).sort_values(stat, ascending=False, kind="stable").head(n)
+        boards.append(pd.DataFrame({"season": top["season"], "stat": stat, "rank": range(1, len(top) + 1),
+                                    "player": top["player"], "team": top["team"], "value": top[stat]}))
+    return pd.concat(boards, ignore_index=True)
+
+def team_averages(totals):
+    """Per-game averages of every team-season in `totals`: season, home, away and last-10 splits."""
+    totals = totals.sort_values("date", kind="stable")
+    keys = ["season", "team"]
+    splits = {
+        "season": totals,
+        "home": totals[totals["side"] == "Home"],
+        "away": totals[totals["side"] == "Away"],
+        f"last{ROLLING_GAMES}": totals.groupby(keys).tail(ROLLING_GAMES),
+    }
+    frames = []
+    for split, games in splits.items():
+        grouped = games.groupby(keys)
+        averages = grouped[TEAM_TOTALS_STATS].mean()
+        averages.insert(0, "games", grouped.size())
+        averages.insert(0, "split", split)
+        frames.append(averages.reset_index())
+    return pd.concat(frames, ignore_index=True)
+
+def conference_standings(standings):
+    """Rank, win% and games behind the conference leader (best wins minus losses) of a standings snapshot."""
+    df = standings.copy()
+    # A team yet to play has no win% to divide out: .000, like on the site
+    df["win_pct"] = (df["wins"] / (df["wins"] + df["losses"])).fillna(0.0)
+    ranked = []
+    for _, conference in df.groupby("conference"):
+        conference = conference.sort_values(["win_pct", "wins"], ascending=False)
+        leader = conference.loc[(conference["wins"] - conference["losses"]).idxmax()]
+        conference["games_behind"] = ((leader["wins"] - conference["wins"])
+                                      + (conference["losses"] - leader["losses"])) / 2
+        conference["rank"] = range(1, len(conference) + 1)
+        ranked.append(conference)
+    return pd.concat(ranked, ignore_index=True) if ranked else df
+
+def materialize(warehouse, clean=None):
+    """Refresh the aggregate tables for the data the last clean run touched (everything when `clean` is None)."""
+    full = clean is None or warehouse.is_empty("team_averages")
+    clean = clean or {}
+    if full or not clean.get("player_stats", pd.DataFrame()).empty:
+        season = warehouse.current_season()
+        players = warehouse.player_rows(season)
+        if not players.empty:
+            with metrics.span("etl", function="leaderboards") as span:
+                span.rows = len(players)
+                boards = leaderboards(players)
+            warehouse.replace("leaderboards", boards, season=season)
+
+    # Only the teams that played get their averages recomputed, from their own season's games
+    scores = clean.get("daily_scores", pd.DataFrame())
+    pairs = None
+    if not full:
+        seasons = season_of(pd.to_datetime(scores["Date"], format="%B %d, %Y")) if not scores.empty else []
+        pairs = sorted({(team, int(season)) for side in ("Away", "Home")
+                        for team, season in zip(scores.get(f"{side} Team", []), seasons)})
+    if full or pairs:
+        totals = warehouse.team_season_totals(pairs)
+        if not totals.empty:
+            with metrics.span("etl", function="team_averages") as span:
+                span.rows = len(totals)
+                averages = team_averages(totals)
+            warehouse.upsert("team_averages", averages)
+
+    if full or not clean.get("league_standings", pd.DataFrame()).empty:
+        standings = warehouse.standings_snapshot()
+        if not standings.empty:
+            with metrics.span("etl", function="conference_standings") as span:
+                span.rows = len(standings)
+                ranked = conference_standings(standings)
+            warehouse.upsert("conference_standings", ranked)
+    if full:
+        print("Aggregates refreshed")
+    elif pairs:
+        print(f"Aggregates refreshed for {len(pairs)} team seasons")
+
+def run(raw=None, persist=True, chunksize=None, load_warehouse=True, full=False, workers=1, aggregates=True,
+        warehouse_path=None):
+    """Clean every dataset; `raw` maps dataset names to in-memory frames (read from the store when missing).
+
+    Returns the clean frames by dataset name (the scheduler hands them to materialize), with
+    memory-compact dtypes (see storage.optimize_dtypes) once written to the store when `persist`
+    is set; their memory is printed. Datasets read from the store are
+    cleaned incrementally: only the inputs that changed since the last run (see
+    clean_incremental), spread over `workers` processes, and the returned frames
+    hold those rows only. `full` re-cleans every input; with `chunksize` too, the
+    datasets are streamed from the raw store to the clean store instead and left
+    out of the returned frames. Persisted data is also upserted into the SQLite
+    warehouse unless `load_warehouse` is off, and the aggregate tables refreshed
+    for it (see materialize) unless `aggregates` is off. `warehouse_path` names
+    another warehouse; that one is loaded even without `persist`.
+    """
+    raw = raw or {}
+    clean = {}
+    state = load_state() if persist else {}
+    warehouse = None
+    if load_warehouse and (persist or warehouse_path):
+        warehouse = Warehouse(warehouse_path) if warehouse_path else Warehouse()
+    try:
+        from_store = [name for name in DATASETS if persist and name not in raw]
+        for name in DATASETS:
+            if name in from_store:
+                continue
+            clean[name] = storage.conform(f"{name}_clean", CLEANERS[name](raw[name] if name in raw else storage.read(name)))
+            if persist:
+                storage.write(f"{name}_clean", clean[name])
+                print(f"{name} cleaned and saved to the {storage.STORAGE_FORMAT} store")
+            if warehouse is not None:
+                warehouse.load(name, clean[name])
+            # Only the caller uses the frame from here on: keep it with memory-compact dtypes
+            clean[name] = storage.optimize_dtypes(clean[name])
+
+        if chunksize and full:
+            for name in from_store:
+                # Fingerprint the inputs first: a file changing during the run gets cleaned again next time
+                inputs = fingerprint_inputs(name)
+                rows = clean_dataset_chunked(name, chunksize, warehouse)
+                print(f"{name} cleaned in chunks of {chunksize} rows: {rows} rows saved to the {storage.STORAGE_FORMAT} store")
+                watermark = max_date(storage.read(f"{name}_clean", columns=["Date"])) if name == "daily_scores" else None
+                state[name] = {"inputs": inputs, "watermark": watermark}
+        elif from_store:
+            clean.update((name, storage.optimize_dtypes(df))
+                         for name, df in clean_incremental(from_store, state, workers, warehouse, full).items())
+        if persist:
+            save_state(state)
+        if warehouse is not None and aggregates:
+            materialize(warehouse, None if full else clean)
+    finally:
+        if warehouse is not None:
+            warehouse.close()
+    if clean:
+        storage.memory_report(clean, title="Clean Frames")
+    return clean
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Clean the scraped NBA datasets.")
+    parser.add_argument("--chunksize", type=int,
+                        help="With --full, stream the datasets in chunks of this many rows (bounded memory)")
+    parser.add_argument("--full", action="store_true",
+                        help="Re-clean every input instead of only those changed since the last run")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processes cleaning the datasets and partitions in parallel")
+    parser.add_argument("--no-warehouse", action="store_true", help="Do not load the SQLite warehouse")
+    args = parser.parse_args(argv)
+    run(chunksize=args.chunksize, load_warehouse=not args.no_warehouse, full=args.full, workers=args.workers)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,167 @@
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import requests
+
+import metrics
+from transport import HttpTransport
+
+# Status codes worth retrying: rate limited or a transient server error
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# basketball-reference.com blocks clients making more than 20 requests per minute
+DEFAULT_REQUESTS_PER_SECOND = 0.33
+DEFAULT_MAX_WORKERS = 4
+
+# Endpoint of a URL for the request metrics, first match wins
+URL_CLASSES = [
+    (re.compile(r"/boxscores/\d{8}0[A-Z]{3}\.html$"), "boxscore"),
+    (re.compile(r"/boxscores/(\?.*)?$"), "boxscore_index"),
+    (re.compile(r"/leagues/NBA_\d{4}_standings\.html$"), "standings"),
+    (re.compile(r"/leagues/NBA_\d{4}_per_game\.html$"), "per_game"),
+    (re.compile(r"^https?://[^/]+/?$"), "front_page"),
+]
+
+
+def url_class(url):
+    for pattern, name in URL_CLASSES:
+        if pattern.search(url):
+            return name
+    return "other"
+
+
+# ----------------- Rate Limiter -----------------
+class RateLimiter:
+    """Token bucket shared by every worker thread of a Fetcher."""
+
+    def __init__(self, requests_per_second, burst=1):
+        self.rate = requests_per_second
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may be sent."""
+        if not self.rate:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+# ----------------- Fetcher -----------------
+class Fetcher:
+    """Keep-alive HTTP client with bounded concurrency, rate limiting and retries."""
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, requests_per_second=DEFAULT_REQUESTS_PER_SECOND,
+                 max_retries=3, backoff=1.0, timeout=30, cache=None, transport=None):
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.limiter = RateLimiter(requests_per_second)
+        self.cache = cache
+
+        # Requests go out through the transport: the network by default, or a record/replay
+        # archive (see transport.py)
+        self.transport = transport or HttpTransport(max_workers)
+
+    def _retry_delay(self, response, attempt):
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        return self.backoff * (2 ** attempt)
+
+    def get(self, url):
+        """GET a URL through the cache, retrying on 429/5xx and connection errors with exponential backoff."""
+        if not metrics.enabled():
+            return self._get_cached(url)[0]
+        start = time.perf_counter()
+        response, source = self._get_cached(url)
+        kind = url_class(url)
+        metrics.record("http_request", time.perf_counter() - start, url_class=kind, source=source)
+        metrics.count("http_responses_total", url_class=kind, source=source, status=response.status_code)
+        body = response.content if source == "network" else response.text.encode("utf-8")
+        metrics.count("http_bytes_total", len(body), url_class=kind, source=source)
+        return response
+
+    def _get_cached(self, url):
+        # (response, where it came from: cache, revalidated or network)
+        entry = self.cache.lookup(url) if self.cache else None
+        if entry is not None and self.cache.is_fresh(entry):
+            return self.cache.hit(entry), "cache"
+        headers = self.cache.conditional_headers(entry) if self.cache else {}
+
+        response = self._get(url, headers)
+        if self.cache:
+            if response.status_code == 304 and entry is not None:
+                return self.cache.revalidated(entry), "revalidated"
+            if response.status_code == 200:
+                self.cache.store(url, response)
+        return response, "network"
+
+    def _get(self, url, headers):
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            try:
+                response = self.transport.get(url, headers=headers, timeout=self.timeout)
+            except requests.RequestException:
+                if attempt == self.max_retries:
+                    raise
+                response = None
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    # The site serves UTF-8 without a charset header; requests would assume ISO-8859-1
+                    if "charset" not in response.headers.get("Content-Type", "").lower():
+                        response.encoding = "utf-8"
+                    return response
+            delay = self._retry_delay(response, attempt)
+            print(f"Retrying {url} in {delay:.1f}s (attempt {attempt + 1}/{self.max_retries})")
+            time.sleep(delay)
+
+    def _get_or_none(self, url):
+        try:
+            return self.get(url)
+        except requests.RequestException as e:
+            print(f"Failed to fetch {url}: {e}")
+            return None
+
+    def fetch_all(self, urls):
+        """Fetch URLs concurrently; responses come back in the order of `urls` (None on failure)."""
+        if not urls:
+            return []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            return list(pool.map(self._get_or_none, urls))
+
+    def close(self):
+        self.transport.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+@contextmanager
+def own_fetcher(fetcher=None):
+    """`fetcher`, left open for its owner, or a new Fetcher closed on exit.
+
+    Pass the caller's fetcher wherever there is one: fetchers do not share their rate limit.
+    """
+    if fetcher is not None:
+        yield fetcher
+        return
+    with Fetcher() as fetcher:
+        yield fetcher
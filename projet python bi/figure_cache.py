@@ -0,0 +1,65 @@
+import json
+import threading
+from collections import OrderedDict
+
+from plotly.io.json import to_json_plotly
+
+import metrics
+
+DEFAULT_MAX_ENTRIES = 256
+
+
+class FigureCache:
+    """Bounded LRU of rendered callback outputs, keyed by (callback, key, data version).
+
+    Outputs are stored serialized to plain JSON structures (the form Dash sends to the
+    browser): a hit skips building the Plotly figures and their validation, and only costs
+    the final JSON encoding. Entries of an older data version are dropped as soon as a
+    newer version is asked for, so a data reload invalidates the cache by itself.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.version = None
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, callback, key, version, build):
+        """The cached output of `callback` for `key` at data `version`, built by `build()` on a miss."""
+        with self.lock:
+            if version != self.version:
+                self.entries.clear()
+                self.version = version
+            output = self.entries.get((callback, key, version))
+            if output is not None:
+                self.entries.move_to_end((callback, key, version))
+                self.hits += 1
+        if output is not None:
+            metrics.count("figure_cache_hits_total", callback=callback)
+            return output
+
+        # Built outside the lock: other callbacks keep being served meanwhile
+        output = json.loads(to_json_plotly(build()))
+        with self.lock:
+            self.misses += 1
+            if version == self.version:
+                self.entries[(callback, key, version)] = output
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+                    self.evictions += 1
+        metrics.count("figure_cache_misses_total", callback=callback)
+        return output
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            requests = self.hits + self.misses
+            return {"entries": len(self.entries), "max_entries": self.max_entries, "version": self.version,
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "hit_rate": round(self.hits / requests, 4) if requests else None}
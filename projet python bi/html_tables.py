@@ -0,0 +1,136 @@
+import re
+
+import pandas as pd
+
+try:
+    import lxml.html
+except ImportError:  # fall back to the pure-Python parser
+    lxml = None
+
+from bs4 import BeautifulSoup
+
+import metrics
+
+TABLE_CLOSE = "</table>"
+
+
+# ----------------- Table Slicing -----------------
+def extract_table(html, table_id=None):
+    """Return the raw `<table>...</table>` markup with the given id (or the first table), or None.
+
+    Only this slice gets parsed, instead of building a tree for the whole page. Tables that
+    basketball-reference hides inside HTML comments are found too.
+    """
+    if table_id is None:
+        start = html.find("<table")
+    else:
+        match = re.search(r'<table\b[^>]*\bid="%s"' % re.escape(table_id), html)
+        start = match.start() if match else -1
+    if start == -1:
+        return None
+    end = html.find(TABLE_CLOSE, start)
+    if end == -1:
+        return None
+    return html[start:end + len(TABLE_CLOSE)]
+
+
+# ----------------- Row Extraction -----------------
+class Row:
+    """One `<tr>`: its section (thead/tbody/tfoot), classes, cell texts in order and links."""
+
+    __slots__ = ("section", "classes", "values", "th", "cells", "links")
+
+    def __init__(self, section, classes, values, th, cells, links):
+        self.section = section
+        self.classes = classes
+        self.values = values   # every th/td cell, in order
+        self.th = th           # text of the first <th>, or None
+        self.cells = cells     # <td> cells only
+        self.links = links     # (text, href) of every <a>
+
+    @property
+    def is_header(self):
+        return self.section == "thead" or "thead" in self.classes
+
+
+def _rows_lxml(fragment):
+    table = lxml.html.fragment_fromstring(fragment)
+    for tr in table.iter("tr"):
+        parent = tr.getparent()
+        section = parent.tag if parent.tag in ("thead", "tbody", "tfoot") else "tbody"
+        th, values, cells = None, [], []
+        for cell in tr:
+            if cell.tag not in ("th", "td"):
+                continue
+            text = cell.text_content().strip()
+            values.append(text)
+            if cell.tag == "td":
+                cells.append(text)
+            elif th is None:
+                th = text
+        links = [(a.text_content().strip(), a.get("href", "")) for a in tr.iter("a")]
+        yield Row(section, (tr.get("class") or "").split(), values, th, cells, links)
+
+
+def _rows_bs4(fragment):
+    table = BeautifulSoup(fragment, "html.parser").find("table")
+    for tr in table.find_all("tr"):
+        section = tr.parent.name if tr.parent.name in ("thead", "tbody", "tfoot") else "tbody"
+        th, values, cells = None, [], []
+        for cell in tr.find_all(["th", "td"], recursive=False):
+            text = cell.text.strip()
+            values.append(text)
+            if cell.name == "td":
+                cells.append(text)
+            elif th is None:
+                th = text
+        links = [(a.text.strip(), a.get("href", "")) for a in tr.find_all("a")]
+        yield Row(section, tr.get("class", []), values, th, cells, links)
+
+
+def table_label(table_id):
+    """Table id without the team, for the parse metrics: box-PHI-game-basic -> box-game-basic."""
+    return re.sub(r"^box-[A-Z]{3}-", "box-", table_id) if table_id else "first"
+
+
+def table_rows(html, table_id=None):
+    """Parse only the requested table and return its rows, or None if the table is missing."""
+    # The label costs a regex: only built when the span is recorded
+    labels = {"table": table_label(table_id)} if metrics.enabled() else {}
+    with metrics.span("parse", **labels) as span:
+        fragment = extract_table(html, table_id)
+        if fragment is None:
+            return None
+        rows = list(_rows_lxml(fragment) if lxml is not None else _rows_bs4(fragment))
+        span.rows = len(rows)
+    return rows
+
+
+def read_table(html, table_id=None):
+    """Read a table into a DataFrame, header taken from its last thead row, repeated header rows dropped.
+
+    Columns whose non-empty cells are all numbers are converted to numbers, like pandas.read_html.
+    """
+    rows = table_rows(html, table_id)
+    if not rows:
+        return None
+    return rows_frame(rows)
+
+
+def rows_frame(rows):
+    """DataFrame of the rows of a table (see read_table): one record per row that is not a header, in order."""
+    header_rows = [row for row in rows if row.section == "thead"] or rows[:1]
+    columns = header_rows[-1].values
+    width = len(columns)
+    # Short rows (e.g. a "Did Not Play" cell spanning the stat columns) are padded with NaN
+    records = [
+        ([value or None for value in row.values] + [None] * width)[:width]
+        for row in rows if not row.is_header
+    ]
+
+    df = pd.DataFrame(records, columns=columns)
+    for column in df.columns:
+        converted = pd.to_numeric(df[column], errors="coerce")
+        if converted.notna().sum() == df[column].notna().sum():
+            df[column] = converted
+    return df
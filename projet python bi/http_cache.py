@@ -0,0 +1,160 @@
+import re
+import sqlite3
+import threading
+import time
+import zlib
+
+DEFAULT_CACHE_PATH = "http_cache.sqlite"
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+HOUR = 60 * 60
+
+# Time-to-live per endpoint, first match wins. None means the page never goes stale.
+DEFAULT_TTLS = [
+    (re.compile(r"/boxscores/\d{8}0[A-Z]{3}\.html$"), None),   # finished games never change
+    (re.compile(r"/leagues/NBA_\d{4}_standings\.html$"), 6 * HOUR),
+    (re.compile(r"/leagues/NBA_\d{4}_per_game\.html$"), 6 * HOUR),
+    (re.compile(r"/boxscores/(\?.*)?$"), 10 * 60),             # per-date game index
+    (re.compile(r"^https?://[^/]+/?$"), 10 * 60),               # front page scores
+]
+DEFAULT_TTL = HOUR
+
+
+class CachedResponse:
+    """Minimal stand-in for requests.Response served from the cache."""
+
+    def __init__(self, url, text, status_code=200):
+        self.url = url
+        self.text = text
+        self.status_code = status_code
+        self.headers = {}
+
+
+# ----------------- Response Cache -----------------
+class ResponseCache:
+    """Persistent URL -> body cache with ETag/Last-Modified revalidation and LRU eviction."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES, ttls=None, default_ttl=DEFAULT_TTL):
+        self.max_bytes = max_bytes
+        self.ttls = DEFAULT_TTLS if ttls is None else ttls
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                stored_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access)")
+        self.conn.commit()
+
+    def ttl_for(self, url):
+        for pattern, ttl in self.ttls:
+            if pattern.search(url):
+                return ttl
+        return self.default_ttl
+
+    def lookup(self, url):
+        """Return the cached entry for a URL as a dict, or None.
+
+        Every lookup counts: a hit when the entry is fresh, a miss otherwise (no entry, or a
+        stale one to revalidate).
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT body, etag, last_modified, stored_at FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+            fresh = row is not None and self._fresh(url, row[3])
+            if fresh:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if row is None:
+            return None
+        body, etag, last_modified, stored_at = row
+        return {"url": url, "body": body, "etag": etag, "last_modified": last_modified, "stored_at": stored_at,
+                "fresh": fresh}
+
+    def _fresh(self, url, stored_at):
+        ttl = self.ttl_for(url)
+        return ttl is None or time.time() - stored_at < ttl
+
+    def is_fresh(self, entry):
+        """Whether the entry was fresh when looked up."""
+        return entry["fresh"]
+
+    def conditional_headers(self, entry):
+        headers = {}
+        if entry is not None:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def response_for(self, entry):
+        return CachedResponse(entry["url"], zlib.decompress(entry["body"]).decode("utf-8"))
+
+    def hit(self, entry):
+        """Serve a fresh entry without touching the network."""
+        self._touch(entry["url"], refresh=False)
+        return self.response_for(entry)
+
+    def revalidated(self, entry):
+        """The server answered 304 Not Modified: the stored body is still good."""
+        with self.lock:
+            self.revalidations += 1
+        self._touch(entry["url"], refresh=True)
+        return self.response_for(entry)
+
+    def store(self, url, response):
+        body = zlib.compress(response.text.encode("utf-8"))
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, body, response.headers.get("ETag"), response.headers.get("Last-Modified"), now, now, len(body)),
+            )
+            self._evict()
+            self.conn.commit()
+
+    def _touch(self, url, refresh):
+        now = time.time()
+        with self.lock:
+            if refresh:
+                self.conn.execute("UPDATE responses SET last_access = ?, stored_at = ? WHERE url = ?", (now, now, url))
+            else:
+                self.conn.execute("UPDATE responses SET last_access = ? WHERE url = ?", (now, url))
+            self.conn.commit()
+
+    def _evict(self):
+        # Drop least recently used entries until the cache fits in max_bytes
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for url, size in self.conn.execute("SELECT url, size FROM responses ORDER BY last_access").fetchall():
+            self.conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def report(self):
+        with self.lock:
+            hits, misses, revalidations = self.hits, self.misses, self.revalidations
+        lookups = hits + misses
+        hit_rate = f", {hits / lookups:.0%} hit rate" if lookups else ""
+        print(f"\nHTTP cache: {hits} hits, {misses} misses of which {revalidations} revalidated "
+              f"({lookups} lookups{hit_rate})")
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
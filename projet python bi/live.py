@@ -0,0 +1,184 @@
+import argparse
+import time
+from datetime import datetime
+
+import pandas as pd
+import requests
+from bs4 import BeautifulSoup, SoupStrainer
+
+import etl
+import metrics
+import scraper
+import storage
+import transport
+from fetcher import Fetcher, DEFAULT_MAX_WORKERS, DEFAULT_REQUESTS_PER_SECOND
+from warehouse import Warehouse
+
+LIVE_INTERVAL = 30
+
+# Only the scores block of the front page is parsed, not the whole page
+SCORES_ONLY = SoupStrainer("div", id="scores")
+
+
+# ----------------- Fingerprints -----------------
+def fingerprint(game):
+    """What the front page shows of a game's progress: both scores."""
+    return str(game["Away Score"]), str(game["Home Score"])
+
+
+def changed_games(game_list, fingerprints):
+    """Games whose fingerprint differs from the one in `fingerprints` (new games included).
+
+    Games without a score yet (not started) are left out.
+    """
+    return [g for g in game_list
+            if g["Away Score"] and g["Home Score"] and fingerprints.get(g["game_id"]) != fingerprint(g)]
+
+
+def boxscore_budget(interval, requests_per_second):
+    """Box scores a poll can fetch at the rate limit and still end within `interval`, besides
+    the front page (None without a rate limit)."""
+    if not requests_per_second:
+        return None
+    return max(1, int(interval * requests_per_second) - 1)
+
+
+# ----------------- Live Poller -----------------
+class LivePoller:
+    """Poll the front page scores during games and publish only the games whose score changed.
+
+    A poll costs one front page request, plus one box score request per changed game, up to
+    `max_boxscores` (see boxscore_budget): at the default 0.33 requests per second and 30s
+    interval, 8 box scores, so a poll takes at most ~30s. On a busy night the other changed
+    games wait for the next polls, those published longest ago first. The changed games are
+    upserted into the warehouse (game cards and game stats) and published as live score
+    deltas the dashboard picks up (see Warehouse.live_scores). They are not written to the
+    raw store: the regular scrape stores the final box score after the game.
+    """
+
+    def __init__(self, fetcher, warehouse, base_url=scraper.BASE_URL, max_boxscores=None):
+        self.fetcher = fetcher
+        self.warehouse = warehouse
+        self.base_url = base_url
+        self.max_boxscores = max_boxscores
+        # game id -> poll that last published it
+        self.published_at = {}
+        self.polls = 0
+        # A restarted poller does not republish the games that did not change
+        self.fingerprints = {row["Game ID"]: fingerprint(row) for row in warehouse.live_scores()}
+        self.game_date = None
+        self.matchups = None
+
+    def read_game_date(self):
+        response = self.fetcher.get(f"{self.base_url}/boxscores/")
+        game_date = scraper.parse_game_date(response.text) if response.status_code == 200 else None
+        if game_date is None:
+            print("Could not find game date. Using today's date as fallback.")
+            game_date = datetime.now().strftime("%B %d, %Y")
+        return game_date
+
+    def read_scores(self):
+        """Game list of the front page; None if it could not be fetched."""
+        response = self.fetcher.get(f"{self.base_url}/")
+        if response.status_code != 200:
+            print(f"Failed to fetch scores. Status: {response.status_code}")
+            return None
+        section = BeautifulSoup(response.text, "html.parser", parse_only=SCORES_ONLY).find("div", id="scores")
+        if section is None:
+            return []
+
+        formatted_date = datetime.strptime(self.game_date, "%B %d, %Y").strftime("%Y%m%d") if self.game_date else ""
+        game_list = scraper.parse_game_summaries(section, formatted_date, self.base_url)
+        # Game ids hold the date: the boxscore index is read again only for a new set of games
+        matchups = [(g["away_abbr"], g["home_abbr"]) for g in game_list]
+        if matchups != self.matchups:
+            self.game_date = self.read_game_date()
+            self.matchups = matchups
+            formatted_date = datetime.strptime(self.game_date, "%B %d, %Y").strftime("%Y%m%d")
+            game_list = scraper.parse_game_summaries(section, formatted_date, self.base_url)
+        return game_list
+
+    def poll(self):
+        """Read the scores once and publish the changed games; returns their rows."""
+        start = time.perf_counter()
+        self.polls += 1
+        game_list = self.read_scores()
+        if game_list is None:
+            return []
+        changed = changed_games(game_list, self.fingerprints)
+        # Within the budget, the games published longest ago first: none of them starves
+        changed.sort(key=lambda g: self.published_at.get(g["game_id"], 0))
+        todo = changed[:self.max_boxscores] if self.max_boxscores else changed
+        rows = []
+        if todo:
+            rows, _ = scraper.fetch_game_totals(self.fetcher, todo, self.game_date)
+            # Games whose box score failed, or left for later, keep their old fingerprint and
+            # are fetched on a next poll
+            published = {row["Game ID"] for row in rows}
+            for g in todo:
+                if g["game_id"] in published:
+                    self.fingerprints[g["game_id"]] = fingerprint(g)
+                    self.published_at[g["game_id"]] = self.polls
+            if rows:
+                self.publish(rows)
+        elapsed = time.perf_counter() - start
+        deferred = len(changed) - len(todo)
+        metrics.record("live_poll", elapsed, rows=len(rows))
+        metrics.count("live_changed_games_total", len(changed))
+        metrics.count("live_deferred_games_total", deferred)
+        print(f"{len(game_list)} games, {len(changed)} changed, {len(rows)} published"
+              + (f", {deferred} left for the next poll" if deferred else "") + f" in {elapsed:.2f}s")
+        return rows
+
+    def publish(self, rows):
+        df = storage.conform("daily_scores_clean", etl.clean_frame("daily_scores", pd.DataFrame(rows)))
+        self.warehouse.load("daily_scores", df)
+        version = self.warehouse.publish_live(df)
+        print(f"Live scores version {version}: {len(df)} games updated")
+
+    def run(self, interval=LIVE_INTERVAL, max_polls=None, sleep=time.sleep):
+        """Poll every `interval` seconds until interrupted (or for `max_polls` polls).
+
+        A poll that fails once the fetcher's retries are spent is skipped: the site being down
+        for a while does not stop the polling.
+        """
+        polls = 0
+        try:
+            while max_polls is None or polls < max_polls:
+                try:
+                    self.poll()
+                except requests.RequestException as e:
+                    print(f"Poll failed, retrying in {interval:g}s: {e}")
+                polls += 1
+                if max_polls is None or polls < max_polls:
+                    sleep(interval)
+        except KeyboardInterrupt:
+            print("Live polling stopped")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Poll the scores of the games in progress and publish the changes.")
+    parser.add_argument("--interval", type=float, default=LIVE_INTERVAL, help="Seconds between polls")
+    parser.add_argument("--polls", type=int, help="Stop after this many polls")
+    parser.add_argument("--max-workers", type=int, default=DEFAULT_MAX_WORKERS,
+                        help="Maximum number of concurrent box score requests")
+    parser.add_argument("--rps", type=float, default=DEFAULT_REQUESTS_PER_SECOND,
+                        help="Maximum requests per second (0 disables the limit)")
+    parser.add_argument("--base-url", default=scraper.BASE_URL, help="Site to scrape (e.g. a local stub server)")
+    transport.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    # No response cache: live pages change between polls, and box scores of unfinished games
+    # must not be cached as final
+    fetcher = Fetcher(max_workers=args.max_workers, requests_per_second=args.rps,
+                      transport=transport.from_args(args, args.max_workers))
+    warehouse = Warehouse()
+    try:
+        poller = LivePoller(fetcher, warehouse, args.base_url, boxscore_budget(args.interval, args.rps))
+        poller.run(args.interval, args.polls)
+    finally:
+        fetcher.close()
+        warehouse.close()
+
+if __name__ == "__main__":
+    main()
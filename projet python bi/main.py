@@ -1,29 +1,165 @@
+import argparse
+import atexit
 import os
-import subprocess
+import shutil
+import sys
+import tempfile
+import threading
 import time
+import traceback
 
-def run_scraper():
+import metrics
+import transport
+
+STAGES = ["scrape", "etl", "dashboard"]
+
+# Stages import their modules lazily so a partial run only pays for what it uses
+def run_scraper(ctx):
     print("Running web scraper...")
-    subprocess.run(["python", "scraper.py"])
+    import scraper
+    from fetcher import Fetcher
+    from http_cache import ResponseCache
+
+    # A recorded or replayed run goes without the response cache (see scraper.main)
+    cache = None if ctx["transport"] else ResponseCache()
+    fetcher = Fetcher(cache=cache, transport=ctx["transport"])
+    try:
+        ctx["raw"] = scraper.scrape(fetcher, ctx["base_url"] or scraper.BASE_URL, persist=ctx["persist"])
+    finally:
+        fetcher.close()
+        if cache:
+            cache.report()
+            cache.close()
 
-def run_etl():
+def run_etl(ctx):
     print("Running ETL pipeline...")
-    subprocess.run(["python", "etl.py"])
+    import etl
+    # Persisted raw data is read back incrementally: only what the scraper changed gets cleaned.
+    # Neither the raw nor the clean frames are kept: the dashboard reads the warehouse
+    raw = ctx.pop("raw", None)
+    if not ctx["persist"]:
+        # Nothing is written to the stores: the dashboard gets a warehouse of this run's frames
+        ctx["warehouse_path"] = scratch_warehouse_path()
+    etl.run(None if ctx["persist"] else raw, persist=ctx["persist"], warehouse_path=ctx.get("warehouse_path"))
 
-def run_dashboard():
+def run_dashboard(ctx):
     print("Launching dashboard...")
-    subprocess.run(["python", "dashboard.py"])
+    if "warehouse_path" in ctx:
+        # Read when the dashboard module is loaded
+        os.environ["NBA_WAREHOUSE"] = ctx["warehouse_path"]
+    import dashboard
+    ctx["serve"] = dashboard.serve
+
+def scratch_warehouse_path():
+    """A warehouse file in a temporary directory, removed at exit."""
+    directory = tempfile.mkdtemp(prefix="nba_warehouse_")
+    atexit.register(shutil.rmtree, directory, ignore_errors=True)
+    return os.path.join(directory, "warehouse.sqlite")
+
+STAGE_FUNCTIONS = {
+    "scrape": run_scraper,
+    "etl": run_etl,
+    "dashboard": run_dashboard,
+}
+
+def select_stages(only=None, skip=None):
+    stages = [s for s in STAGES if not only or s in only]
+    return [s for s in stages if not skip or s not in skip]
+
+def run_pipeline(stages, persist=True, base_url=None, transport=None):
+    """Run the stages in one process, handing DataFrames from stage to stage.
+
+    Returns (exit status, context, per-stage timings).
+    """
+    ctx = {"persist": persist, "base_url": base_url, "transport": transport}
+    timings = []
+    for stage in stages:
+        start = time.perf_counter()
+        try:
+            STAGE_FUNCTIONS[stage](ctx)
+        except Exception:
+            traceback.print_exc()
+            timings.append((stage, time.perf_counter() - start, "failed"))
+            return 1, ctx, timings
+        timings.append((stage, time.perf_counter() - start, "ok"))
+    return 0, ctx, timings
+
+def print_timings(timings):
+    print("\n----- Pipeline Timings -----")
+    for stage, seconds, status in timings:
+        print(f"{stage:<10} {seconds:8.2f}s  {status}")
+    print(f"{'total':<10} {sum(t[1] for t in timings):8.2f}s")
+
+def run_scheduled(serve_dashboard, base_url=None):
+    """Keep the data fresh with the scheduler (see scheduler.py) until stopped, behind the
+    dashboard when it is served: its lookups read the warehouse the scheduler refreshes."""
+    import scheduler
+
+    lock = scheduler.RunLock()
+    if not lock.acquire():
+        print(f"Another pipeline run holds {lock.path} (pid {lock.holder()}), exiting")
+        return 1
+    daemon = scheduler.Scheduler(timezone=scheduler.game_timezone(), ctx={"base_url": base_url})
+    try:
+        if not serve_dashboard:
+            daemon.run()
+            return 0
+        import dashboard
+        threading.Thread(target=daemon.run, name="scheduler", daemon=True).start()
+        dashboard.serve()
+    finally:
+        lock.release()
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the NBA scraper, ETL and dashboard in one process.")
+    parser.add_argument("--only", nargs="+", choices=STAGES, help="Run only these stages")
+    parser.add_argument("--skip", nargs="+", choices=STAGES, help="Skip these stages")
+    parser.add_argument("--no-persist", action="store_true",
+                        help="Keep scraped and cleaned data in memory instead of writing the stores and the warehouse "
+                             "(the dashboard serves a temporary warehouse of the run)")
+    parser.add_argument("--base-url", help="Site to scrape (e.g. a local stub server)")
+    parser.add_argument("--metrics", action="store_true",
+                        help="Record timings and counters of the scraper, ETL and dashboard callbacks")
+    parser.add_argument("--metrics-summary", default=metrics.DEFAULT_SUMMARY_PATH,
+                        help="JSON run summary written at exit with --metrics")
+    parser.add_argument("--metrics-port", type=int,
+                        help="With --metrics, also serve /metrics (Prometheus) on this port")
+    parser.add_argument("--schedule", action="store_true",
+                        help="Scrape, clean and aggregate on a game-hours cadence until stopped "
+                             "instead of once (the dashboard keeps running)")
+    transport.add_arguments(parser)
+    args = parser.parse_args(argv)
 
-def main():
-    # Run Scraper
-    run_scraper()
+    if args.metrics:
+        metrics.enable(args.metrics_summary, args.metrics_port)
+    stages = select_stages(args.only, args.skip)
+    if args.schedule:
+        return run_scheduled("dashboard" in stages, args.base_url)
+    if args.no_persist and "dashboard" in stages and "etl" not in stages:
+        print("Note: without the etl stage, the dashboard shows the last persisted data.")
 
-    # Wait before ETL
-    time.sleep(2)
-    run_etl()
+    # Never write the stores while a scheduler (or another run) is writing them
+    lock = None
+    if not args.no_persist and ("scrape" in stages or "etl" in stages):
+        import scheduler
+        lock = scheduler.RunLock()
+        if not lock.acquire():
+            print(f"Another pipeline run holds {lock.path} (pid {lock.holder()}), exiting")
+            return 1
+    from fetcher import DEFAULT_MAX_WORKERS
+    try:
+        status, ctx, timings = run_pipeline(stages, persist=not args.no_persist, base_url=args.base_url,
+                                            transport=transport.from_args(args, DEFAULT_MAX_WORKERS))
+    finally:
+        if lock is not None:
+            lock.release()
+    print_timings(timings)
 
-    # Run Dashboard
-    run_dashboard()
+    # The dashboard blocks until it is stopped, so it starts once the timings are out
+    if status == 0 and "serve" in ctx:
+        ctx["serve"]()
+    return status
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
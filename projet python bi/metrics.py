@@ -0,0 +1,247 @@
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Off unless enabled (enable(), or NBA_METRICS=1 in the environment): every span and counter
+# then returns after one flag check
+_enabled = False
+_lock = threading.Lock()
+_started = time.time()
+
+PREFIX = "nba_"
+DEFAULT_SUMMARY_PATH = os.path.join("data", "metrics_summary.json")
+DEFAULT_PORT = 9108
+# Histogram buckets of the span durations, in seconds
+BUCKETS = [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0]
+
+# (name, labels) -> value, and (name, labels) -> [count, seconds, max, rows, bucket counts]
+_counters = {}
+_spans = {}
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+# ----------------- Recording -----------------
+class _Span:
+    """Times a block; set `rows` inside it to also count the rows it handled."""
+
+    __slots__ = ("key", "start", "rows")
+
+    def __init__(self, key):
+        self.key = key
+        self.rows = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        _observe(self.key, time.perf_counter() - self.start, self.rows)
+        return False
+
+
+class _NoSpan:
+    # Shared by every disabled span; assigning `rows` on it is harmless
+    rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name, **labels):
+    """Context manager timing a block as `name` (a histogram in seconds), e.g.
+    `with metrics.span("etl", function="clean_frame") as s: ...; s.rows = len(df)`."""
+    if not _enabled:
+        return _NO_SPAN
+    return _Span(_key(name, labels))
+
+
+def timed(name, **labels):
+    """Decorator timing every call of a function as a span."""
+    def decorator(func):
+        key = _key(name, labels)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _observe(key, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def record(name, seconds, rows=None, **labels):
+    """Record a duration measured elsewhere (e.g. in a worker process) as a span."""
+    if _enabled:
+        _observe(_key(name, labels), seconds, rows)
+
+
+def _observe(key, seconds, rows=None):
+    with _lock:
+        stats = _spans.get(key)
+        if stats is None:
+            stats = _spans[key] = [0, 0.0, 0.0, 0, [0] * len(BUCKETS)]
+        stats[0] += 1
+        stats[1] += seconds
+        stats[2] = max(stats[2], seconds)
+        if rows:
+            stats[3] += rows
+        index = bisect_left(BUCKETS, seconds)
+        if index < len(BUCKETS):
+            stats[4][index] += 1
+
+
+def count(name, value=1, **labels):
+    """Add `value` to the counter `name`."""
+    if not _enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+# ----------------- Control -----------------
+def enable(summary_path=None, port=None):
+    """Start recording; optionally write the JSON summary at exit and serve /metrics on `port`."""
+    global _enabled
+    _enabled = True
+    if summary_path:
+        atexit.register(write_summary, summary_path)
+    if port:
+        serve(port)
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def enabled():
+    return _enabled
+
+
+def reset():
+    global _started
+    with _lock:
+        _counters.clear()
+        _spans.clear()
+        _started = time.time()
+
+
+# ----------------- Export -----------------
+def _labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def prometheus():
+    """Every metric in the Prometheus text exposition format."""
+    with _lock:
+        counters = dict(_counters)
+        spans = {key: [s[0], s[1], s[2], s[3], list(s[4])] for key, s in _spans.items()}
+    lines = []
+    for name in sorted({name for name, _ in counters}):
+        lines.append(f"# TYPE {PREFIX}{name} counter")
+        for (n, labels), value in sorted(counters.items()):
+            if n == name:
+                lines.append(f"{PREFIX}{n}{_labels(labels)} {value}")
+    for name in sorted({name for name, _ in spans}):
+        metric = f"{PREFIX}{name}_seconds"
+        lines.append(f"# TYPE {metric} histogram")
+        rows = []
+        for (n, labels), (calls, seconds, _, row_count, buckets) in sorted(spans.items()):
+            if n != name:
+                continue
+            cumulative = 0
+            for bound, bucket in zip(BUCKETS, buckets):
+                cumulative += bucket
+                lines.append(f"{metric}_bucket{_labels(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{metric}_bucket{_labels(labels, [('le', '+Inf')])} {calls}")
+            lines.append(f"{metric}_sum{_labels(labels)} {seconds:.6f}")
+            lines.append(f"{metric}_count{_labels(labels)} {calls}")
+            if row_count:
+                rows.append(f"{PREFIX}{name}_rows_total{_labels(labels)} {row_count}")
+        if rows:
+            lines.append(f"# TYPE {PREFIX}{name}_rows_total counter")
+            lines += rows
+    return "\n".join(lines) + "\n"
+
+
+def summary():
+    """Run summary: calls, total/mean/max seconds and rows per second of every span, and the counters."""
+    with _lock:
+        counters = dict(_counters)
+        spans = {key: list(s[:4]) for key, s in _spans.items()}
+    return {
+        "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(_started)),
+        "duration": round(time.time() - _started, 3),
+        "spans": [
+            {"name": name, **dict(labels), "calls": calls, "seconds": round(seconds, 6),
+             "mean_ms": round(seconds / calls * 1000, 3), "max_ms": round(longest * 1000, 3),
+             **({"rows": rows, "rows_per_second": round(rows / seconds) if seconds else None} if rows else {})}
+            for (name, labels), (calls, seconds, longest, rows) in sorted(spans.items())
+        ],
+        "counters": [{"name": name, **dict(labels), "value": value}
+                     for (name, labels), value in sorted(counters.items())],
+    }
+
+
+def write_summary(path=DEFAULT_SUMMARY_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(summary(), f, indent=1)
+    os.replace(tmp_path, path)
+    print(f"Metrics summary written to {path}")
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] == "/metrics":
+            body, content_type = prometheus().encode(), "text/plain; version=0.0.4"
+        elif self.path.split("?")[0] == "/summary":
+            body, content_type = json.dumps(summary()).encode(), "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass  # scrapes every few seconds would flood the output
+
+
+def serve(port=DEFAULT_PORT, host="127.0.0.1"):
+    """Serve /metrics (Prometheus) and /summary (JSON) from a background thread; returns the server."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    print(f"Metrics served on http://{host}:{server.server_address[1]}/metrics")
+    return server
+
+
+if os.environ.get("NBA_METRICS") == "1":
+    enable(os.environ.get("NBA_METRICS_SUMMARY", DEFAULT_SUMMARY_PATH),
+           int(os.environ["NBA_METRICS_PORT"]) if os.environ.get("NBA_METRICS_PORT") else None)
@@ -0,0 +1,120 @@
+import heapq
+import re
+import unicodedata
+from bisect import bisect_left
+from collections import Counter
+
+# Options sent to the player dropdown for one search
+DEFAULT_LIMIT = 20
+# Share of the query's trigrams a name must contain to be a fuzzy match
+FUZZY_CUTOFF = 0.4
+
+
+# ----------------- Text Folding -----------------
+def repair(text):
+    """Undo UTF-8 text decoded as Latin-1 ("JokiÄ\x87" -> "Jokić"), like etl.repair_mojibake on one value."""
+    try:
+        return text.encode("latin-1").decode("utf-8")
+    except UnicodeError:
+        return text
+
+
+def fold(text):
+    """Search form of a name: accents and case dropped, punctuation as spaces ("Karl-Anthony Šarić" -> "karl anthony saric")."""
+    decomposed = unicodedata.normalize("NFKD", repair(text))
+    bare = "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+    return " ".join(re.sub(r"[^\w]+", " ", bare).split())
+
+
+def trigrams(text):
+    """Trigrams of every word, padded so that word starts weigh more."""
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+# ----------------- Player Index -----------------
+def player_key(record):
+    """Id of a player row: the site's player id, or the name for rows scraped before ids were kept."""
+    player_id = record.get("Player ID")
+    return player_id if isinstance(player_id, str) and player_id else record["Player Name"]
+
+
+class PlayerIndex:
+    """Search index of a season's players, built once per data version (see datastore.Snapshot).
+
+    `records` are player rows in rank order; the first row of a traded player, the one kept,
+    is the total row. Players are keyed by id (see player_key), so namesakes stay apart;
+    lookups by id (the dropdown value) are a dict access. Searches match the start of any
+    word of a name first (a binary search over the sorted word suffixes), best ranked players
+    first, then fill up with fuzzy matches on shared trigrams.
+    """
+
+    def __init__(self, records):
+        self.records = {}
+        for record in records:
+            self.records.setdefault(player_key(record), record)
+        # Position in this list is the player's rank order
+        self.ids = list(self.records)
+        names = [self.records[player]["Player Name"] for player in self.ids]
+        folded = [fold(name) for name in names]
+
+        # Dropdown labels: the name, with the team for namesakes
+        shared = {name for name, count in Counter(names).items() if count > 1}
+        self.labels = {player: f"{name} ({self.records[player].get('Team')})" if name in shared else name
+                       for player, name in zip(self.ids, names)}
+
+        # "jok" finds "Nikola Jokić" through the suffix "jokic" of "nikola jokic"
+        suffixes = sorted((" ".join(words[i:]), player)
+                          for player, words in enumerate(text.split() for text in folded)
+                          for i in range(len(words)))
+        self.suffixes = [suffix for suffix, _ in suffixes]
+        self.suffix_players = [player for _, player in suffixes]
+
+        self.grams = {}
+        self.gram_counts = []
+        for player, text in enumerate(folded):
+            grams = trigrams(text)
+            self.gram_counts.append(len(grams))
+            for gram in grams:
+                self.grams.setdefault(gram, []).append(player)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def get(self, player_id):
+        """Record of a player by id, or None."""
+        return self.records.get(player_id)
+
+    def label(self, player_id):
+        """Name to show for a player id (the id itself if unknown)."""
+        return self.labels.get(player_id, player_id)
+
+    def top(self, limit=DEFAULT_LIMIT):
+        """Ids of the best ranked players."""
+        return self.ids[:limit]
+
+    def search(self, text, limit=DEFAULT_LIMIT):
+        """Ids of at most `limit` players whose name matches `text`: prefix matches, then fuzzy ones."""
+        query = fold(text or "")
+        if not query:
+            return self.top(limit)
+        start = bisect_left(self.suffixes, query)
+        end = bisect_left(self.suffixes, query + "\uffff")
+        matches = heapq.nsmallest(limit, set(self.suffix_players[start:end]))
+        if len(matches) < limit:
+            matches += self._fuzzy(query, limit - len(matches), set(matches))
+        return [self.ids[player] for player in matches]
+
+    def _fuzzy(self, query, limit, exclude):
+        grams = trigrams(query)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.grams.get(gram, ()))
+        # Share of the query found in the name, then similarity of the whole name
+        scored = [((count / len(grams), count / (len(grams) + self.gram_counts[player] - count)), -player)
+                  for player, count in shared.items()
+                  if player not in exclude and count / len(grams) >= FUZZY_CUTOFF]
+        return [-player for _, player in heapq.nlargest(limit, scored)]
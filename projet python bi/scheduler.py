@@ -0,0 +1,287 @@
+import argparse
+import os
+import sys
+import time
+import traceback
+from datetime import datetime, timedelta
+from graphlib import TopologicalSorter
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+import storage
+
+LOCK_PATH = os.path.join(storage.DATA_DIR, "scheduler.lock")
+
+# Games are played in the evening, US Eastern time; box scores are posted shortly after.
+# The window wraps past midnight: from 18:00 to 02:00.
+GAME_TIMEZONE = "America/New_York"
+GAME_HOURS = (18, 2)
+GAME_INTERVAL = 5 * 60
+IDLE_INTERVAL = 60 * 60
+
+
+# ----------------- Run Lock -----------------
+class RunLock:
+    """Exclusive lock on a file, so that two pipeline runs never overlap.
+
+    The lock is held by the open file: the OS drops it when the process dies, so a crash
+    never leaves a stale lock behind.
+    """
+
+    def __init__(self, path=LOCK_PATH):
+        self.path = path
+        self.file = None
+
+    def acquire(self):
+        """Take the lock without waiting; returns False if another run holds it."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.file = open(self.path, "a+")
+        try:
+            if fcntl is not None:
+                fcntl.flock(self.file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                self.file.seek(0)
+                msvcrt.locking(self.file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            self.file.close()
+            self.file = None
+            return False
+        # The pid of the holder, for whoever finds the lock taken
+        self.file.seek(0)
+        self.file.truncate()
+        self.file.write(str(os.getpid()))
+        self.file.flush()
+        return True
+
+    def release(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def holder(self):
+        try:
+            with open(self.path) as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+
+# ----------------- Cadence -----------------
+def game_timezone(name=GAME_TIMEZONE):
+    """The timezone of the game hours, or None (local time) when the tz database is missing."""
+    try:
+        return ZoneInfo(name)
+    except ZoneInfoNotFoundError:
+        print(f"Timezone {name} not found (pip install tzdata), game hours are in local time")
+        return None
+
+
+def in_game_hours(now, game_hours=GAME_HOURS):
+    start, end = game_hours
+    if start <= end:
+        return start <= now.hour < end
+    return now.hour >= start or now.hour < end
+
+
+def finished_day(now, game_hours=GAME_HOURS):
+    """The last date whose game window is over, so all its games are final."""
+    start, end = game_hours
+    # The window of a date ends on the next day when it wraps past midnight
+    closes_after = timedelta(hours=end if start <= end else end + 24)
+    return (now - closes_after).date()
+
+
+def poll_interval(now, game_hours=GAME_HOURS, game_interval=GAME_INTERVAL, idle_interval=IDLE_INTERVAL):
+    """Seconds until the next poll: frequent during game hours, rare otherwise, but never
+    sleeping past the start of the next game window."""
+    if in_game_hours(now, game_hours):
+        return game_interval
+    window = now.replace(hour=game_hours[0], minute=0, second=0, microsecond=0)
+    until_window = (window - now).total_seconds()
+    return max(1, min(idle_interval, until_window)) if until_window > 0 else idle_interval
+
+
+# ----------------- Input Fingerprints -----------------
+# A stage runs again only when the fingerprint of its inputs changed since its last successful run
+def _file_stats(names):
+    return tuple(sorted(
+        (path, os.stat(path).st_size, os.stat(path).st_mtime_ns)
+        for name in names for files in storage.dataset_files(name).values() for path in files
+    ))
+
+
+def raw_inputs():
+    """SHA-256 of the raw datasets: a scrape rewriting identical data does not count as a change."""
+    import etl
+    state = etl.load_state()
+    return tuple(sorted(
+        (name, key, path, fingerprint["sha256"])
+        for name in etl.DATASETS
+        for key, files in etl.fingerprint_inputs(name, state.get(name, {}).get("inputs")).items()
+        for path, fingerprint in files.items()
+    ))
+
+
+def clean_inputs():
+    """Size and mtime of the clean datasets, only rewritten by the ETL when something changed."""
+    import etl
+    return _file_stats([f"{name}_clean" for name in etl.DATASETS])
+
+
+# ----------------- Stages -----------------
+# Stages import their modules lazily, like main.py, and share a context dict across ticks
+def run_scrape(ctx):
+    import scraper
+    from fetcher import Fetcher
+    from http_cache import ResponseCache
+
+    # Front page games may still be in progress: their half-time totals would be stored for
+    # good, and their box scores cached as final. The last finished day only has final games.
+    day = finished_day(ctx["now"], ctx["game_hours"])
+    cache = ResponseCache()
+    fetcher = Fetcher(cache=cache)
+    try:
+        scraper.scrape(fetcher, ctx.get("base_url") or scraper.BASE_URL, day=day)
+    finally:
+        fetcher.close()
+        cache.close()
+
+
+def run_etl(ctx):
+    import etl
+    clean = etl.run(aggregates=False)
+    # Rows the aggregates did not take in yet (a failed refresh): refresh everything instead
+    ctx["clean"] = None if "clean" in ctx else clean
+
+
+def run_aggregates(ctx):
+    import etl
+    from warehouse import Warehouse
+
+    warehouse = Warehouse()
+    try:
+        etl.materialize(warehouse, ctx.get("clean"))
+    finally:
+        warehouse.close()
+    ctx.pop("clean", None)
+
+
+# name -> run(ctx), the stages it runs after, and the fingerprint of its inputs
+# (None: the stage polls a source and runs on every tick)
+STAGES = {
+    "scrape": {"run": run_scrape, "after": [], "inputs": None},
+    "etl": {"run": run_etl, "after": ["scrape"], "inputs": raw_inputs},
+    "aggregates": {"run": run_aggregates, "after": ["etl"], "inputs": clean_inputs},
+}
+
+
+# ----------------- Scheduler -----------------
+class Scheduler:
+    """Run a graph of stages on a polling cadence, each stage only when its inputs changed.
+
+    `clock` (epoch seconds) and `sleep` are injectable: a fake clock whose sleep moves
+    time forward runs a whole night of polls instantly, e.g. with stub stages.
+    """
+
+    def __init__(self, stages=None, clock=time.time, sleep=time.sleep, timezone=None,
+                 game_hours=GAME_HOURS, game_interval=GAME_INTERVAL, idle_interval=IDLE_INTERVAL,
+                 lock=None, ctx=None):
+        self.stages = STAGES if stages is None else stages
+        self.order = list(TopologicalSorter({name: stage["after"] for name, stage in self.stages.items()})
+                          .static_order())
+        self.clock = clock
+        self.sleep = sleep
+        self.timezone = timezone
+        self.game_hours = game_hours
+        self.game_interval = game_interval
+        self.idle_interval = idle_interval
+        self.lock = lock
+        self.ctx = {} if ctx is None else ctx
+        self.ctx.setdefault("game_hours", game_hours)
+        self.fingerprints = {}
+        self.history = []
+
+    def now(self):
+        return datetime.fromtimestamp(self.clock(), self.timezone)
+
+    def tick(self):
+        """Run the stages whose inputs changed, in dependency order; returns {stage: status}.
+
+        A failed stage keeps its old fingerprint, so it is retried on the next tick; the
+        stages after it wait for that.
+        """
+        statuses = {}
+        # Stages date their work by the scheduler clock
+        self.ctx["now"] = self.now()
+        for name in self.order:
+            stage = self.stages[name]
+            if any(statuses[up] in ("failed", "blocked") for up in stage["after"]):
+                statuses[name] = "blocked"
+                continue
+            # Fingerprint before running: inputs changing during the run trigger the next tick
+            fingerprint = stage["inputs"]() if stage["inputs"] else None
+            if fingerprint is not None and self.fingerprints.get(name) == fingerprint:
+                statuses[name] = "unchanged"
+                continue
+            start = self.clock()
+            try:
+                stage["run"](self.ctx)
+            except Exception:
+                traceback.print_exc()
+                statuses[name] = "failed"
+                continue
+            self.fingerprints[name] = fingerprint
+            statuses[name] = "ok"
+            print(f"{name} ran in {self.clock() - start:.2f}s")
+        return statuses
+
+    def run(self, max_ticks=None):
+        """Poll until interrupted (or for `max_ticks` ticks); returns False if another run holds the lock."""
+        if self.lock is not None and not self.lock.acquire():
+            print(f"Another pipeline run holds {self.lock.path} (pid {self.lock.holder()}), exiting")
+            return False
+        try:
+            ticks = 0
+            while max_ticks is None or ticks < max_ticks:
+                now = self.now()
+                statuses = self.tick()
+                self.history.append((now, statuses))
+                ticks += 1
+                interval = poll_interval(self.now(), self.game_hours, self.game_interval, self.idle_interval)
+                print(f"[{now:%Y-%m-%d %H:%M}] " + ", ".join(f"{n}: {s}" for n, s in statuses.items())
+                      + f" - next poll in {interval / 60:.0f} min")
+                if max_ticks is None or ticks < max_ticks:
+                    self.sleep(interval)
+        except KeyboardInterrupt:
+            print("Scheduler stopped")
+        finally:
+            if self.lock is not None:
+                self.lock.release()
+        return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Keep the NBA data fresh: scrape, clean and aggregate on a cadence.")
+    parser.add_argument("--game-hours", type=int, nargs=2, default=GAME_HOURS, metavar=("START", "END"),
+                        help="Game window, in hours of --timezone (may wrap past midnight)")
+    parser.add_argument("--timezone", default=GAME_TIMEZONE)
+    parser.add_argument("--game-interval", type=float, default=GAME_INTERVAL / 60,
+                        help="Minutes between polls during game hours")
+    parser.add_argument("--idle-interval", type=float, default=IDLE_INTERVAL / 60,
+                        help="Minutes between polls outside game hours")
+    parser.add_argument("--once", action="store_true", help="Run a single tick and exit")
+    parser.add_argument("--base-url", help="Site to scrape (e.g. a local stub server)")
+    args = parser.parse_args(argv)
+
+    scheduler = Scheduler(timezone=game_timezone(args.timezone), game_hours=tuple(args.game_hours),
+                          game_interval=args.game_interval * 60, idle_interval=args.idle_interval * 60,
+                          lock=RunLock(), ctx={"base_url": args.base_url})
+    return 0 if scheduler.run(max_ticks=1 if args.once else None) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
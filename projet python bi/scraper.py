@@ -1,154 +1,296 @@
-import requests
+import argparse
+
 from bs4 import BeautifulSoup
 import pandas as pd
 from datetime import datetime
 
-from datetime import timedelta
+from fetcher import Fetcher, own_fetcher, DEFAULT_MAX_WORKERS, DEFAULT_REQUESTS_PER_SECOND
+from http_cache import ResponseCache, DEFAULT_CACHE_PATH
+from html_tables import table_rows, rows_frame
+import storage
+import transport
+from storage import TEAM_TOTALS_STATS, PLAYER_LINE_STATS
+
+BASE_URL = "https://www.basketball-reference.com"
+
+# basketball-reference abbreviations, used to rebuild game ids for rows stored without one
+TEAM_ABBRS = {
+    "Atlanta Hawks": "ATL", "Boston Celtics": "BOS", "Brooklyn Nets": "BRK",
+    "Charlotte Hornets": "CHO", "Chicago Bulls": "CHI", "Cleveland Cavaliers": "CLE",
+    "Dallas Mavericks": "DAL", "Denver Nuggets": "DEN", "Detroit Pistons": "DET",
+    "Golden State Warriors": "GSW", "Houston Rockets": "HOU", "Indiana Pacers": "IND",
+    "Los Angeles Clippers": "LAC", "Los Angeles Lakers": "LAL", "Memphis Grizzlies": "MEM",
+    "Miami Heat": "MIA", "Milwaukee Bucks": "MIL", "Minnesota Timberwolves": "MIN",
+    "New Orleans Pelicans": "NOP", "New York Knicks": "NYK", "Oklahoma City Thunder": "OKC",
+    "Orlando Magic": "ORL", "Philadelphia 76ers": "PHI", "Phoenix Suns": "PHO",
+    "Portland Trail Blazers": "POR", "Sacramento Kings": "SAC", "San Antonio Spurs": "SAS",
+    "Toronto Raptors": "TOR", "Utah Jazz": "UTA", "Washington Wizards": "WAS",
+}
 
 # ----------------- Function to Get Team Totals from Boxscore URL -----------------
-def get_team_totals(boxscore_url, away_team_abbr, home_team_abbr):
-    response = requests.get(boxscore_url)
-    if response.status_code == 200:
-        soup = BeautifulSoup(response.text, "html.parser")
-        team_totals = {}
-
-        # Scrape Away Team "Team Totals"
-        away_team_table = soup.find("table", {"id": f"box-{away_team_abbr}-game-basic"})
-        if away_team_table:
-            rows = away_team_table.find_all("tr")
-            for row in rows:
-                if row.find("th") and row.find("th").text.strip() == "Team Totals":
-                    cols = row.find_all("td")
-                    if len(cols) > 0:
-                        team_totals.update({
-                            "Away FG": cols[1].text.strip(),
-                            "Away FGA": cols[2].text.strip(),
-                            "Away FG%": cols[3].text.strip(),
-                            "Away 3P": cols[4].text.strip(),
-                            "Away 3PA": cols[5].text.strip(),
-                            "Away 3P%": cols[6].text.strip(),
-                            "Away FT": cols[7].text.strip(),
-                            "Away FTA": cols[8].text.strip(),
-                            "Away FT%": cols[9].text.strip(),
-                            "Away ORB": cols[10].text.strip(),
-                            "Away DRB": cols[11].text.strip(),
-                            "Away TRB": cols[12].text.strip(),
-                            "Away AST": cols[13].text.strip(),
-                            "Away STL": cols[14].text.strip(),
-                            "Away BLK": cols[15].text.strip(),
-                            "Away TOV": cols[16].text.strip(),
-                            "Away PF": cols[17].text.strip(),
-                            "Away PTS": cols[18].text.strip(),
-                        })
-
-        # Scrape Home Team "Team Totals"
-        home_team_table = soup.find("table", {"id": f"box-{home_team_abbr}-game-basic"})
-        if home_team_table:
-            rows = home_team_table.find_all("tr")
-            for row in rows:
-                if row.find("th") and row.find("th").text.strip() == "Team Totals":
-                    cols = row.find_all("td")
-                    if len(cols) > 0:
-                        team_totals.update({
-                            "Home FG": cols[1].text.strip(),
-                            "Home FGA": cols[2].text.strip(),
-                            "Home FG%": cols[3].text.strip(),
-                            "Home 3P": cols[4].text.strip(),
-                            "Home 3PA": cols[5].text.strip(),
-                            "Home 3P%": cols[6].text.strip(),
-                            "Home FT": cols[7].text.strip(),
-                            "Home FTA": cols[8].text.strip(),
-                            "Home FT%": cols[9].text.strip(),
-                            "Home ORB": cols[10].text.strip(),
-                            "Home DRB": cols[11].text.strip(),
-                            "Home TRB": cols[12].text.strip(),
-                            "Home AST": cols[13].text.strip(),
-                            "Home STL": cols[14].text.strip(),
-                            "Home BLK": cols[15].text.strip(),
-                            "Home TOV": cols[16].text.strip(),
-                            "Home PF": cols[17].text.strip(),
-                            "Home PTS": cols[18].text.strip(),
-                        })
-
-        return team_totals
+def parse_boxscore(html, away_team_abbr, home_team_abbr):
+    """Parse both basic box score tables once; returns (team totals, player lines)."""
+    team_totals = {}
+    player_lines = []
+
+    for side, team_abbr in [("Away", away_team_abbr), ("Home", home_team_abbr)]:
+        rows = table_rows(html, f"box-{team_abbr}-game-basic")
+        if not rows:
+            continue
+        starter = True
+        for row in rows:
+            if row.is_header:
+                # The "Reserves" sub-header separates starters from the bench
+                if row.section != "thead":
+                    starter = False
+                continue
+            cols = row.cells
+            if row.th == "Team Totals":
+                # Scrape the "Team Totals" row
+                if len(cols) > 0:
+                    team_totals.update({
+                        f"{side} {stat}": cols[i + 1]
+                        for i, stat in enumerate(TEAM_TOTALS_STATS)
+                    })
+            elif row.th and row.links:
+                player_lines.append(parse_player_line(row, side, team_abbr, starter))
+
+    return team_totals, player_lines
+
+
+def parse_player_line(row, side, team_abbr, starter):
+    """One player row of a basic box score table; DNP rows keep their reason in Status."""
+    href = row.links[0][1]
+    line = {
+        "Team": team_abbr,
+        "Side": side,
+        "Player": row.th,
+        "Player ID": player_id(href),
+        "Starter": int(starter),
+    }
+    cols = row.cells
+    if len(cols) > 1:
+        line["MP"] = cols[0]
+        line.update({stat: cols[i + 1] for i, stat in enumerate(PLAYER_LINE_STATS) if i + 1 < len(cols)})
     else:
-        print(f"Failed to fetch boxscore data. Status: {response.status_code}")
-    return None
-
-
-def get_daily_scores():
-    url = "https://www.basketball-reference.com/"
-    boxscores_url = "https://www.basketball-reference.com/boxscores/"
-    response = requests.get(url)
-    response2 = requests.get(boxscores_url)
-    daily_scores = [] 
-
-    if response.status_code == 200:
-        soup = BeautifulSoup(response.text, "html.parser")
-        scores_section = soup.find("div", {"id": "scores"})
-        soup2 = BeautifulSoup(response2.text, "html.parser")
-
-        if scores_section:
-            print("----- Daily Scores -----")
-            games = scores_section.find_all("div", class_="game_summary")
-
-            # Extract the game date (handle the new format)
-            date_header = soup2.find("h1")
-            if date_header:
-                raw_date = date_header.text.strip()  # "NBA Games Played on December 16, 2024"
-                game_date = raw_date.replace("NBA Games Played on ", "").strip()
-                print(f"Game Date: {game_date}")
+        line["Status"] = cols[0] if cols else ""
+    return line
+
+
+def player_id(href):
+    """basketball-reference player key of a player page link: /players/j/jokicni01.html -> jokicni01."""
+    return href.rsplit("/", 1)[-1].replace(".html", "")
+
+
+def parse_team_totals(html, away_team_abbr, home_team_abbr):
+    return parse_boxscore(html, away_team_abbr, home_team_abbr)[0]
+
+
+def get_team_totals(boxscore_url, away_team_abbr, home_team_abbr, fetcher=None):
+    with own_fetcher(fetcher) as fetcher:
+        response = fetcher.get(boxscore_url)
+        if response.status_code == 200:
+            return parse_team_totals(response.text, away_team_abbr, home_team_abbr)
+        else:
+            print(f"Failed to fetch boxscore data. Status: {response.status_code}")
+        return None
+
+
+def game_id(formatted_date, home_team_abbr):
+    """basketball-reference boxscore key, e.g. 202412160CHO."""
+    return f"{formatted_date}0{home_team_abbr}"
+
+
+def parse_game_summaries(container, formatted_date, base_url=BASE_URL):
+    """Build the game list (teams, scores, boxscore URL) from the `game_summary` blocks of a page."""
+    game_list = []
+    for game in container.find_all("div", class_="game_summary"):
+        # Teams are displayed in two rows: first for Away, second for Home
+        teams = game.find_all("tr")
+
+        if len(teams) >= 2:  # Ensure both rows exist
+            away_team_row = teams[0]  # First team is Away
+            home_team_row = teams[1]  # Second team is Home
+
+            # Extract team abbreviations using the get_team_abbr function
+            away_team_abbr = get_team_abbr(away_team_row)
+            home_team_abbr = get_team_abbr(home_team_row)
+
+            game_list.append({
+                "game_id": game_id(formatted_date, home_team_abbr),
+                "Away Team": away_team_row.find("a").text.strip(),
+                "Away Score": away_team_row.find_all("td")[1].text.strip(),
+                "Home Team": home_team_row.find("a").text.strip(),
+                "Home Score": home_team_row.find_all("td")[1].text.strip(),
+                "away_abbr": away_team_abbr,
+                "home_abbr": home_team_abbr,
+                # Construct the boxscore URL using the home team's abbreviation
+                "boxscore_url": f"{base_url}/boxscores/{game_id(formatted_date, home_team_abbr)}.html",
+            })
+    return game_list
+
+
+def fetch_game_totals(fetcher, game_list, game_date, player_sink=None):
+    """Fetch the boxscores of a game list; returns (rows in game order, number of failed fetches).
+
+    The player lines of each boxscore go to `player_sink` (e.g. a storage.BatchWriter) when given.
+    """
+    daily_scores = []
+    failed = 0
+
+    # Fan the boxscores out to the fetcher; responses keep the game order
+    responses = fetcher.fetch_all([g["boxscore_url"] for g in game_list])
+
+    for g, boxscore_response in zip(game_list, responses):
+        away_team_name, away_team_score = g["Away Team"], g["Away Score"]
+        home_team_name, home_team_score = g["Home Team"], g["Home Score"]
+
+        # Scrape the box score stats for "Team Totals"
+        boxscore_stats = None
+        if boxscore_response is not None and boxscore_response.status_code == 200:
+            boxscore_stats, player_lines = parse_boxscore(boxscore_response.text, g["away_abbr"], g["home_abbr"])
+            if player_sink is not None and player_lines:
+                for line in player_lines:
+                    line["Game ID"] = g["game_id"]
+                    line["Date"] = game_date
+                player_sink.add(player_lines)
+        else:
+            failed += 1
+            if boxscore_response is not None:
+                print(f"Failed to fetch boxscore data. Status: {boxscore_response.status_code}")
+
+        if boxscore_stats:
+            daily_scores.append({
+                "Game ID": g["game_id"],
+                "Date": game_date,
+                "Away Team": away_team_name,
+                "Away Score": away_team_score,
+                "Home Team": home_team_name,
+                "Home Score": home_team_score,
+                **boxscore_stats
+            })
+            print(f"{away_team_name}: {away_team_score} - {home_team_name}: {home_team_score}")
+        else:
+            print(f"No team totals found for the game between {away_team_name} and {home_team_name}")
+    return daily_scores, failed
+
+
+def parse_game_date(index_html):
+    """Date of the games on the boxscore index page, as "December 16, 2024", or None if missing."""
+    date_header = BeautifulSoup(index_html, "html.parser").find("h1")
+    if date_header is None:
+        return None
+    # "NBA Games Played on December 16, 2024"
+    return date_header.text.strip().replace("NBA Games Played on ", "").strip()
+
+
+def boxscore_index_url(day, base_url=BASE_URL):
+    return f"{base_url}/boxscores/?month={day.month}&day={day.day}&year={day.year}"
+
+
+def skip_known_games(game_list, known_game_ids):
+    """Games of the list not already in the store: no boxscore request for the others."""
+    if not known_game_ids:
+        return game_list
+    new_games = [g for g in game_list if g["game_id"] not in known_game_ids]
+    if len(new_games) < len(game_list):
+        print(f"Skipping {len(game_list) - len(new_games)} games already stored")
+    return new_games
+
+
+def get_day_scores(day, fetcher=None, base_url=BASE_URL, known_game_ids=None, player_sink=None):
+    """Games of a past date from its boxscore index page.
+
+    The front page may show games still in progress; every game of a finished day is final.
+    """
+    with own_fetcher(fetcher) as fetcher:
+        response = fetcher.get(boxscore_index_url(day, base_url))
+        if response.status_code != 200:
+            print(f"Failed to fetch boxscore index for {day}. Status: {response.status_code}")
+            return []
+        game_date = day.strftime("%B %d, %Y")
+        print(f"----- Scores of {game_date} -----")
+        game_list = parse_game_summaries(BeautifulSoup(response.text, "html.parser"), f"{day:%Y%m%d}", base_url)
+        game_list = skip_known_games(game_list, known_game_ids)
+        daily_scores, _ = fetch_game_totals(fetcher, game_list, game_date, player_sink)
+        return daily_scores
+
+
+def get_daily_scores(fetcher=None, base_url=BASE_URL, known_game_ids=None, player_sink=None):
+    with own_fetcher(fetcher) as fetcher:
+        url = f"{base_url}/"
+        boxscores_url = f"{base_url}/boxscores/"
+        response, response2 = fetcher.fetch_all([url, boxscores_url])
+        daily_scores = []
+
+        if response is not None and response.status_code == 200:
+            soup = BeautifulSoup(response.text, "html.parser")
+            scores_section = soup.find("div", {"id": "scores"})
+
+            if scores_section:
+                print("----- Daily Scores -----")
+
+                # Extract the game date (handle the new format)
+                game_date = parse_game_date(response2.text if response2 is not None else "")
+                if game_date:
+                    print(f"Game Date: {game_date}")
+                else:
+                    print("Could not find game date. Using today's date as fallback.")
+                    game_date = datetime.now().strftime("%B %d, %Y")  # Fallback format
+
+                # Format the extracted date to YYYYMMDD
+                formatted_date = datetime.strptime(game_date, "%B %d, %Y").strftime("%Y%m%d")
+
+                game_list = parse_game_summaries(scores_section, formatted_date, base_url)
+                game_list = skip_known_games(game_list, known_game_ids)
+                daily_scores, _ = fetch_game_totals(fetcher, game_list, game_date, player_sink)
             else:
-                print("Could not find game date. Using today's date as fallback.")
-                game_date = datetime.now().strftime("%B %d, %Y")  # Fallback format
-
-            # Format the extracted date to YYYYMMDD
-            formatted_date = datetime.strptime(game_date, "%B %d, %Y").strftime("%Y%m%d")
-
-            for game in games:
-                # Teams are displayed in two rows: first for Away, second for Home
-                teams = game.find_all("tr")
-
-                if len(teams) >= 2:  # Ensure both rows exist
-                    away_team_row = teams[0]  # First team is Away
-                    home_team_row = teams[1]  # Second team is Home
-
-                    # Extract names and scores
-                    away_team_name = away_team_row.find("a").text.strip()
-                    away_team_score = away_team_row.find_all("td")[1].text.strip()
-                    home_team_name = home_team_row.find("a").text.strip()
-                    home_team_score = home_team_row.find_all("td")[1].text.strip()
-
-                    # Extract team abbreviations using the get_team_abbr function
-                    away_team_abbr = get_team_abbr(away_team_row)
-                    home_team_abbr = get_team_abbr(home_team_row)
-
-                    # Construct the boxscore URL using the home team's abbreviation
-                    boxscore_url = f"https://www.basketball-reference.com/boxscores/{formatted_date}0{home_team_abbr}.html"
-
-                    away_team_table_url = f"{boxscore_url}#box-{away_team_abbr}-game-basic"
-
-                    home_team_table_url = f"{boxscore_url}#box-{home_team_abbr}-game-basic"
-                    # Scrape the box score stats for "Team Totals"
-                    boxscore_stats = get_team_totals(boxscore_url, away_team_abbr, home_team_abbr)
-
-                    if boxscore_stats:
-                        daily_scores.append({
-                            "Date": game_date,
-                            "Away Team": away_team_name,
-                            "Away Score": away_team_score,
-                            "Home Team": home_team_name,
-                            "Home Score": home_team_score,
-                            **boxscore_stats
-                        })
-                        print(f"{away_team_name}: {away_team_score} - {home_team_name}: {home_team_score}")
-                    else:
-                        print(f"No team totals found for the game between {away_team_name} and {home_team_name}")
+                print("No scores available today.")
         else:
-            print("No scores available today.")
+            status = response.status_code if response is not None else "no response"
+            print(f"Failed to fetch scores. Status: {status}")
+        return daily_scores
+
+# ----------------- Game Store -----------------
+def legacy_game_ids(df):
+    """Rebuild game ids for rows stored before the Game ID column existed (null for invalid dates or teams)."""
+    dates = pd.to_datetime(df["Date"], format="%B %d, %Y", errors="coerce").dt.strftime("%Y%m%d")
+    return dates + "0" + df["Home Team"].map(TEAM_ABBRS)
+
+
+def load_game_store():
+    """Every stored game as a DataFrame, with game ids rebuilt for a store that predates them."""
+    stored = storage.read("daily_scores")
+    if "Game ID" not in stored.columns:
+        stored.insert(0, "Game ID", legacy_game_ids(stored))
+    return stored
+
+
+def _store_needs_rewrite():
+    # Nothing stored in the current format yet, or a CSV store without the Game ID column
+    if not storage.exists("daily_scores"):
+        return True
+    if storage.STORAGE_FORMAT == "csv":
+        return "Game ID" not in pd.read_csv(storage.csv_path("daily_scores"), nrows=0).columns
+    return False
+
+
+def append_games(rows):
+    """Append new games to the store, skipping ids already stored.
+
+    The first write in a format carries over (and migrates) the legacy CSV store.
+    """
+    if not rows:
+        return
+    new_games = pd.DataFrame(rows)
+    if _store_needs_rewrite():
+        stored = load_game_store()
+        new_games = new_games[~new_games["Game ID"].isin(stored["Game ID"])]
+        storage.write("daily_scores", pd.concat([stored, new_games], ignore_index=True))
     else:
-        print(f"Failed to fetch scores. Status: {response.status_code}")
-    return daily_scores
+        stored_ids = storage.read("daily_scores", columns=["Game ID"])["Game ID"]
+        storage.append("daily_scores", new_games[~new_games["Game ID"].isin(stored_ids)])
+
 
 def get_team_abbr(team_row):
     team_link = team_row.find("a")
@@ -168,113 +310,153 @@ def get_team_abbr(team_row):
 
 
 # ----------------- Function to Get League Standings -----------------
-def get_league_standings():
-    url = "https://www.basketball-reference.com/leagues/NBA_2025_standings.html"
-    response = requests.get(url)
+def parse_league_standings(html):
     standings = []
-
-    if response.status_code == 200:
-        soup = BeautifulSoup(response.text, "html.parser")
-        print("\n----- League Standings -----")
-
-        for conference_id, conference_name in [
-            ("confs_standings_E", "Eastern Conference"),
-            ("confs_standings_W", "Western Conference")
-        ]:
-            print(f"\n{conference_name}:")
-            table = soup.find("table", {"id": conference_id})
-            if table:
-                rows = table.find("tbody").find_all("tr")
-                for row in rows:
-                    if "class" in row.attrs and "thead" in row.attrs["class"]:
-                        continue  # Skip headers
-                    team = row.find("a")
-                    if team:
-                        team_name = team.text.strip()
-                        cells = row.find_all("td")
-                        wins = cells[0].text.strip()
-                        losses = cells[1].text.strip()
-                        print(f"{team_name}: {wins} Wins, {losses} Losses")
-                        standings.append({
-                            "Conference": conference_name,
-                            "Team": team_name,
-                            "Wins": wins,
-                            "Losses": losses
-                        })
-    else:
-        print(f"Failed to fetch standings. Status: {response.status_code}")
+    for conference_id, conference_name in [
+        ("confs_standings_E", "Eastern Conference"),
+        ("confs_standings_W", "Western Conference")
+    ]:
+        rows = table_rows(html, conference_id)
+        if rows:
+            for row in rows:
+                if row.section != "tbody" or row.is_header:
+                    continue  # Skip headers
+                if row.links:
+                    standings.append({
+                        "Conference": conference_name,
+                        "Team": row.links[0][0],
+                        "Wins": row.cells[0],
+                        "Losses": row.cells[1]
+                    })
     return standings
 
+def get_league_standings(fetcher=None, base_url=BASE_URL):
+    with own_fetcher(fetcher) as fetcher:
+        url = f"{base_url}/leagues/NBA_2025_standings.html"
+        response = fetcher.get(url)
+        standings = []
+
+        if response.status_code == 200:
+            print("\n----- League Standings -----")
+            standings = parse_league_standings(response.text)
+
+            conference_name = None
+            for team in standings:
+                if team["Conference"] != conference_name:
+                    conference_name = team["Conference"]
+                    print(f"\n{conference_name}:")
+                print(f"{team['Team']}: {team['Wins']} Wins, {team['Losses']} Losses")
+        else:
+            print(f"Failed to fetch standings. Status: {response.status_code}")
+        return standings
+
 # ----------------- Function to Get Player Stats -----------------
-def get_player_stats():
-    url = "https://www.basketball-reference.com/leagues/NBA_2025_per_game.html"
-    response = requests.get(url)
-    player_stats = []
-
-    if response.status_code == 200:
-        soup = BeautifulSoup(response.text, "html.parser")
-        print("\n----- Player Stats -----")
-        
-        # Find the player stats table
-        table = soup.find("table")
-        
-        # Read the table into a DataFrame
-        df = pd.read_html(str(table), header=0)[0]
-        
-        # Clean up any extra header rows (repeated every 25 rows)
-        #df_cleaned = df[~df['Rk'].str.contains('Rk', na=False)]
-        
-        # Loop through the cleaned DataFrame and create a list of dictionaries
-        for index, row in df.iterrows():
-            player_stats.append({
-                "Rk": row['Rk'],
-                "Player": row['Player'],
-                "Team": row['Team'],
-                "G": row['G'],
-                "MP": row['MP'],
-                "FG": row['FG'],
-                "FGA": row['FGA'],
-                "FG%": row['FG%'],
-                "3P": row['3P'],
-                "3PA": row['3PA'],
-                "3P%": row['3P%'],
-                "2P": row['2P'],
-                "2PA": row['2PA'],
-                "2P%": row['2P%'],
-                "FT": row['FT'],
-                "FTA": row['FTA'],
-                "FT%": row['FT%'],
-                "ORB": row['ORB'],
-                "DRB": row['DRB'],
-                "TRB": row['TRB'],
-                "AST": row['AST'],
-                "STL": row['STL'],
-                "BLK": row['BLK'],
-                "TOV": row['TOV'],
-                "PF": row['PF'],
-                "PTS": row['PTS']
-            })
-    else:
-        print(f"Failed to fetch player stats. Status: {response.status_code}")
-    
-    return player_stats
+# Columns kept from the per-game table, in output order
+PLAYER_STATS_COLUMNS = [
+    "Rk", "Player", "Player ID", "Team", "G", "MP", "FG", "FGA", "FG%", "3P", "3PA", "3P%",
+    "2P", "2PA", "2P%", "FT", "FTA", "FT%", "ORB", "DRB", "TRB", "AST", "STL",
+    "BLK", "TOV", "PF", "PTS",
+]
+PLAYER_STATS_TEXT_COLUMNS = ["Player", "Player ID", "Team"]
+
+
+def parse_player_stats(html):
+    rows = table_rows(html, "per_game_stats") or table_rows(html)
+    if not rows:
+        return None
+    df = rows_frame(rows)
+    # Namesakes are told apart by their player page; the league average row has none
+    df["Player ID"] = [next((player_id(href) for _, href in row.links if "/players/" in href), None)
+                       for row in rows if not row.is_header]
+    return df
+
+
+def select_player_stats(df):
+    """Keep the player stats columns as one typed frame: text columns as str, the rest float64."""
+    df = df.reindex(columns=PLAYER_STATS_COLUMNS)
+    numeric_columns = [c for c in PLAYER_STATS_COLUMNS if c not in PLAYER_STATS_TEXT_COLUMNS]
+    df[numeric_columns] = df[numeric_columns].apply(pd.to_numeric, errors="coerce").astype("float64")
+    return df
+
+
+def get_player_stats(fetcher=None, base_url=BASE_URL):
+    with own_fetcher(fetcher) as fetcher:
+        url = f"{base_url}/leagues/NBA_2025_per_game.html"
+        response = fetcher.get(url)
+        player_stats = pd.DataFrame(columns=PLAYER_STATS_COLUMNS)
+
+        if response.status_code == 200:
+            print("\n----- Player Stats -----")
+
+            # Read only the per-game table into a DataFrame (repeated header rows are dropped)
+            player_stats = select_player_stats(parse_player_stats(response.text))
+            print(f"{len(player_stats)} players")
+        else:
+            print(f"Failed to fetch player stats. Status: {response.status_code}")
+
+        return player_stats
 
 # ----------------- Main Script -----------------
-def main():
-    # Get Daily Scores
-    daily_scores = get_daily_scores()
+def scrape(fetcher, base_url=BASE_URL, persist=True, day=None):
+    """Scrape new games, standings and player stats; returns the raw frames by dataset name.
+
+    The games are those of the front page, or of `day` (a past date) when given.
+    daily_scores is the whole store (stored games plus the new ones).
+    """
+    stored = load_game_store()
+
+    # Get Daily Scores, only for games not already in the store; player lines are streamed to their store
+    player_sink = storage.BatchWriter("player_boxscores") if persist else None
+    known_game_ids = set(stored["Game ID"].dropna())
+    if day is None:
+        daily_scores = get_daily_scores(fetcher, base_url, known_game_ids, player_sink)
+    else:
+        daily_scores = get_day_scores(day, fetcher, base_url, known_game_ids, player_sink)
+    if player_sink is not None:
+        player_sink.flush()
 
     # Get League Standings
-    standings = get_league_standings()
-
-    player_stats = get_player_stats()
-
-    # Save Data to CSV Files
-    pd.DataFrame(daily_scores).to_csv("daily_scores.csv", index=False)
-    pd.DataFrame(standings).to_csv("league_standings.csv", index=False)
-    pd.DataFrame(player_stats).to_csv("player_stats.csv", index=False)
-
-    print("\nData saved to 'daily_scores.csv' , 'league_standings.csv' and 'player_stats.csv'.")
+    standings = pd.DataFrame(get_league_standings(fetcher, base_url))
+
+    player_stats = get_player_stats(fetcher, base_url)
+
+    if persist:
+        # Save Data to the store
+        append_games(daily_scores)
+        storage.write("league_standings", standings)
+        storage.write("player_stats", player_stats)
+
+        print(f"\n{len(daily_scores)} new games appended to the scores store.")
+        print(f"Data saved to the {storage.STORAGE_FORMAT} store.")
+
+    if daily_scores:
+        stored = pd.concat([stored, pd.DataFrame(daily_scores)], ignore_index=True)
+    return {"daily_scores": stored, "league_standings": standings, "player_stats": player_stats}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scrape NBA scores, standings and player stats.")
+    parser.add_argument("--max-workers", type=int, default=DEFAULT_MAX_WORKERS,
+                        help="Maximum number of concurrent requests")
+    parser.add_argument("--rps", type=float, default=DEFAULT_REQUESTS_PER_SECOND,
+                        help="Maximum requests per second (0 disables the limit)")
+    parser.add_argument("--base-url", default=BASE_URL, help="Site to scrape (e.g. a local stub server)")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH, help="HTTP response cache file")
+    parser.add_argument("--no-cache", action="store_true", help="Always download full pages")
+    transport.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    # Recording needs every page from the transport, and a replay is only reproducible without the cache
+    cache = None if args.no_cache or args.record or args.replay else ResponseCache(args.cache)
+    fetcher = Fetcher(max_workers=args.max_workers, requests_per_second=args.rps, cache=cache,
+                      transport=transport.from_args(args, args.max_workers))
+    try:
+        scrape(fetcher, args.base_url)
+    finally:
+        fetcher.close()
+        if cache:
+            cache.report()
+            cache.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,461 @@
+import argparse
+import glob
+import os
+import shutil
+import time
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # CSV-only installs
+    pa = None
+
+DATA_DIR = "data"
+STORAGE_FORMAT = "parquet" if pa is not None else "csv"
+COMPRESSION = "zstd"
+
+# Partition column derived from "Date" for the scores datasets. One file per month keeps
+# partitions large enough to read fast (a file per day costs more to open than to decode).
+PARTITION_COLUMN = "game_month"
+
+TEAM_TOTALS_STATS = [
+    "FG", "FGA", "FG%", "3P", "3PA", "3P%", "FT", "FTA", "FT%",
+    "ORB", "DRB", "TRB", "AST", "STL", "BLK", "TOV", "PF", "PTS",
+]
+# Player rows of the basic box score: the team totals columns plus game score and plus/minus
+PLAYER_LINE_STATS = TEAM_TOTALS_STATS + ["GmSc", "+/-"]
+PLAYER_STATS_NUMERIC = [
+    "G", "MP", "FG", "FGA", "FG%", "3P", "3PA", "3P%", "2P", "2PA", "2P%",
+    "FT", "FTA", "FT%", "ORB", "DRB", "TRB", "AST", "STL", "BLK", "TOV", "PF", "PTS",
+]
+
+# Raw scores keep the scraped text, the clean ones are numeric
+_SCORES_TEAMS = [("Game ID", "string"), ("Date", "string"), ("Away Team", "string"),
+                 ("Home Team", "string")]
+# Team totals columns of the scores datasets, "Away FG" to "Home PTS"
+SCORES_TOTALS = [f"{side} {stat}" for side in ("Away", "Home") for stat in TEAM_TOTALS_STATS]
+
+# ----------------- Schemas -----------------
+# Column -> type, in file order, for every dataset. "partition" names the column used to split it,
+# "key" the columns identifying a row (default: Game ID). "append_only" datasets get a new file
+# per appended batch instead of a partition rewrite; compact() merges them.
+SCHEMAS = {
+    "daily_scores": {
+        "columns": dict(_SCORES_TEAMS + [("Away Score", "string"), ("Home Score", "string")]
+                        + [(c, "string") for c in SCORES_TOTALS]),
+        "partition": PARTITION_COLUMN,
+    },
+    "daily_scores_clean": {
+        "columns": dict(_SCORES_TEAMS + [("Away Score", "int64"), ("Home Score", "int64")]
+                        + [(c, "float64") for c in SCORES_TOTALS]),
+        "partition": PARTITION_COLUMN,
+    },
+    "player_boxscores": {
+        "columns": dict([("Game ID", "string"), ("Date", "string"), ("Team", "string"), ("Side", "string"),
+                         ("Player", "string"), ("Player ID", "string"), ("Starter", "int64"),
+                         ("Status", "string"), ("MP", "string")]
+                        + [(c, "float64") for c in PLAYER_LINE_STATS]),
+        "partition": PARTITION_COLUMN,
+        "key": ["Game ID", "Team", "Player ID"],
+        "append_only": True,
+    },
+    "league_standings": {
+        "columns": {"Conference": "string", "Team": "string", "Wins": "string", "Losses": "string"},
+    },
+    "league_standings_clean": {
+        "columns": {"Conference": "string", "Team": "string", "Wins": "int64", "Losses": "int64"},
+    },
+    "player_stats": {
+        "columns": dict([("Rk", "float64"), ("Player", "string"), ("Player ID", "string"), ("Team", "string")]
+                        + [(c, "float64") for c in PLAYER_STATS_NUMERIC]),
+    },
+    "player_stats_clean": {
+        "columns": dict([("Rank", "float64"), ("Player Name", "string"), ("Player ID", "string"),
+                         ("Team", "string")]
+                        + [(c, "float64") for c in PLAYER_STATS_NUMERIC]),
+    },
+}
+
+PANDAS_TYPES = {"string": "string", "int64": "Int64", "float64": "float64"}
+
+
+def arrow_schema(name):
+    types = {"string": pa.string(), "int64": pa.int64(), "float64": pa.float64()}
+    fields = [pa.field(column, types[kind]) for column, kind in SCHEMAS[name]["columns"].items()]
+    return pa.schema(fields)
+
+
+def csv_path(name):
+    """Legacy CSV file of a dataset, e.g. daily_scores_clean.csv."""
+    return f"{name}.csv"
+
+
+def parquet_path(name, data_dir=DATA_DIR):
+    schema = SCHEMAS[name]
+    return os.path.join(data_dir, name if schema.get("partition") else f"{name}.parquet")
+
+
+def conform(name, df):
+    """Reorder and cast a frame to the dataset schema; missing columns are added as nulls."""
+    columns = SCHEMAS[name]["columns"]
+    df = df.reindex(columns=list(columns))
+    for column, kind in columns.items():
+        if df[column].dtype == PANDAS_TYPES[kind]:
+            continue  # already conformed, e.g. written by a stage that conformed it
+        if kind == "string":
+            df[column] = df[column].astype("string")
+        else:
+            df[column] = pd.to_numeric(df[column], errors="coerce").astype(PANDAS_TYPES[kind])
+    return df
+
+
+def partition_values(df):
+    """Partition key (YYYY-MM) of every row, from the "December 16, 2024" dates."""
+    return pd.to_datetime(df["Date"], format="%B %d, %Y").dt.strftime("%Y-%m")
+
+
+# ----------------- Parquet -----------------
+def _write_parquet_file(table, path):
+    # Write next to the target and rename, so readers never see a half-written file. The
+    # temporary name starts with a dot: dataset scans skip it, even when a crash leaves it behind
+    directory, file = os.path.split(path)
+    tmp_path = os.path.join(directory, f".{file}.tmp")
+    pq.write_table(table, tmp_path, compression=COMPRESSION)
+    os.replace(tmp_path, path)
+
+
+def _write_parquet(name, df, data_dir, replace_partitions=True):
+    schema = arrow_schema(name)
+    path = parquet_path(name, data_dir)
+    if not SCHEMAS[name].get("partition"):
+        os.makedirs(data_dir, exist_ok=True)
+        _write_parquet_file(pa.Table.from_pandas(df, schema=schema, preserve_index=False), path)
+        return
+
+    # One directory per month (hive style: game_month=2024-12/part-0.parquet)
+    for key, part in df.groupby(partition_values(df), sort=True):
+        part_dir = os.path.join(path, f"{PARTITION_COLUMN}={key}")
+        os.makedirs(part_dir, exist_ok=True)
+        part_file = os.path.join(part_dir, "part-0.parquet")
+        if not replace_partitions and SCHEMAS[name].get("append_only"):
+            # New rows go to their own file; existing files are never rewritten
+            part_file = os.path.join(part_dir, f"part-{time.time_ns()}-{os.getpid()}.parquet")
+        elif not replace_partitions and os.path.exists(part_file):
+            existing = pq.read_table(part_file, schema=schema).to_pandas()
+            part = pd.concat([existing, part], ignore_index=True)
+            part = conform(name, part.drop_duplicates(subset=row_key(name), keep="last"))
+        _write_parquet_file(pa.Table.from_pandas(part, schema=schema, preserve_index=False), part_file)
+        if replace_partitions:
+            for other in glob.glob(os.path.join(part_dir, "part-*.parquet")):
+                if other != part_file:
+                    os.remove(other)
+
+
+def row_key(name):
+    return SCHEMAS[name].get("key", ["Game ID"])
+
+
+def _read_parquet(name, columns, data_dir, filters=None):
+    path = parquet_path(name, data_dir)
+    partitioning = "hive" if SCHEMAS[name].get("partition") else None
+    dataset = ds.dataset(path, format="parquet", partitioning=partitioning)
+    table = dataset.to_table(columns=columns, filter=filters)
+    # Columns of the schema only: the partition key is derived from "Date"
+    keep = [c for c in table.column_names if c != PARTITION_COLUMN or (columns and PARTITION_COLUMN in columns)]
+    return table.select(keep).to_pandas()
+
+
+# ----------------- Public API -----------------
+def exists(name, fmt=None, data_dir=DATA_DIR):
+    fmt = fmt or STORAGE_FORMAT
+    return os.path.exists(parquet_path(name, data_dir) if fmt == "parquet" else csv_path(name))
+
+
+def write(name, df, fmt=None, data_dir=DATA_DIR):
+    """Replace a dataset (for partitioned datasets: every partition present in `df`)."""
+    fmt = fmt or STORAGE_FORMAT
+    df = conform(name, df)
+    if fmt == "parquet":
+        _write_parquet(name, df, data_dir)
+    else:
+        path = csv_path(name)
+        df.to_csv(path + ".tmp", index=False, encoding="utf-8")
+        os.replace(path + ".tmp", path)
+
+
+def append(name, df, fmt=None, data_dir=DATA_DIR):
+    """Add rows to a dataset; partitioned datasets only rewrite the partitions the rows fall in."""
+    fmt = fmt or STORAGE_FORMAT
+    if df.empty:
+        return
+    df = conform(name, df)
+    if fmt == "parquet" and SCHEMAS[name].get("partition"):
+        _write_parquet(name, df, data_dir, replace_partitions=False)
+    elif fmt == "parquet":
+        _write_parquet(name, pd.concat([read(name, fmt=fmt, data_dir=data_dir), df], ignore_index=True), data_dir)
+    elif os.path.exists(csv_path(name)):
+        df.to_csv(csv_path(name), mode="a", header=False, index=False, encoding="utf-8")
+    else:
+        df.to_csv(csv_path(name), index=False, encoding="utf-8")
+
+
+def read(name, columns=None, fmt=None, data_dir=DATA_DIR, filters=None):
+    """Load a dataset, optionally only some columns; falls back to the legacy CSV if nothing is stored yet.
+
+    `filters` is a pyarrow expression, e.g. ds.field("game_month") >= "2024-12" (Parquet only).
+    """
+    fmt = fmt or STORAGE_FORMAT
+    if fmt == "parquet" and os.path.exists(parquet_path(name, data_dir)):
+        return _read_parquet(name, columns, data_dir, filters)
+    if not os.path.exists(csv_path(name)):
+        df = conform(name, pd.DataFrame())
+        return df[columns] if columns else df
+    if not columns:
+        return pd.read_csv(csv_path(name), encoding="utf-8")
+    # Columns missing from an older file come back as nulls
+    df = pd.read_csv(csv_path(name), usecols=lambda c: c in columns, encoding="utf-8")
+    return df.reindex(columns=columns)
+
+
+# ----------------- Streaming -----------------
+def _partitions(name, data_dir):
+    """Files of every partition of a dataset, as a sorted list of lists."""
+    path = parquet_path(name, data_dir)
+    parts = []
+    for part in sorted(os.listdir(path)):
+        files = sorted(glob.glob(os.path.join(path, part, "part-*.parquet")))
+        if files:
+            parts.append(files)
+    return parts
+
+
+def _read_partition(name, files):
+    schema = arrow_schema(name)
+    return pa.concat_tables([pq.read_table(f, schema=schema) for f in files]).to_pandas()
+
+
+def dataset_files(name, fmt=None, data_dir=DATA_DIR):
+    """Files holding a dataset by partition key ("2024-12"; "" for unpartitioned data and CSV files)."""
+    fmt = fmt or STORAGE_FORMAT
+    path = parquet_path(name, data_dir)
+    if fmt == "parquet" and os.path.isdir(path):
+        return {os.path.basename(os.path.dirname(files[0])).split("=", 1)[1]: files
+                for files in _partitions(name, data_dir)}
+    if fmt == "parquet" and os.path.exists(path):
+        return {"": [path]}
+    if os.path.exists(csv_path(name)):
+        return {"": [csv_path(name)]}
+    return {}
+
+
+def partition_dir(name, key, data_dir=DATA_DIR):
+    return os.path.join(parquet_path(name, data_dir), f"{PARTITION_COLUMN}={key}")
+
+
+def read_partition(name, key, data_dir=DATA_DIR):
+    """One partition of a partitioned Parquet dataset."""
+    return _read_partition(name, sorted(glob.glob(os.path.join(partition_dir(name, key, data_dir), "part-*.parquet"))))
+
+
+def delete_partition(name, key, data_dir=DATA_DIR):
+    shutil.rmtree(partition_dir(name, key, data_dir), ignore_errors=True)
+
+
+def iter_chunks(name, chunksize, fmt=None, data_dir=DATA_DIR):
+    """Yield a dataset as frames of at most `chunksize` rows.
+
+    Partitioned Parquet datasets are yielded one whole partition at a time instead, so a
+    writer can replace each partition in one go.
+    """
+    fmt = fmt or STORAGE_FORMAT
+    if fmt == "parquet" and os.path.exists(parquet_path(name, data_dir)):
+        if SCHEMAS[name].get("partition"):
+            for files in _partitions(name, data_dir):
+                yield _read_partition(name, files)
+        else:
+            for batch in pq.ParquetFile(parquet_path(name, data_dir)).iter_batches(batch_size=chunksize):
+                yield batch.to_pandas()
+    elif os.path.exists(csv_path(name)):
+        yield from pd.read_csv(csv_path(name), chunksize=chunksize, encoding="utf-8")
+
+
+class DatasetWriter:
+    """Replace a dataset chunk by chunk; the new version only becomes visible on close()."""
+
+    def __init__(self, name, fmt=None, data_dir=DATA_DIR):
+        self.name = name
+        self.fmt = fmt or STORAGE_FORMAT
+        self.data_dir = data_dir
+        self.partitioned = self.fmt == "parquet" and SCHEMAS[name].get("partition")
+        self.path = parquet_path(name, data_dir) if self.fmt == "parquet" else csv_path(name)
+        self.tmp_path = self.path + ".tmp"
+        self.parquet_writer = None
+        self.csv_header = True
+
+    def write(self, df):
+        df = conform(self.name, df)
+        if self.partitioned:
+            # Chunks hold whole partitions: each one is swapped in atomically on its own
+            _write_parquet(self.name, df, self.data_dir)
+        elif self.fmt == "parquet":
+            if self.parquet_writer is None:
+                os.makedirs(self.data_dir, exist_ok=True)
+                self.parquet_writer = pq.ParquetWriter(self.tmp_path, arrow_schema(self.name), compression=COMPRESSION)
+            self.parquet_writer.write_table(pa.Table.from_pandas(df, schema=arrow_schema(self.name), preserve_index=False))
+        else:
+            df.to_csv(self.tmp_path, mode="w" if self.csv_header else "a", header=self.csv_header,
+                      index=False, encoding="utf-8")
+            self.csv_header = False
+
+    def close(self):
+        if self.partitioned:
+            return
+        if self.parquet_writer is not None:
+            self.parquet_writer.close()
+        elif self.fmt == "parquet":
+            # Nothing was written: store an empty dataset
+            _write_parquet(self.name, conform(self.name, pd.DataFrame()), self.data_dir)
+            return
+        elif self.csv_header:
+            conform(self.name, pd.DataFrame()).to_csv(self.tmp_path, index=False)
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        if self.parquet_writer is not None:
+            self.parquet_writer.close()
+        if os.path.exists(self.tmp_path) and not self.partitioned:
+            os.remove(self.tmp_path)
+
+
+class BatchWriter:
+    """Collect rows (dicts) and append them to a dataset every `batch_rows` rows (None: on flush only)."""
+
+    def __init__(self, name, batch_rows=5000, fmt=None, data_dir=DATA_DIR):
+        self.name = name
+        self.batch_rows = batch_rows
+        self.fmt = fmt
+        self.data_dir = data_dir
+        self.buffer = []
+        self.written = 0
+
+    def add(self, rows):
+        self.buffer.extend(rows)
+        if self.batch_rows and len(self.buffer) >= self.batch_rows:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            append(self.name, pd.DataFrame(self.buffer), self.fmt, self.data_dir)
+            self.written += len(self.buffer)
+            self.buffer = []
+
+    def discard(self):
+        """Drop the rows not written yet."""
+        self.buffer = []
+
+
+def compact(name, data_dir=DATA_DIR):
+    """Merge the files of each partition of an append-only dataset, dropping duplicate rows."""
+    for files in _partitions(name, data_dir):
+        if len(files) > 1:
+            df = _read_partition(name, files).drop_duplicates(subset=row_key(name), keep="last")
+            _write_parquet(name, df, data_dir)
+    print(f"{name} compacted")
+
+
+def export_csv(name, data_dir=DATA_DIR):
+    """Write a Parquet dataset out to its legacy CSV file."""
+    read(name, fmt="parquet", data_dir=data_dir).to_csv(csv_path(name), index=False, encoding="utf-8")
+    print(f"{name} exported to {csv_path(name)}")
+
+
+def import_csv(name, data_dir=DATA_DIR):
+    """Load a legacy CSV file into the Parquet store, replacing what was there."""
+    path = parquet_path(name, data_dir)
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    write(name, pd.read_csv(csv_path(name), encoding="utf-8"), fmt="parquet", data_dir=data_dir)
+    print(f"{csv_path(name)} imported into {path}")
+
+
+# ----------------- In-Memory Dtypes -----------------
+# Frames kept in memory use smaller dtypes than the stored schema: names repeated on every row
+# become categories, counts small ints, rates float32 and the scraped dates datetimes.
+CATEGORY_COLUMNS = ["Team", "Away Team", "Home Team", "Conference", "Player", "Player Name", "Side", "Status"]
+DATE_FORMATS = {"Date": "%B %d, %Y"}
+
+
+def optimize_dtypes(df):
+    """Copy of a frame with memory-compact dtypes (see above); rates keep float32 precision."""
+    df = df.copy()
+    for column in df.columns:
+        values = df[column]
+        if column in DATE_FORMATS:
+            df[column] = pd.to_datetime(values, format=DATE_FORMATS[column], errors="coerce")
+        elif column in CATEGORY_COLUMNS:
+            # A category only pays off when values repeat, e.g. not for one row per player
+            if values.nunique() <= len(values) // 2:
+                df[column] = values.astype("category")
+        elif pd.api.types.is_integer_dtype(values):
+            df[column] = pd.to_numeric(values, downcast="integer")
+        elif pd.api.types.is_float_dtype(values):
+            present = values.dropna()
+            if (present % 1 == 0).all():
+                # Counts stored as floats (G, FG, PTS...): nullable ints keep the missing values
+                df[column] = pd.to_numeric(values.astype("Int64"), downcast="integer")
+            else:
+                df[column] = values.astype("float32")
+    return df
+
+
+def memory_usage(df):
+    """Bytes held by a frame, strings and categories included."""
+    return int(df.memory_usage(deep=True).sum())
+
+
+def memory_report(frames, title="Memory"):
+    """Print the rows, size and bytes per row of frames given by name."""
+    print(f"\n----- {title} -----")
+    total = 0
+    for name, df in frames.items():
+        size = memory_usage(df)
+        total += size
+        per_row = size / len(df) if len(df) else 0
+        print(f"{name:<32} {len(df):>9} rows {size / 1e6:9.2f} MB {per_row:8.0f} B/row")
+    print(f"{'total':<32} {'':>9}      {total / 1e6:9.2f} MB")
+
+
+def report_dataset_memory(name, data_dir=DATA_DIR):
+    """Memory of a stored dataset loaded with the schema dtypes and with the compact ones."""
+    df = read(name, data_dir=data_dir)
+    memory_report({name: df, f"{name} (compact)": optimize_dtypes(df)}, title=f"Memory: {name}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert datasets between the Parquet store and CSV files.")
+    parser.add_argument("action", choices=["export", "import", "compact", "memory"],
+                        help="export: Parquet -> CSV, import: CSV -> Parquet, compact: merge appended files, "
+                             "memory: bytes per row loaded with the schema and compact dtypes")
+    parser.add_argument("datasets", nargs="*", default=list(SCHEMAS), help="Datasets (default: all)")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    args = parser.parse_args(argv)
+
+    if pa is None:
+        parser.error("pyarrow is required for the Parquet store")
+    for name in args.datasets:
+        if args.action == "export":
+            export_csv(name, args.data_dir)
+        elif args.action == "compact":
+            if SCHEMAS[name].get("append_only") and exists(name, "parquet", args.data_dir):
+                compact(name, args.data_dir)
+        elif args.action == "memory":
+            if exists(name, "parquet", args.data_dir):
+                report_dataset_memory(name, args.data_dir)
+        elif os.path.exists(csv_path(name)):
+            import_csv(name, args.data_dir)
+
+if __name__ == "__main__":
+    main()
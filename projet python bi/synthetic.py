@@ -0,0 +1,362 @@
+import argparse
+import os
+import unicodedata
+from datetime import date, timedelta
+from html import escape
+
+import numpy as np
+import pandas as pd
+
+import storage
+from scraper import TEAM_ABBRS, PLAYER_STATS_COLUMNS, game_id
+from storage import TEAM_TOTALS_STATS
+
+EASTERN_CONFERENCE = {"ATL", "BOS", "BRK", "CHO", "CHI", "CLE", "DET", "IND", "MIA", "MIL", "NYK", "ORL",
+                      "PHI", "TOR", "WAS"}
+
+# A roster dresses 13 of its 15 players: 5 starters, 5 bench players who play and 3 who do not
+ROSTER_SIZE = 15
+STARTERS = 5
+PLAYED = 10
+DRESSED = 13
+DNP_REASONS = ["Did Not Play", "Did Not Dress", "Not With Team"]
+
+# Regular season nights: from October 22 to April 13
+SEASON_START = (10, 22)
+SEASON_END = (4, 13)
+
+FIRST_NAMES = ["Aaron", "Bam", "Cade", "Damian", "Evan", "Franz", "Giannis", "Herbert", "Immanuel", "Jalen",
+               "Jaren", "Karl-Anthony", "LaMelo", "Luka", "Malik", "Nikola", "Obi", "Paolo", "Quentin", "RJ",
+               "Scottie", "Tyrese", "Victor", "Walker", "Zion", "Alperen", "Bogdan", "Dennis", "Jusuf", "Théo"]
+LAST_NAMES = ["Adebayo", "Ball", "Banchero", "Barnes", "Booker", "Brunson", "Cunningham", "Dončić", "Edwards",
+              "Fox", "Gordon", "Haliburton", "Holiday", "Ingram", "Jackson", "Jokić", "Kessler", "Lillard",
+              "Mobley", "Murray", "Nurkić", "Okongwu", "Porziņģis", "Randle", "Schröder", "Šarić", "Sengün",
+              "Tatum", "Valančiūnas", "Vučević", "Wagner", "Wembanyama", "White", "Williams", "Young", "Zubac",
+              "Bogdanović", "Hernangómez", "Jović", "Matković"]
+
+# Per minute rates of a player line
+RATES = {"FGA": 0.38, "FTA": 0.10, "ORB": 0.05, "DRB": 0.16, "AST": 0.12, "STL": 0.03, "BLK": 0.02,
+         "TOV": 0.05, "PF": 0.07}
+
+
+# ----------------- Season Generator -----------------
+def game_nights(count, start=date(2024, 10, 22)):
+    """`count` consecutive regular season dates from `start`, skipping the off-seasons."""
+    nights = []
+    day = start
+    while len(nights) < count:
+        if (day.month, day.day) > SEASON_END and (day.month, day.day) < SEASON_START:
+            day = date(day.year, *SEASON_START)
+        nights.append(day)
+        day += timedelta(days=1)
+    return nights
+
+
+def season_name(day):
+    """Season of a date, named after the year it ends in."""
+    return day.year + (day.month >= 8)
+
+
+def player_id(name, taken):
+    """basketball-reference style id, e.g. "Nikola Jokić" -> jokicni01 (jokicni02 if taken)."""
+    ascii_name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode().lower()
+    first, last = ascii_name.replace("-", "").split(" ", 1)
+    prefix = f"{last.replace(' ', '')[:5]}{first[:2]}"
+    number = 1
+    while f"{prefix}{number:02d}" in taken:
+        number += 1
+    taken.add(f"{prefix}{number:02d}")
+    return f"{prefix}{number:02d}"
+
+
+def rosters(rng):
+    """Players of every team: {abbr: [(name, player id), ...]}, names unique across the league."""
+    abbrs = sorted(TEAM_ABBRS.values())
+    combos = rng.permutation(len(FIRST_NAMES) * len(LAST_NAMES))[:len(abbrs) * ROSTER_SIZE]
+    names = [f"{FIRST_NAMES[c % len(FIRST_NAMES)]} {LAST_NAMES[c // len(FIRST_NAMES)]}" for c in combos]
+    teams, taken = {}, set()
+    for i, abbr in enumerate(abbrs):
+        players = names[i * ROSTER_SIZE:(i + 1) * ROSTER_SIZE]
+        teams[abbr] = [(name, player_id(name, taken)) for name in players]
+    return teams
+
+
+def _rate_text(made, attempts):
+    # The site writes rates as ".513" ("1.000" for a perfect night), nothing without attempts
+    rate = pd.Series(np.where(attempts > 0, made / np.maximum(attempts, 1), np.nan)).map("{:.3f}".format)
+    return rate.str.replace(r"^0", "", regex=True).replace("nan", None)
+
+
+def generate(games, games_per_night=8, seed=0, start=date(2024, 10, 22)):
+    """A synthetic league history of `games` games, as raw frames by dataset name.
+
+    daily_scores, league_standings and player_stats have the columns and text formats of
+    the scraped CSV files; player_boxscores is typed like its store (about 26 lines per game).
+    Team totals are the sums of the player lines; the standings and the per-game player
+    stats are those of the last season.
+    """
+    rng = np.random.default_rng(seed)
+    teams = rosters(rng)
+    abbrs = sorted(teams)
+    names = {abbr: name for name, abbr in TEAM_ABBRS.items()}
+    per_night = min(games_per_night, len(abbrs) // 2)
+
+    # Games: every team plays at most once a night
+    nights = game_nights(-(-games // per_night), start)
+    matchups = np.stack([rng.permutation(len(abbrs))[:2 * per_night] for _ in nights])
+    matchups = matchups.reshape(-1, 2)[:games]
+    days = np.repeat(np.array(nights, dtype=object), per_night)[:games]
+    away, home = np.array(abbrs)[matchups[:, 0]], np.array(abbrs)[matchups[:, 1]]
+    game_dates = pd.Series([d.strftime("%B %d, %Y") for d in days])
+    game_ids = pd.Series([game_id(d.strftime("%Y%m%d"), h) for d, h in zip(days, home)])
+
+    # Player lines: (game, side, dressed player), starters first
+    team_games = np.stack([away, home], axis=1).reshape(-1)
+    slots = np.concatenate([np.tile(np.arange(STARTERS), (len(team_games), 1)),
+                            rng.permuted(np.tile(np.arange(STARTERS, ROSTER_SIZE), (len(team_games), 1)),
+                                         axis=1)[:, :DRESSED - STARTERS]], axis=1)
+    n_lines = len(team_games) * DRESSED
+    played = np.tile(np.arange(DRESSED) < PLAYED, len(team_games))
+    starter = np.tile(np.arange(DRESSED) < STARTERS, len(team_games))
+    line_team = np.repeat(team_games, DRESSED)
+    roster = [teams[abbr][slot] for abbr, slot in zip(line_team, slots.reshape(-1))]
+
+    minutes = np.where(starter, rng.normal(32, 4, n_lines), rng.normal(16, 5, n_lines)).clip(1, 48)
+    stats = {stat: rng.poisson(minutes * rate) for stat, rate in RATES.items()}
+    stats["3PA"] = rng.binomial(stats["FGA"], 0.4)
+    stats["3P"] = rng.binomial(stats["3PA"], 0.36)
+    stats["FG"] = stats["3P"] + rng.binomial(stats["FGA"] - stats["3PA"], 0.52)
+    stats["FT"] = rng.binomial(stats["FTA"], 0.78)
+    stats["TRB"] = stats["ORB"] + stats["DRB"]
+    stats["PTS"] = 2 * stats["FG"] + stats["3P"] + stats["FT"]
+    for stat in stats:
+        stats[stat] = np.where(played, stats[stat], 0)
+
+    lines = pd.DataFrame({
+        "Game ID": np.repeat(game_ids.to_numpy(), 2 * DRESSED),
+        "Date": np.repeat(game_dates.to_numpy(), 2 * DRESSED),
+        "Team": line_team,
+        "Side": np.tile(np.repeat(["Away", "Home"], DRESSED), games),
+        "Player": [name for name, _ in roster],
+        "Player ID": [pid for _, pid in roster],
+        "Starter": starter.astype("int64"),
+        "Status": pd.Series(rng.choice(DNP_REASONS, n_lines)).where(~played, None),
+        "MP": pd.Series([f"{int(m)}:{int(m % 1 * 60):02d}" for m in minutes]).where(played, None),
+    })
+    for stat in TEAM_TOTALS_STATS:
+        if stat.endswith("%"):
+            made, attempts = stats[stat[:-1]], stats[stat[:-1] + "A"]
+            lines[stat] = np.where(attempts > 0, np.round(made / np.maximum(attempts, 1), 3), np.nan)
+        else:
+            lines[stat] = stats[stat].astype("float64")
+    lines["GmSc"] = np.round(stats["PTS"] + 0.4 * stats["FG"] - 0.7 * stats["FGA"] - 0.4 * (stats["FTA"] - stats["FT"])
+                             + 0.7 * stats["ORB"] + 0.3 * stats["DRB"] + stats["STL"] + 0.7 * stats["AST"]
+                             + 0.7 * stats["BLK"] - 0.4 * stats["PF"] - stats["TOV"], 1)
+    lines["+/-"] = rng.integers(-20, 21, n_lines).astype("float64")
+    lines.loc[~played, ["GmSc", "+/-"] + TEAM_TOTALS_STATS] = np.nan
+
+    # Team totals: sums of the player lines, in the text format of the scraped scores
+    totals = {stat: values.reshape(-1, DRESSED).sum(axis=1).reshape(-1, 2)
+              for stat, values in stats.items()}
+    scores = pd.DataFrame({"Game ID": game_ids, "Date": game_dates,
+                           "Away Team": [names[a] for a in away], "Home Team": [names[h] for h in home],
+                           "Away Score": totals["PTS"][:, 0].astype(str),
+                           "Home Score": totals["PTS"][:, 1].astype(str)})
+    for i, side in enumerate(("Away", "Home")):
+        for stat in TEAM_TOTALS_STATS:
+            if stat.endswith("%"):
+                scores[f"{side} {stat}"] = _rate_text(totals[stat[:-1]][:, i], totals[stat[:-1] + "A"][:, i])
+            else:
+                scores[f"{side} {stat}"] = totals[stat][:, i].astype(str)
+
+    last_season = season_name(nights[-1])
+    in_season = np.array([season_name(d) == last_season for d in days])
+    return {
+        "daily_scores": storage.conform("daily_scores", scores),
+        "league_standings": standings(scores[in_season], names),
+        "player_stats": per_game_stats(lines[np.repeat(in_season, 2 * DRESSED)]),
+        "player_boxscores": storage.conform("player_boxscores", lines),
+    }
+
+
+def standings(scores, names):
+    """League standings of a season's games, in the layout of league_standings.csv."""
+    home_won = scores["Home Score"].astype(int) > scores["Away Score"].astype(int)
+    winners = pd.concat([scores["Home Team"][home_won], scores["Away Team"][~home_won]])
+    losers = pd.concat([scores["Away Team"][home_won], scores["Home Team"][~home_won]])
+    df = pd.DataFrame({"Team": sorted(names.values())})
+    df["Wins"] = df["Team"].map(winners.value_counts()).fillna(0).astype(int)
+    df["Losses"] = df["Team"].map(losers.value_counts()).fillna(0).astype(int)
+    abbrs = {name: abbr for abbr, name in names.items()}
+    df["Conference"] = ["Eastern Conference" if abbrs[t] in EASTERN_CONFERENCE else "Western Conference"
+                        for t in df["Team"]]
+    df["Win%"] = df["Wins"] / (df["Wins"] + df["Losses"]).clip(lower=1)
+    df = df.sort_values(["Conference", "Win%"], ascending=[True, False], kind="stable")
+    return storage.conform("league_standings", df.astype({"Wins": str, "Losses": str}).reset_index(drop=True))
+
+
+def per_game_stats(lines):
+    """Per-game averages of every player who played, ranked by points, like player_stats.csv."""
+    played = lines[lines["MP"].notna()].copy()
+    minutes = played["MP"].str.split(":", expand=True).astype(int)
+    played["MP"] = minutes[0] + minutes[1] / 60
+    counts = ["FG", "FGA", "3P", "3PA", "FT", "FTA", "ORB", "DRB", "TRB", "AST", "STL", "BLK", "TOV", "PF", "PTS"]
+    grouped = played.groupby(["Player", "Player ID", "Team"], sort=False)
+    totals = grouped[counts].sum()
+    df = grouped[["MP"] + counts].mean().round(1)
+    df.insert(0, "G", grouped.size().astype("float64"))
+    df["2P"] = (df["FG"] - df["3P"]).round(1)
+    df["2PA"] = (df["FGA"] - df["3PA"]).round(1)
+    for stat, made, attempts in [("FG%", "FG", "FGA"), ("3P%", "3P", "3PA"), ("2P%", None, None),
+                                 ("FT%", "FT", "FTA")]:
+        if stat == "2P%":
+            made_total, attempts_total = totals["FG"] - totals["3P"], totals["FGA"] - totals["3PA"]
+        else:
+            made_total, attempts_total = totals[made], totals[attempts]
+        df[stat] = (made_total / attempts_total.where(attempts_total > 0)).round(3)
+    df = df.reset_index().sort_values("PTS", ascending=False, kind="stable")
+    df["Rk"] = np.arange(1, len(df) + 1, dtype="float64")
+    return storage.conform("player_stats", df[PLAYER_STATS_COLUMNS].reset_index(drop=True))
+
+
+# ----------------- Fixture Pages -----------------
+# Pages in the site layout, rendered from generated frames, for the scraper parsers
+def _cells(values):
+    return "".join(f"<td>{'' if pd.isna(v) else escape(str(v))}</td>" for v in values)
+
+
+def _number(value, stat):
+    if pd.isna(value):
+        return ""
+    if stat.endswith("%"):
+        return f"{value:.3f}".lstrip("0") if value < 1 else f"{value:.3f}"
+    return f"{value:g}"
+
+
+def boxscore_page(game, lines):
+    """Box score page of a game: both basic tables, starters, reserves, DNP rows and team totals."""
+    tables = []
+    for side in ("Away", "Home"):
+        abbr = lines.loc[lines["Side"] == side, "Team"].iloc[0]
+        rows = [f'<table id="box-{abbr}-game-basic"><thead><tr><th>Starters</th><th>MP</th>'
+                + "".join(f"<th>{s}</th>" for s in storage.PLAYER_LINE_STATS) + "</tr></thead><tbody>"]
+        for i, line in enumerate(lines[lines["Side"] == side].to_dict("records")):
+            if i == STARTERS:
+                rows.append('<tr class="thead"><th>Reserves</th><td>MP</td></tr>')
+            link = (f'<th data-stat="player"><a href="/players/{line["Player ID"][0]}/{line["Player ID"]}.html">'
+                    f'{escape(line["Player"])}</a></th>')
+            if line["MP"] is None or pd.isna(line["MP"]):
+                rows.append(f'<tr>{link}<td colspan="21">{escape(line["Status"])}</td></tr>')
+            else:
+                stats = [_number(line[s], s) for s in storage.PLAYER_LINE_STATS]
+                rows.append(f"<tr>{link}{_cells([line['MP']] + stats)}</tr>")
+        totals = [_number(float(game[f"{side} {s}"]) if game[f"{side} {s}"] else np.nan, s)
+                  for s in TEAM_TOTALS_STATS]
+        rows.append(f"</tbody><tfoot><tr><th>Team Totals</th>{_cells(['240'] + totals + ['', ''])}</tr></tfoot></table>")
+        tables.append("".join(rows))
+    return f'<html><head><meta charset="utf-8"></head><body><div>{tables[0]}</div><div>{tables[1]}</div></body></html>'
+
+
+def game_summaries(games, season):
+    """The `game_summary` blocks of the front page and the boxscores index."""
+    abbrs = TEAM_ABBRS
+    blocks = []
+    for game in games.itertuples(index=False):
+        game = game._asdict()
+        rows = "".join(
+            f'<tr><td><a href="/teams/{abbrs[game[f"{side}_Team"]]}/{season}.html">{escape(game[f"{side}_Team"])}</a>'
+            f'</td><td>{game[f"{side}_Score"]}</td></tr>' for side in ("Away", "Home"))
+        blocks.append(f'<div class="game_summary"><table>{rows}</table></div>')
+    return "".join(blocks)
+
+
+def standings_page(df, season):
+    tables = []
+    for conference_id, conference in [("confs_standings_E", "Eastern Conference"),
+                                      ("confs_standings_W", "Western Conference")]:
+        rows = [f'<table id="{conference_id}"><thead><tr><th>{conference}</th><th>W</th><th>L</th>'
+                "<th>W/L%</th></tr></thead><tbody>"]
+        for team in df[df["Conference"] == conference].itertuples(index=False):
+            wins, losses = int(team.Wins), int(team.Losses)
+            pct = f"{wins / max(wins + losses, 1):.3f}".lstrip("0")
+            rows.append(f'<tr><th><a href="/teams/{TEAM_ABBRS[team.Team]}/{season}.html">{escape(team.Team)}</a></th>'
+                        f"{_cells([wins, losses, pct])}</tr>")
+        rows.append("</tbody></table>")
+        tables.append("".join(rows))
+    return f'<html><head><meta charset="utf-8"></head><body>{"".join(tables)}</body></html>'
+
+
+def per_game_page(df, header_every=20):
+    """The per-game stats page: every site column, repeated header rows and the league average row."""
+    columns = ["Rk", "Player", "Age", "Team", "Pos", "G", "GS", "MP", "FG", "FGA", "FG%", "3P", "3PA", "3P%",
+               "2P", "2PA", "2P%", "eFG%", "FT", "FTA", "FT%", "ORB", "DRB", "TRB", "AST", "STL", "BLK",
+               "TOV", "PF", "PTS", "Awards"]
+    header = "<tr>" + "".join(f"<th>{c}</th>" for c in columns) + "</tr>"
+    rows = [f'<table id="per_game_stats"><thead>{header}</thead><tbody>']
+    for i, player in enumerate(df.to_dict("records")):
+        if i and i % header_every == 0:
+            rows.append(header.replace("<tr>", '<tr class="thead">', 1))
+        player.update({"Age": 20 + i % 15, "Pos": ["PG", "SG", "SF", "PF", "C"][i % 5], "GS": 0, "eFG%": None,
+                       "Awards": None})
+        values = [_number(player[c], c) if c not in ("Team", "Pos", "Awards") else player[c]
+                  for c in columns[2:]]
+        link = f'<a href="/players/{player["Player ID"][0]}/{player["Player ID"]}.html">{escape(player["Player"])}</a>'
+        rows.append(f"<tr><th>{int(player['Rk'])}</th><td>{link}</td>{_cells(values)}</tr>")
+    rows.append("<tr><th></th><td>League Average</td>" + _cells([""] * (len(columns) - 2)) + "</tr>")
+    rows.append("</tbody></table>")
+    return f'<html><head><meta charset="utf-8"></head><body>{"".join(rows)}</body></html>'
+
+
+def write_site(frames, out_dir, pages=None):
+    """Write the fixture pages of generated frames in the site layout (see bench.bench_parse).
+
+    The front page and the boxscores index list the last night; box score pages are written
+    for its games, or for the `pages` latest games.
+    """
+    scores, lines = frames["daily_scores"], frames["player_boxscores"]
+    last_night = scores[scores["Date"] == scores["Date"].iloc[-1]]
+    boxscored = scores.tail(pages) if pages else last_night
+    season = season_name(pd.to_datetime(last_night["Date"].iloc[0], format="%B %d, %Y"))
+    os.makedirs(os.path.join(out_dir, "boxscores"), exist_ok=True)
+    os.makedirs(os.path.join(out_dir, "leagues"), exist_ok=True)
+
+    def write(path, html):
+        with open(os.path.join(out_dir, path), "w", encoding="utf-8") as f:
+            f.write(html)
+
+    summaries = game_summaries(last_night.rename(columns=lambda c: c.replace(" ", "_")), season)
+    write("index.html", f'<html><body><div id="scores">{summaries}</div></body></html>')
+    write(os.path.join("boxscores", "index.html"),
+          f'<html><body><h1>NBA Games Played on {last_night["Date"].iloc[0]}</h1>'
+          f'<div id="scores">{summaries}</div></body></html>')
+    by_game = {key: group for key, group in lines[lines["Game ID"].isin(boxscored["Game ID"])].groupby("Game ID")}
+    for game in boxscored.to_dict("records"):
+        write(os.path.join("boxscores", f"{game['Game ID']}.html"), boxscore_page(game, by_game[game["Game ID"]]))
+    write(os.path.join("leagues", f"NBA_{season}_standings.html"), standings_page(frames["league_standings"], season))
+    write(os.path.join("leagues", f"NBA_{season}_per_game.html"), per_game_page(frames["player_stats"]))
+    return len(boxscored)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic NBA league history at any scale.")
+    parser.add_argument("--games", type=int, default=1230, help="Number of games (1230 = one regular season)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="synthetic", help="Directory of the CSV files")
+    parser.add_argument("--site", help="Also write fixture pages in the site layout to this directory")
+    parser.add_argument("--pages", type=int, help="Box score pages to write (default: the last night's games)")
+    parser.add_argument("--store", action="store_true", help="Write the raw datasets to the store instead of CSV files")
+    args = parser.parse_args(argv)
+
+    frames = generate(args.games, seed=args.seed)
+    for name, df in frames.items():
+        if args.store:
+            storage.write(name, df)
+        else:
+            os.makedirs(args.out, exist_ok=True)
+            df.to_csv(os.path.join(args.out, storage.csv_path(name)), index=False, encoding="utf-8")
+        print(f"{name}: {len(df)} rows")
+    if args.site:
+        print(f"{write_site(frames, args.site, args.pages)} box score pages written to {args.site}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+# The modules are flat scripts next to this directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import synthetic
+
+
+@pytest.fixture(scope="session")
+def site_dir(tmp_path_factory):
+    """Fixture pages of one synthetic night of 8 games, in the site layout."""
+    out_dir = str(tmp_path_factory.mktemp("site"))
+    synthetic.write_site(synthetic.generate(8, games_per_night=8), out_dir)
+    return out_dir
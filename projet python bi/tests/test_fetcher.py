@@ -0,0 +1,188 @@
+import os
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from fetcher import Fetcher, RETRY_STATUSES
+
+
+class StubSite:
+    """Local HTTP server of the fixture pages, with scripted failures and delays per path."""
+
+    def __init__(self, site_dir):
+        self.site_dir = site_dir
+        # path -> [(status, headers)] served, in order, before the page itself
+        self.failures = {}
+        # path -> seconds before answering
+        self.delays = {}
+        self.hits = []
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(SimpleHTTPRequestHandler):
+            def do_GET(self):
+                with stub.lock:
+                    stub.hits.append((self.path, time.monotonic()))
+                    failures = stub.failures.get(self.path)
+                    failure = failures.pop(0) if failures else None
+                time.sleep(stub.delays.get(self.path, 0))
+                if failure is None:
+                    return super().do_GET()
+                status, headers = failure
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), partial(Handler, directory=site_dir))
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def boxscore_paths(self):
+        return sorted(f"/boxscores/{name}" for name in os.listdir(os.path.join(self.site_dir, "boxscores"))
+                      if name != "index.html")
+
+    def hit_count(self, path):
+        return sum(1 for hit, _ in self.hits if hit == path)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub(site_dir):
+    site = StubSite(site_dir)
+    yield site
+    site.close()
+
+
+def fetcher(**options):
+    options = {"requests_per_second": 0, "backoff": 0.01, **options}
+    return Fetcher(**options)
+
+
+def test_get_serves_a_fixture_boxscore(stub):
+    path = stub.boxscore_paths()[0]
+    f = fetcher()
+    try:
+        response = f.get(stub.base_url + path)
+    finally:
+        f.close()
+    assert response.status_code == 200
+    assert 'id="box-' in response.text
+
+
+def test_requests_are_rate_limited(stub):
+    paths = stub.boxscore_paths()[:6]
+    f = fetcher(requests_per_second=10, max_workers=4)
+    start = time.monotonic()
+    try:
+        responses = f.fetch_all([stub.base_url + path for path in paths])
+    finally:
+        f.close()
+    assert [r.status_code for r in responses] == [200] * len(paths)
+    # One token at a time, whatever the number of workers
+    assert time.monotonic() - start >= (len(paths) - 1) / 10 * 0.9
+    sent = sorted(at for _, at in stub.hits)
+    assert min(b - a for a, b in zip(sent, sent[1:])) >= 0.1 * 0.8
+
+
+@pytest.mark.parametrize("status", sorted(RETRY_STATUSES))
+def test_retry_statuses_are_retried(stub, status):
+    path = stub.boxscore_paths()[0]
+    stub.failures[path] = [(status, {}), (status, {})]
+    f = fetcher()
+    try:
+        response = f.get(stub.base_url + path)
+    finally:
+        f.close()
+    assert response.status_code == 200
+    assert stub.hit_count(path) == 3
+
+
+def test_other_statuses_are_not_retried(stub):
+    f = fetcher()
+    try:
+        response = f.get(stub.base_url + "/boxscores/missing.html")
+    finally:
+        f.close()
+    assert response.status_code == 404
+    assert stub.hit_count("/boxscores/missing.html") == 1
+
+
+def test_retries_give_up_with_the_last_response(stub):
+    path = stub.boxscore_paths()[0]
+    stub.failures[path] = [(503, {})] * 5
+    f = fetcher(max_retries=2)
+    try:
+        response = f.get(stub.base_url + path)
+    finally:
+        f.close()
+    assert response.status_code == 503
+    assert stub.hit_count(path) == 3
+
+
+def test_retry_after_is_honoured(stub):
+    path = stub.boxscore_paths()[0]
+    stub.failures[path] = [(429, {"Retry-After": "1"})]
+    f = fetcher()
+    try:
+        response = f.get(stub.base_url + path)
+    finally:
+        f.close()
+    assert response.status_code == 200
+    (_, first), (_, second) = [hit for hit in stub.hits if hit[0] == path]
+    # Not the 0.01s backoff
+    assert second - first >= 0.9
+
+
+def test_fetch_all_keeps_the_input_order(stub):
+    paths = stub.boxscore_paths()[:4] + ["/boxscores/missing.html"]
+    # The first URLs answer last
+    for i, path in enumerate(paths):
+        stub.delays[path] = 0.1 * (len(paths) - i)
+    f = fetcher(max_workers=len(paths))
+    try:
+        responses = f.fetch_all([stub.base_url + path for path in paths])
+    finally:
+        f.close()
+    assert [r.url for r in responses] == [stub.base_url + path for path in paths]
+    assert [r.status_code for r in responses] == [200] * 4 + [404]
+
+
+def test_fetch_all_returns_none_for_failed_urls(stub):
+    path = stub.boxscore_paths()[0]
+    # Nothing listens on port 9 (discard)
+    f = fetcher(max_retries=0)
+    try:
+        responses = f.fetch_all([stub.base_url + path, "http://127.0.0.1:9/"])
+    finally:
+        f.close()
+    assert responses[0].status_code == 200
+    assert responses[1] is None
+
+
+def test_cache_counts_every_lookup(stub, tmp_path):
+    from http_cache import ResponseCache
+
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"))
+    urls = [stub.base_url + path for path in stub.boxscore_paths()[:4]]
+    f = fetcher(max_workers=4, cache=cache)
+    try:
+        f.fetch_all(urls)
+        f.fetch_all(urls + [stub.base_url + "/boxscores/missing.html"])
+    finally:
+        f.close()
+        cache.close()
+    # Finished box scores never go stale: the second pass only fetches the missing page
+    assert (cache.hits, cache.misses) == (4, 5)
+    assert len(stub.hits) == 5
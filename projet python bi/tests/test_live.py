@@ -0,0 +1,62 @@
+import pytest
+import requests
+
+from fetcher import Fetcher
+from live import LivePoller, boxscore_budget
+from transport import Archive, ReplayTransport
+from warehouse import Warehouse
+
+BASE_URL = "https://www.example.test"
+
+
+@pytest.fixture
+def poller(site_dir, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    archive = Archive("archive.sqlite")
+    archive.import_site(site_dir, BASE_URL)
+    fetcher = Fetcher(requests_per_second=0, transport=ReplayTransport(archive))
+    warehouse = Warehouse("warehouse.sqlite")
+    yield lambda max_boxscores=None: LivePoller(fetcher, warehouse, BASE_URL, max_boxscores)
+    fetcher.close()
+    warehouse.close()
+
+
+def test_boxscore_budget_fits_the_interval():
+    # With the front page, 9 requests at 0.33 per second: 27s of a 30s interval
+    assert boxscore_budget(30, 0.33) == 8
+    assert boxscore_budget(5, 0.33) == 1
+    assert boxscore_budget(30, 0) is None
+
+
+def test_poll_publishes_the_changed_games(poller):
+    live = poller()
+    assert len(live.poll()) == 8
+    # Same scores: nothing to fetch
+    assert live.poll() == []
+
+
+def test_busy_night_spreads_over_polls(poller):
+    live = poller(max_boxscores=3)
+    published = [{row["Game ID"] for row in live.poll()} for _ in range(4)]
+    assert [len(ids) for ids in published] == [3, 3, 2, 0]
+    assert len(set().union(*published)) == 8
+
+
+def test_restarted_poller_skips_published_games(poller):
+    assert len(poller().poll()) == 8
+    assert poller().poll() == []
+
+
+def test_run_keeps_polling_through_an_outage(poller, monkeypatch):
+    live = poller()
+    polls = []
+
+    def poll():
+        polls.append(len(polls))
+        if len(polls) <= 2:
+            raise requests.ConnectionError("site down")
+        return []
+
+    monkeypatch.setattr(live, "poll", poll)
+    live.run(interval=30, max_polls=4, sleep=lambda seconds: None)
+    assert len(polls) == 4
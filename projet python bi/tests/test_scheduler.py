@@ -0,0 +1,152 @@
+from datetime import date, datetime, timezone
+
+import pytest
+
+import scheduler
+from scheduler import GAME_INTERVAL, IDLE_INTERVAL, RunLock, Scheduler, finished_day, poll_interval
+
+
+class FakeClock:
+    """Epoch seconds that only move when the scheduler sleeps."""
+
+    def __init__(self, start):
+        self.now = start.timestamp()
+        self.sleeps = []
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def at(hour, minute=0):
+    return datetime(2024, 12, 16, hour, minute, tzinfo=timezone.utc)
+
+
+def stub_stages(calls, inputs=None, failing=()):
+    """scrape -> etl -> aggregates, declared out of order, recording their runs in `calls`."""
+    inputs = inputs if inputs is not None else {}
+
+    def stage(name, after):
+        def run(ctx):
+            calls.append(name)
+            if name in failing:
+                raise RuntimeError(f"{name} failed")
+        fingerprint = (lambda: inputs.get(name)) if name in inputs else None
+        return {"run": run, "after": after, "inputs": fingerprint}
+
+    return {
+        "aggregates": stage("aggregates", ["etl"]),
+        "etl": stage("etl", ["scrape"]),
+        "scrape": stage("scrape", []),
+    }
+
+
+# ----------------- Cadence -----------------
+@pytest.mark.parametrize("now, expected", [
+    (at(20), GAME_INTERVAL),
+    (at(1, 30), GAME_INTERVAL),  # the window wraps past midnight
+    (at(2), IDLE_INTERVAL),
+    (at(10), IDLE_INTERVAL),
+    (at(17, 30), 30 * 60),  # never sleeps past the start of the window
+])
+def test_poll_interval(now, expected):
+    assert poll_interval(now) == expected
+
+
+@pytest.mark.parametrize("now, expected", [
+    (at(1, 30), date(2024, 12, 14)),  # the games of the 15th are still on
+    (at(2), date(2024, 12, 15)),
+    (at(20), date(2024, 12, 15)),
+])
+def test_finished_day(now, expected):
+    assert finished_day(now) == expected
+
+
+def test_run_follows_the_cadence_on_a_fake_clock():
+    clock = FakeClock(at(16))
+    calls = []
+    sched = Scheduler(stub_stages(calls), clock=clock.clock, sleep=clock.sleep, timezone=timezone.utc)
+    assert sched.run(max_ticks=4)
+    # Off hours until the 18:00 window, then every GAME_INTERVAL
+    assert clock.sleeps == [IDLE_INTERVAL, IDLE_INTERVAL, GAME_INTERVAL]
+    assert [now.hour for now, _ in sched.history] == [16, 17, 18, 18]
+
+
+# ----------------- Stages -----------------
+def test_stages_run_in_dependency_order():
+    calls = []
+    statuses = Scheduler(stub_stages(calls)).tick()
+    assert calls == ["scrape", "etl", "aggregates"]
+    assert statuses == {"scrape": "ok", "etl": "ok", "aggregates": "ok"}
+
+
+def test_unchanged_inputs_skip_the_stage():
+    calls = []
+    inputs = {"etl": "raw-1", "aggregates": "clean-1"}
+    sched = Scheduler(stub_stages(calls, inputs))
+    sched.tick()
+    calls.clear()
+
+    # The scrape polls its source on every tick; the others wait for their inputs to change
+    assert sched.tick() == {"scrape": "ok", "etl": "unchanged", "aggregates": "unchanged"}
+    assert calls == ["scrape"]
+
+    inputs["etl"] = "raw-2"
+    calls.clear()
+    assert sched.tick() == {"scrape": "ok", "etl": "ok", "aggregates": "unchanged"}
+    assert calls == ["scrape", "etl"]
+
+
+def test_failed_stage_blocks_the_next_ones_and_is_retried():
+    calls = []
+    failing = {"etl"}
+    inputs = {"etl": "raw-1"}
+    sched = Scheduler(stub_stages(calls, inputs, failing))
+    assert sched.tick() == {"scrape": "ok", "etl": "failed", "aggregates": "blocked"}
+
+    # Same inputs, but the failed stage never recorded them
+    failing.clear()
+    calls.clear()
+    assert sched.tick() == {"scrape": "ok", "etl": "ok", "aggregates": "ok"}
+    assert calls == ["scrape", "etl", "aggregates"]
+
+
+# ----------------- Run Lock -----------------
+def test_run_holds_the_lock(tmp_path):
+    path = str(tmp_path / "scheduler.lock")
+    held = []
+
+    def check_lock(ctx):
+        other = RunLock(path)
+        held.append(not other.acquire())
+        other.release()
+
+    stages = {"scrape": {"run": check_lock, "after": [], "inputs": None}}
+    assert Scheduler(stages, lock=RunLock(path)).run(max_ticks=1)
+    assert held == [True]
+    # Released once the run is over
+    lock = RunLock(path)
+    assert lock.acquire()
+    lock.release()
+
+
+def test_run_exits_when_another_run_holds_the_lock(tmp_path, capsys):
+    path = str(tmp_path / "scheduler.lock")
+    other = RunLock(path)
+    assert other.acquire()
+    calls = []
+    try:
+        assert not Scheduler(stub_stages(calls), lock=RunLock(path)).run(max_ticks=1)
+    finally:
+        other.release()
+    assert calls == []
+    assert "holds" in capsys.readouterr().out
+
+
+def test_default_stages_form_a_graph():
+    order = Scheduler().order
+    assert order.index("scrape") < order.index("etl") < order.index("aggregates")
+    assert set(order) == set(scheduler.STAGES)
@@ -0,0 +1,124 @@
+import argparse
+import os
+
+import pytest
+import requests
+
+import scraper
+import transport
+from fetcher import Fetcher
+from transport import Archive, ReplayTransport
+
+BASE_URL = "https://www.example.test"
+
+
+@pytest.fixture
+def archive_path(site_dir, tmp_path):
+    """Archive of the fixture pages, imported like `transport.py import-site`."""
+    path = str(tmp_path / "archive.sqlite")
+    archive = Archive(path)
+    assert archive.import_site(site_dir, BASE_URL) > 0
+    archive.close()
+    return path
+
+
+def replay(path, **options):
+    return ReplayTransport(Archive(path), **options)
+
+
+def boxscore_url(site_dir):
+    name = sorted(n for n in os.listdir(os.path.join(site_dir, "boxscores")) if n != "index.html")[0]
+    return f"{BASE_URL}/boxscores/{name}"
+
+
+def test_import_site_archives_directories_as_their_index(archive_path, site_dir):
+    responses = Archive(archive_path).responses()
+    assert f"{BASE_URL}/" in responses
+    assert f"{BASE_URL}/boxscores/" in responses
+    with open(os.path.join(site_dir, "index.html"), "rb") as f:
+        assert responses[f"{BASE_URL}/"][0]["body"] == f.read()
+
+
+def test_replay_serves_recorded_pages(archive_path, site_dir):
+    response = replay(archive_path).get(boxscore_url(site_dir))
+    assert response.status_code == 200
+    assert 'id="box-' in response.text
+
+
+def test_replay_repeats_the_last_response(archive_path):
+    url = f"{BASE_URL}/"
+    archive = Archive(archive_path)
+    # The front page recorded twice more, e.g. by a live poller
+    archive.add(url, 200, {}, b"second")
+    archive.add(url, 200, {}, b"third")
+    archive.close()
+
+    replayed = replay(archive_path)
+    bodies = [replayed.get(url).content for _ in range(5)]
+    assert bodies[1:] == [b"second", b"third", b"third", b"third"]
+    assert replayed.served[url] == 5
+
+
+def test_unrecorded_urls_get_a_404(archive_path):
+    assert replay(archive_path).get(f"{BASE_URL}/nowhere.html").status_code == 404
+
+
+def test_matching_etag_revalidates(archive_path):
+    url = f"{BASE_URL}/page.html"
+    archive = Archive(archive_path)
+    archive.add(url, 200, {"ETag": '"v1"', "Set-Cookie": "dropped"}, b"page")
+    archive.close()
+
+    replayed = replay(archive_path)
+    first = replayed.get(url)
+    assert first.headers["ETag"] == '"v1"'
+    assert "Set-Cookie" not in first.headers
+    assert replayed.get(url, headers={"If-None-Match": '"v1"'}).status_code == 304
+    changed = replayed.get(url, headers={"If-None-Match": '"v0"'})
+    assert (changed.status_code, changed.content) == (200, b"page")
+
+
+def test_error_injection_is_reproducible(archive_path, site_dir):
+    url = boxscore_url(site_dir)
+
+    def statuses(seed):
+        replayed = replay(archive_path, error_rate=0.3, seed=seed)
+        return [replayed.get(url).status_code for _ in range(50)], replayed.injected
+
+    first, injected = statuses(seed=1)
+    assert statuses(seed=1) == (first, injected)
+    assert 0 < injected < 50
+    assert first.count(503) == injected
+    assert statuses(seed=2)[0] != first
+
+
+def test_injected_connection_errors(archive_path, site_dir):
+    replayed = replay(archive_path, error_rate=1.0, error_status=0)
+    with pytest.raises(requests.ConnectionError):
+        replayed.get(boxscore_url(site_dir))
+
+
+def test_from_args_builds_a_replay(archive_path):
+    parser = argparse.ArgumentParser()
+    transport.add_arguments(parser)
+    args = parser.parse_args(["--replay", archive_path, "--replay-errors", "0.5", "--replay-seed", "3"])
+    replayed = transport.from_args(args, max_workers=2)
+    assert isinstance(replayed, ReplayTransport)
+    assert (replayed.error_rate, replayed.latency) == (0.5, 0.0)
+    assert transport.from_args(parser.parse_args([]), max_workers=2) is None
+
+
+@pytest.mark.parametrize("error_rate", [0.0, 0.3])
+def test_scrape_offline(archive_path, tmp_path, monkeypatch, error_rate):
+    # The scrape reads the game store of the working directory: an empty one
+    monkeypatch.chdir(tmp_path)
+    replayed = replay(archive_path, error_rate=error_rate)
+    fetcher = Fetcher(requests_per_second=0, backoff=0.001, transport=replayed)
+    try:
+        raw = scraper.scrape(fetcher, BASE_URL, persist=False)
+    finally:
+        fetcher.close()
+    # The retries make up for the injected errors
+    assert len(raw["daily_scores"]) == 8
+    assert len(raw["league_standings"]) == 30
+    assert (replayed.injected > 0) == (error_rate > 0)
@@ -0,0 +1,236 @@
+import argparse
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+import zlib
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+DEFAULT_ARCHIVE_PATH = "http_archive.sqlite"
+
+# Response headers kept in the archive: those the fetcher and the response cache read
+ARCHIVED_HEADERS = ["Content-Type", "ETag", "Last-Modified", "Retry-After"]
+
+
+# ----------------- Transports -----------------
+# A transport sends one GET and returns a requests.Response; the Fetcher keeps the rate
+# limiting, retries and caching on top of it, whatever the transport.
+class HttpTransport:
+    """The network: one keep-alive connection pool sized to the fetcher's workers."""
+
+    def __init__(self, max_workers):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get(self, url, headers=None, timeout=None):
+        return self.session.get(url, headers=headers, timeout=timeout)
+
+    def close(self):
+        self.session.close()
+
+
+class RecordingTransport:
+    """Send requests through `inner` and save every response to an archive."""
+
+    def __init__(self, inner, archive):
+        self.inner = inner
+        self.archive = archive
+
+    def get(self, url, headers=None, timeout=None):
+        start = time.perf_counter()
+        response = self.inner.get(url, headers=headers, timeout=timeout)
+        self.archive.add(url, response.status_code, response.headers, response.content,
+                         time.perf_counter() - start)
+        return response
+
+    def close(self):
+        self.inner.close()
+        self.archive.close()
+
+
+class ReplayTransport:
+    """Serve the responses of an archive, without any network.
+
+    A URL recorded several times (e.g. the front page while polling live scores) replays its
+    responses in the recorded order, then repeats the last one. Unrecorded URLs get a 404.
+
+    `latency` delays every response by that many seconds, or by the recorded time with
+    "recorded". `error_rate` is the share of requests failing with `error_status` (e.g. 503,
+    retried by the fetcher), or with a connection error when `error_status` is 0. Errors
+    are drawn from a generator seeded with `seed`, so a replay is reproducible.
+    """
+
+    def __init__(self, archive, latency=0.0, error_rate=0.0, error_status=503, seed=0):
+        self.responses = archive.responses()
+        archive.close()
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.random = random.Random(seed)
+        self.served = {}
+        self.injected = 0
+        self.lock = threading.Lock()
+
+    def get(self, url, headers=None, timeout=None):
+        recorded = self.responses.get(url)
+        with self.lock:
+            index = self.served.get(url, 0)
+            self.served[url] = index + 1
+            failing = self.error_rate and self.random.random() < self.error_rate
+            self.injected += bool(failing)
+        entry = recorded[min(index, len(recorded) - 1)] if recorded else None
+
+        delay = entry["elapsed"] if self.latency == "recorded" and entry else self.latency
+        if delay:
+            time.sleep(float(delay))
+        if failing:
+            if not self.error_status:
+                raise requests.ConnectionError(f"Injected connection error for {url}")
+            return build_response(url, self.error_status, {}, b"")
+        if entry is None:
+            return build_response(url, 404, {}, b"")
+        # Conditional requests revalidate like the site does
+        etag = entry["headers"].get("ETag")
+        if etag and headers and headers.get("If-None-Match") == etag:
+            return build_response(url, 304, entry["headers"], b"")
+        return build_response(url, entry["status"], entry["headers"], entry["body"])
+
+    def close(self):
+        pass
+
+
+def build_response(url, status, headers, body):
+    response = requests.Response()
+    response.url = url
+    response.status_code = status
+    response.headers = CaseInsensitiveDict(headers)
+    response._content = body
+    return response
+
+
+# ----------------- Archive -----------------
+class Archive:
+    """SQLite file of recorded responses, bodies compressed with zlib, in request order."""
+
+    def __init__(self, path=DEFAULT_ARCHIVE_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                elapsed REAL NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    def add(self, url, status, headers, body, elapsed=0.0):
+        kept = {name: headers[name] for name in ARCHIVED_HEADERS if name in headers}
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO responses (url, status, headers, body, elapsed) VALUES (?, ?, ?, ?, ?)",
+                (url, status, json.dumps(kept), zlib.compress(body), elapsed),
+            )
+            self.conn.commit()
+
+    def responses(self):
+        """url -> recorded responses, in request order."""
+        by_url = {}
+        with self.lock:
+            rows = self.conn.execute("SELECT url, status, headers, body, elapsed FROM responses ORDER BY seq").fetchall()
+        for url, status, headers, body, elapsed in rows:
+            by_url.setdefault(url, []).append({
+                "status": status, "headers": json.loads(headers), "body": zlib.decompress(body), "elapsed": elapsed,
+            })
+        return by_url
+
+    def import_site(self, site_dir, base_url):
+        """Archive a directory of saved pages in the site layout (e.g. written by synthetic.py --site)."""
+        pages = 0
+        for root, _, files in os.walk(site_dir):
+            for file in sorted(files):
+                path = os.path.join(root, file)
+                relative = os.path.relpath(path, site_dir).replace(os.sep, "/")
+                # index.html is what the site serves for a directory
+                url = f"{base_url}/{relative[:-len('index.html')] if relative.endswith('index.html') else relative}"
+                with open(path, "rb") as f:
+                    self.add(url, 200, {"Content-Type": "text/html; charset=utf-8"}, f.read())
+                pages += 1
+        return pages
+
+    def report(self):
+        with self.lock:
+            count, urls, network, stored = self.conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT url), COALESCE(SUM(elapsed), 0), COALESCE(SUM(LENGTH(body)), 0) "
+                "FROM responses"
+            ).fetchone()
+        print(f"{self.path}: {count} responses for {urls} URLs, {stored / 1e6:.1f} MB compressed, "
+              f"{network:.1f}s of recorded network time")
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+# ----------------- Command Line -----------------
+def add_arguments(parser):
+    """--record / --replay options of the scraping commands."""
+    group = parser.add_argument_group("record and replay")
+    group.add_argument("--record", metavar="ARCHIVE", help="Save every response to this archive")
+    group.add_argument("--replay", metavar="ARCHIVE",
+                       help="Serve the responses of this archive, offline (the rate limit still applies)")
+    group.add_argument("--replay-latency", default="0",
+                       help="Seconds added to every replayed response, or 'recorded'")
+    group.add_argument("--replay-errors", type=float, default=0.0,
+                       help="Share of replayed requests failing (0 to 1)")
+    group.add_argument("--replay-error-status", type=int, default=503,
+                       help="Status of the injected errors (0: connection error)")
+    group.add_argument("--replay-seed", type=int, default=0, help="Seed of the injected errors")
+
+
+def from_args(args, max_workers):
+    """Transport of the --record / --replay options, or None for the plain network."""
+    if args.replay:
+        latency = args.replay_latency if args.replay_latency == "recorded" else float(args.replay_latency)
+        return ReplayTransport(Archive(args.replay), latency, args.replay_errors, args.replay_error_status,
+                               args.replay_seed)
+    if args.record:
+        return RecordingTransport(HttpTransport(max_workers), Archive(args.record))
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or build HTTP response archives.")
+    sub = parser.add_subparsers(dest="action", required=True)
+    info = sub.add_parser("info", help="Summarize an archive")
+    info.add_argument("archive")
+    info.add_argument("--urls", action="store_true", help="List the archived URLs")
+    site = sub.add_parser("import-site", help="Archive a directory of saved pages")
+    site.add_argument("site_dir")
+    site.add_argument("archive")
+    site.add_argument("--base-url", help="URL the pages are archived under (default: the real site)")
+    args = parser.parse_args(argv)
+
+    archive = Archive(args.archive)
+    if args.action == "import-site":
+        from scraper import BASE_URL
+        print(f"{archive.import_site(args.site_dir, args.base_url or BASE_URL)} pages archived")
+    elif args.urls:
+        for url, responses in archive.responses().items():
+            print(f"{len(responses):>3} x {url}")
+    archive.report()
+    archive.close()
+
+if __name__ == "__main__":
+    main()
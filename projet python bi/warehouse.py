@@ -0,0 +1,451 @@
+import argparse
+import os
+import sqlite3
+import threading
+from datetime import date, datetime
+from functools import lru_cache
+
+import pandas as pd
+
+import metrics
+import storage
+from storage import TEAM_TOTALS_STATS, PLAYER_STATS_NUMERIC
+
+DEFAULT_WAREHOUSE_PATH = os.path.join(storage.DATA_DIR, "warehouse.sqlite")
+
+
+def q(column):
+    """Quote a column name for SQL ("3P%", "Player Name", ...)."""
+    return '"%s"' % column.replace('"', '""')
+
+
+def season_of(dates):
+    """Season of each date, named after the year it ends in (games from August on count for the next year)."""
+    return dates.dt.year + (dates.dt.month >= 8).astype(int)
+
+
+def season_bounds(season):
+    """First day of a season and first day of the next one, as YYYY-MM-DD."""
+    return f"{season - 1}-08-01", f"{season}-08-01"
+
+
+@lru_cache(maxsize=4096)
+def display_date(iso_date):
+    """"2024-12-16" -> "December 16, 2024", the date format of the scraped data."""
+    return datetime.strptime(iso_date, "%Y-%m-%d").strftime("%B %d, %Y")
+
+
+def _records(df):
+    # Plain Python values, missing values as None
+    return list(df.astype(object).where(df.notna(), None).itertuples(index=False, name=None))
+
+
+# ----------------- Tables -----------------
+# name -> (columns with their SQL type, primary key, indexes)
+TABLES = {
+    "games": (
+        [("game_id", "TEXT NOT NULL"), ("date", "TEXT"), ("season", "INTEGER"), ("away_team", "TEXT"),
+         ("home_team", "TEXT"), ("away_score", "INTEGER"), ("home_score", "INTEGER")],
+        ["game_id"],
+        [["date"], ["home_team", "season"], ["away_team", "season"]],
+    ),
+    "team_totals": (
+        [("game_id", "TEXT NOT NULL"), ("side", "TEXT"), ("team", "TEXT"), ("date", "TEXT")]
+        + [(stat, "REAL") for stat in TEAM_TOTALS_STATS],
+        ["game_id", "side"],
+        [["team", "date"], ["date"]],
+    ),
+    "standings": (
+        [("snapshot_date", "TEXT"), ("season", "INTEGER"), ("conference", "TEXT"), ("team", "TEXT"),
+         ("wins", "INTEGER"), ("losses", "INTEGER")],
+        ["snapshot_date", "conference", "team"],
+        [["conference", "snapshot_date"], ["team"]],
+    ),
+    "player_stats": (
+        # Traded players have one row per team plus a total row, so the team is part of the key
+        [("season", "INTEGER"), ("player", "TEXT"), ("player_id", "TEXT"), ("team", "TEXT"), ("rank", "REAL")]
+        + [(stat, "REAL") for stat in PLAYER_STATS_NUMERIC],
+        ["season", "player", "team"],
+        [["player", "season"], ["season", "team"]],
+    ),
+    # Tables materialized by the ETL from the ones above (see etl.materialize)
+    "leaderboards": (
+        [("season", "INTEGER"), ("stat", "TEXT"), ("rank", "INTEGER"), ("player", "TEXT"), ("team", "TEXT"),
+         ("value", "REAL")],
+        ["season", "stat", "rank"],
+        [],
+    ),
+    "team_averages": (
+        # split: season, home, away or last10 (the team's 10 latest games)
+        [("season", "INTEGER"), ("team", "TEXT"), ("split", "TEXT"), ("games", "INTEGER")]
+        + [(stat, "REAL") for stat in TEAM_TOTALS_STATS],
+        ["season", "team", "split"],
+        [["team", "season"]],
+    ),
+    "conference_standings": (
+        [("snapshot_date", "TEXT"), ("conference", "TEXT"), ("rank", "INTEGER"), ("team", "TEXT"),
+         ("wins", "INTEGER"), ("losses", "INTEGER"), ("win_pct", "REAL"), ("games_behind", "REAL")],
+        ["snapshot_date", "conference", "team"],
+        [["conference", "snapshot_date"]],
+    ),
+    # Score changes of the games in progress, published by the live poller (see live.py):
+    # every change gets the next version, so readers fetch only what changed since theirs
+    "live_scores": (
+        [("game_id", "TEXT NOT NULL"), ("date", "TEXT"), ("away_team", "TEXT"), ("home_team", "TEXT"),
+         ("away_score", "INTEGER"), ("home_score", "INTEGER"), ("version", "INTEGER"), ("updated", "TEXT")],
+        ["game_id"],
+        [["version"]],
+    ),
+}
+
+
+# ----------------- Warehouse -----------------
+class Warehouse:
+    """SQLite copy of the clean datasets, indexed for the dashboard lookups.
+
+    Loads are upserts on the table keys, so loading the same data twice changes nothing.
+    """
+
+    def __init__(self, path=DEFAULT_WAREHOUSE_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        for table, (columns, key, indexes) in TABLES.items():
+            self.conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                + ", ".join(f"{q(c)} {kind}" for c, kind in columns)
+                + f", PRIMARY KEY ({', '.join(q(c) for c in key)}))"
+            )
+            # Columns added since the table was created (e.g. player_stats.player_id) start out null
+            existing = {row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+            for column, kind in columns:
+                if column not in existing:
+                    self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {q(column)} {kind}")
+            for index in indexes:
+                self.conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_{table}_{'_'.join(index)} "
+                    f"ON {table} ({', '.join(q(c) for c in index)})"
+                )
+        # Warehouses created before game ids were required may hold games loaded without one
+        for table in ("games", "team_totals"):
+            self.conn.execute(f"DELETE FROM {table} WHERE game_id IS NULL")
+        self.conn.commit()
+
+    def _upsert_sql(self, table):
+        columns, key, _ = TABLES[table]
+        names = [c for c, _ in columns]
+        updates = ", ".join(f"{q(c)} = excluded.{q(c)}" for c in names if c not in key)
+        sql = (f"INSERT INTO {table} ({', '.join(q(c) for c in names)}) "
+               f"VALUES ({', '.join('?' * len(names))}) "
+               f"ON CONFLICT ({', '.join(q(c) for c in key)}) DO UPDATE SET {updates}")
+        return sql, names
+
+    def upsert(self, table, df):
+        sql, names = self._upsert_sql(table)
+        with self.lock:
+            with self.conn:
+                self.conn.executemany(sql, _records(df[names]))
+        return len(df)
+
+    def replace(self, table, df, **match):
+        """Replace the rows of `table` matching the column values in `match` with the rows of `df`.
+
+        One transaction: readers see the old rows or the new ones, never neither.
+        """
+        where = " AND ".join(f"{q(c)} = ?" for c in match)
+        sql, names = self._upsert_sql(table)
+        with self.lock:
+            with self.conn:
+                self.conn.execute(f"DELETE FROM {table} WHERE {where}", tuple(match.values()))
+                self.conn.executemany(sql, _records(df[names]))
+        return len(df)
+
+    def _query(self, sql, params=()):
+        # Lookups return a few rows: plain dicts cost far less to build than a DataFrame
+        with self.lock:
+            cursor = self.conn.execute(sql, params)
+            rows = cursor.fetchall()
+        columns = [d[0] for d in cursor.description]
+        return [dict(zip(columns, row)) for row in rows]
+
+    def _frame(self, sql, params=()):
+        # Bulk reads for the aggregates: tuples straight into a DataFrame
+        with self.lock:
+            cursor = self.conn.execute(sql, params)
+            rows = cursor.fetchall()
+        return pd.DataFrame.from_records(rows, columns=[d[0] for d in cursor.description])
+
+    # ----- Loading -----
+    def load_games(self, df):
+        """Upsert clean daily scores: one games row and two team_totals rows per game.
+
+        Rows without a game id are rejected: they could not be upserted, only duplicated.
+        """
+        missing = df["Game ID"].isna()
+        if missing.any():
+            print(f"Skipping {int(missing.sum())} games without a game id")
+            df = df[~missing]
+        dates = pd.to_datetime(df["Date"], format="%B %d, %Y")
+        games = pd.DataFrame({
+            "game_id": df["Game ID"], "date": dates.dt.strftime("%Y-%m-%d"), "season": season_of(dates),
+            "away_team": df["Away Team"], "home_team": df["Home Team"],
+            "away_score": df["Away Score"], "home_score": df["Home Score"],
+        })
+        self.upsert("games", games)
+        for side in ("Away", "Home"):
+            totals = pd.DataFrame({"game_id": df["Game ID"], "side": side, "team": df[f"{side} Team"],
+                                   "date": games["date"]})
+            for stat in TEAM_TOTALS_STATS:
+                totals[stat] = df[f"{side} {stat}"]
+            self.upsert("team_totals", totals)
+        return len(games)
+
+    def load_standings(self, df, snapshot_date=None, season=None):
+        """Upsert a standings snapshot (by default: today's)."""
+        snapshot_date = snapshot_date or date.today().isoformat()
+        standings = pd.DataFrame({
+            "snapshot_date": snapshot_date, "season": season or self.current_season(),
+            "conference": df["Conference"], "team": df["Team"], "wins": df["Wins"], "losses": df["Losses"],
+        })
+        return self.upsert("standings", standings)
+
+    def load_player_stats(self, df, season=None):
+        """Upsert the per-game player averages of a season (by default: the current one)."""
+        stats = pd.DataFrame({"season": season or self.current_season(), "player": df["Player Name"],
+                              "player_id": df.get("Player ID"), "team": df["Team"], "rank": df["Rank"]})
+        for stat in PLAYER_STATS_NUMERIC:
+            stats[stat] = df[stat]
+        return self.upsert("player_stats", stats)
+
+    LOADERS = {
+        "daily_scores": "load_games",
+        "league_standings": "load_standings",
+        "player_stats": "load_player_stats",
+    }
+
+    def load(self, name, df):
+        """Load a clean frame of dataset `name` (daily_scores, league_standings or player_stats)."""
+        with metrics.span("etl", function="warehouse_load", dataset=name) as span:
+            span.rows = len(df)
+            return getattr(self, self.LOADERS[name])(df)
+
+    def load_store(self):
+        """Load every clean dataset of the storage layer."""
+        for name in self.LOADERS:
+            if storage.exists(f"{name}_clean"):
+                for chunk in storage.iter_chunks(f"{name}_clean", 100_000):
+                    self.load(name, chunk)
+
+    def data_version(self):
+        """Changes whenever another connection commits to the database (SQLite's PRAGMA data_version)."""
+        with self.lock:
+            return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def is_empty(self, table="games"):
+        with self.lock:
+            return self.conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone() is None
+
+    # ----- Queries -----
+    # Lookups return lists of row dicts, keyed like the clean datasets' columns
+    def current_season(self):
+        """Season of the latest stored game, or of today when there are none."""
+        with self.lock:
+            season = self.conn.execute("SELECT MAX(season) FROM games").fetchone()[0]
+        if season is None:
+            season = int(season_of(pd.Series([pd.Timestamp.today()])).iloc[0])
+        return season
+
+    def latest_date(self):
+        with self.lock:
+            return self.conn.execute("SELECT MAX(date) FROM games").fetchone()[0]
+
+    # Games with both team totals
+    GAMES_FROM = ("FROM games g "
+                  "JOIN team_totals A ON A.game_id = g.game_id AND A.side = 'Away' "
+                  "JOIN team_totals H ON H.game_id = g.game_id AND H.side = 'Home' ")
+
+    @staticmethod
+    def _game_filters(game_id=None, game_date=None, team=None, season=None):
+        where, params = [], []
+        if game_id is not None:
+            where.append("g.game_id = ?")
+            params.append(game_id)
+        if season is not None:
+            where.append("g.season = ?")
+            params.append(season)
+        if game_date is not None:
+            where.append("g.date = ?")
+            params.append(game_date)
+        if team is not None:
+            where.append("(g.home_team = ? OR g.away_team = ?)")
+            params += [team, team]
+        return (f"WHERE {' AND '.join(where)} " if where else ""), params
+
+    def games(self, game_date=None, team=None, season=None, game_id=None, limit=None, offset=0, newest_first=False):
+        """Games with both team totals, in the layout of the clean scores (Date as "December 16, 2024").
+
+        Filter on a game id, a date (YYYY-MM-DD), a team playing home or away and/or a season;
+        `limit` and `offset` select a page of the games, oldest first unless `newest_first`.
+        """
+        where, params = self._game_filters(game_id, game_date, team, season)
+        if limit is not None:
+            params += [limit, offset]
+        totals = ", ".join(f"{side[0]}.{q(stat)} AS {q(side + ' ' + stat)}"
+                           for side in ("Away", "Home") for stat in TEAM_TOTALS_STATS)
+        games = self._query(
+            f'SELECT g.game_id AS "Game ID", g.date AS "Date", g.away_team AS "Away Team", '
+            f'g.away_score AS "Away Score", g.home_team AS "Home Team", g.home_score AS "Home Score", {totals} '
+            + self.GAMES_FROM + where
+            + ("ORDER BY g.date DESC, g.rowid " if newest_first else "ORDER BY g.date, g.rowid ")
+            + ("LIMIT ? OFFSET ?" if limit is not None else ""),
+            params,
+        )
+        for game in games:
+            game["Date"] = display_date(game["Date"])
+        return games
+
+    def game_count(self, game_date=None, team=None, season=None):
+        """Number of games() with the same filters."""
+        where, params = self._game_filters(None, game_date, team, season)
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) " + self.GAMES_FROM + where, params).fetchone()[0]
+
+    def game(self, game_id):
+        """One game with its team totals, or None."""
+        games = self.games(game_id=game_id)
+        return games[0] if games else None
+
+    def latest_games(self):
+        """Games of the latest stored night."""
+        return self.games(game_date=self.latest_date())
+
+    def team_totals(self, team):
+        """Box score totals of one team, game by game."""
+        return self._query("SELECT * FROM team_totals WHERE team = ? ORDER BY date", (team,))
+
+    def standings(self, conference, snapshot_date=None):
+        """Standings of a conference from a snapshot (the latest by default), best record first."""
+        if snapshot_date is None:
+            with self.lock:
+                snapshot_date = self.conn.execute(
+                    "SELECT MAX(snapshot_date) FROM standings WHERE conference = ?", (conference,)
+                ).fetchone()[0]
+        return self._query(
+            'SELECT conference AS "Conference", team AS "Team", wins AS "Wins", losses AS "Losses" '
+            "FROM standings WHERE conference = ? AND snapshot_date = ? ORDER BY wins DESC",
+            (conference, snapshot_date),
+        )
+
+    def player_names(self, season=None):
+        rows = self._query("SELECT DISTINCT player FROM player_stats WHERE season = ? ORDER BY rank",
+                           (season or self.current_season(),))
+        return [row["player"] for row in rows]
+
+    def player(self, name, season=None):
+        """Season averages of a player (the total row for traded players), or None."""
+        rows = self._query(
+            f'SELECT player AS "Player Name", team AS "Team", {", ".join(q(s) for s in PLAYER_STATS_NUMERIC)} '
+            "FROM player_stats WHERE player = ? AND season = ? ORDER BY rank LIMIT 1",
+            (name, season or self.current_season()),
+        )
+        return rows[0] if rows else None
+
+    # ----- Aggregate inputs -----
+    def player_rows(self, season=None):
+        """Every player_stats row of a season, in the site's rank order, as a DataFrame."""
+        return self._frame("SELECT * FROM player_stats WHERE season = ? ORDER BY rank",
+                           (season or self.current_season(),))
+
+    def team_season_totals(self, pairs=None):
+        """Box score totals with their season, for some (team, season) pairs or all of them."""
+        if pairs is None:
+            df = self._frame("SELECT * FROM team_totals")
+        else:
+            # A season is a date range of the (team, date) index
+            df = pd.concat([self._frame("SELECT * FROM team_totals WHERE team = ? AND date >= ? AND date < ?",
+                                        (team, *season_bounds(season))) for team, season in pairs],
+                           ignore_index=True)
+        df["season"] = season_of(pd.to_datetime(df["date"], format="%Y-%m-%d"))
+        return df
+
+    def standings_snapshot(self, snapshot_date=None):
+        """Every row of a standings snapshot (the latest by default), as a DataFrame."""
+        if snapshot_date is None:
+            with self.lock:
+                snapshot_date = self.conn.execute("SELECT MAX(snapshot_date) FROM standings").fetchone()[0]
+        return self._frame("SELECT * FROM standings WHERE snapshot_date = ?", (snapshot_date,))
+
+    # ----- Aggregate lookups -----
+    def leaderboard(self, stat, n=10, season=None):
+        """Top `n` players of a stat: [{"Player Name", "Team", stat}, ...], best first."""
+        return self._query(
+            f'SELECT player AS "Player Name", team AS "Team", value AS {q(stat)} FROM leaderboards '
+            "WHERE season = ? AND stat = ? AND rank <= ? ORDER BY rank",
+            (season or self.current_season(), stat, n),
+        )
+
+    def team_averages(self, team, season=None):
+        """Per-game averages of a team: {split: {"games", stat: value, ...}} for the season, home, away and last10 splits."""
+        rows = self._query("SELECT * FROM team_averages WHERE team = ? AND season = ?",
+                           (team, season or self.current_season()))
+        return {row.pop("split"): row for row in rows}
+
+    def conference_standings(self, conference):
+        """Latest standings of a conference with win% and games behind, best record first."""
+        return self._query(
+            'SELECT rank AS "Rank", team AS "Team", wins AS "Wins", losses AS "Losses", '
+            'win_pct AS "Win%", games_behind AS "GB" FROM conference_standings '
+            "WHERE conference = ? AND snapshot_date = "
+            "(SELECT MAX(snapshot_date) FROM conference_standings WHERE conference = ?) ORDER BY rank",
+            (conference, conference),
+        )
+
+    # ----- Live scores -----
+    def publish_live(self, df):
+        """Upsert the changed games of a clean daily scores frame as live score deltas; returns the new version."""
+        with self.lock:
+            version = self.conn.execute("SELECT COALESCE(MAX(version), 0) FROM live_scores").fetchone()[0] + 1
+        dates = pd.to_datetime(df["Date"], format="%B %d, %Y")
+        self.upsert("live_scores", pd.DataFrame({
+            "game_id": df["Game ID"], "date": dates.dt.strftime("%Y-%m-%d"),
+            "away_team": df["Away Team"], "home_team": df["Home Team"],
+            "away_score": df["Away Score"], "home_score": df["Home Score"],
+            "version": version, "updated": datetime.now().isoformat(timespec="seconds"),
+        }))
+        return version
+
+    def live_version(self):
+        with self.lock:
+            return self.conn.execute("SELECT COALESCE(MAX(version), 0) FROM live_scores").fetchone()[0]
+
+    def live_scores(self, since=0):
+        """Live score rows changed after version `since`, oldest change first."""
+        return self._query(
+            'SELECT game_id AS "Game ID", away_score AS "Away Score", home_score AS "Home Score", version '
+            "FROM live_scores WHERE version > ? ORDER BY version",
+            (since,),
+        )
+
+    def counts(self):
+        with self.lock:
+            return {table: self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in TABLES}
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="(Re)load the SQLite warehouse from the clean store.")
+    parser.add_argument("--path", default=DEFAULT_WAREHOUSE_PATH)
+    args = parser.parse_args(argv)
+    import etl  # etl loads the warehouse: imported here to avoid a cycle
+    warehouse = Warehouse(args.path)
+    warehouse.load_store()
+    etl.materialize(warehouse)
+    print(", ".join(f"{table}: {rows} rows" for table, rows in warehouse.counts().items()))
+    warehouse.close()
+
+if __name__ == "__main__":
+    main()